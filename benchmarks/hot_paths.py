@@ -0,0 +1,316 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from spotifytools import spotify
+from spotifytools.arrow_export import export_collection
+from spotifytools.helpers import adapt_details, details_adapter, features_adapter, filter_false_tracks, \
+    remove_duplicates, uniform_title
+from spotifytools.spotify_session import SpotifySession
+from spotifytools.synthetic import SyntheticLibrary
+from spotifytools.transport import loads
+
+"""
+Benchmarks of the code that dominates CPU time when working with large libraries.
+
+Every benchmark runs on payloads generated by SyntheticLibrary for each size and reports the throughput in items per
+second, the peak memory allocated while it runs and the memory still held by what it returns. Results are saved as
+JSON, and a previous results file can be passed to compare against, e.g. to catch regressions between versions:
+
+    python -m benchmarks.hot_paths --sizes 1000 10000 --output before.json
+    python -m benchmarks.hot_paths --sizes 1000 10000 --compare before.json
+
+Timing and memory are measured in separate runs, since tracing allocations slows the code down considerably.
+"""
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# Tracks in each playlist of the library built for collection benchmarks.
+PLAYLIST_SIZE = 100
+
+
+def session(compact=False, lazy=False):
+    # A static token keeps the session offline, no request is made by any of the benchmarks.
+    return SpotifySession(access_token='benchmark', compact=compact, lazy=lazy)
+
+
+def track_payloads(library, size):
+    return [library.track(n) for n in range(size)]
+
+
+def playlist_items(library, size):
+    """Return items of playlist pages, with some local tracks and items without a track among them."""
+    items = []
+    for n in range(size):
+        if n % 50 == 0:
+            items.append({'is_local': False, 'track': None})
+        elif n % 50 == 1:
+            items.append({'is_local': True, 'track': {**library.track(n), 'is_local': True}})
+        else:
+            items.append({'is_local': False, 'track': library.track(n)})
+    return items
+
+
+def loaded_user(library, size):
+    """Return a user with playlists of tracks with complete details and features."""
+    sp = session()
+    tracks = [sp.factory.get_resource(payload) for payload in track_payloads(library, size)]
+    for n, track in enumerate(tracks):
+        track.parse_features(features_adapter(library.features(n)))
+    playlists = []
+    for start in range(0, size, PLAYLIST_SIZE):
+        playlist = sp.factory.get_resource(library.playlist(start // PLAYLIST_SIZE, simplified=True))
+        playlist.children = tracks[start:start + PLAYLIST_SIZE]
+        playlist.children_loaded = True
+        playlists.append(playlist)
+    user = spotify.User(sp, {'uri': 'spotify:user:benchmark', 'name': 'Benchmark'}, children=playlists)
+    user.children_loaded = True
+    return user, tracks
+
+
+# Each benchmark prepares its input outside of the measurement and returns the function to measure.
+def bench_details_adapter(library, size):
+    payloads = track_payloads(library, size)
+    return lambda: [details_adapter(payload) for payload in payloads]
+
+
+def bench_adapt_details(library, size):
+    payloads = track_payloads(library, size)
+    return lambda: [adapt_details(payload) for payload in payloads]
+
+
+def bench_get_resource_create(library, size):
+    payloads = track_payloads(library, size)
+    factory = session().factory
+    return lambda: [factory.get_resource(payload) for payload in payloads]
+
+
+def bench_get_resources(library, size):
+    payloads = track_payloads(library, size)
+    factory = session().factory
+    return lambda: factory.get_resources(payloads)
+
+
+def bench_get_resource_decoded(library, size, compact=False):
+    # Payloads are decoded in the run, so like responses from the API they aren't held by anything else.
+    content = [json.dumps(payload) for payload in track_payloads(library, size)]
+    factory = session(compact).factory
+    return lambda: [factory.get_resource(loads(payload)) for payload in content]
+
+
+def bench_get_resource_compact(library, size):
+    return bench_get_resource_decoded(library, size, compact=True)
+
+
+def bench_get_resource_merge(library, size):
+    payloads = track_payloads(library, size)
+    factory = session().factory
+    for payload in payloads:
+        factory.get_resource({key: payload[key] for key in payload if key != 'popularity'})
+    return lambda: [factory.get_resource(payload) for payload in payloads]
+
+
+def bench_filter_false_tracks(library, size):
+    items = playlist_items(library, size)
+    return lambda: filter_false_tracks(items)
+
+
+def bench_get_tracks(library, size):
+    user, tracks = loaded_user(library, size)
+    return user.get_tracks
+
+
+def bench_get_features(library, size):
+    user, tracks = loaded_user(library, size)
+
+    def run():
+        user.features = {}
+        return user.get_features()
+    return run
+
+
+def playlist_pages(library, size):
+    """Return JSON content of pages of a playlist's items, 100 items per page like Spotify's."""
+    items = playlist_items(library, size)
+    return [json.dumps({'items': items[offset:offset + 100]}) for offset in range(0, size, 100)]
+
+
+def bench_decode_playlist(library, size):
+    pages = playlist_pages(library, size)
+    return lambda: [filter_false_tracks(loads(page)['items']) for page in pages]
+
+
+def bench_scan_playlist(library, size, lazy=False):
+    # Pages are decoded and parsed, and only the URI and the name of each track are read, like in a listing.
+    pages = playlist_pages(library, size)
+    factory = session(lazy=lazy).factory
+
+    def run():
+        tracks = [track for page in pages for track in factory.get_resources(filter_false_tracks(loads(page)['items']))]
+        return [(track.uri, track.name) for track in tracks]
+    return run
+
+
+def bench_scan_playlist_lazy(library, size):
+    return bench_scan_playlist(library, size, lazy=True)
+
+
+def bench_feature_table_mean(library, size):
+    # Rows of complete tracks are already written, like on every aggregate after the first one.
+    user, tracks = loaded_user(library, size)
+    table = user.sp.feature_table
+    table.update(tracks)
+    return lambda: table.mean(table.update(tracks))
+
+
+def bench_load_snapshot(library, size, create=False):
+    # The snapshot is saved once per size and overwritten by the next preparation. Resources are only created when
+    # they're looked up, unless all of them are created by listing the cache.
+    user, tracks = loaded_user(library, size)
+    path = os.path.join(tempfile.gettempdir(), f'spotifytools-benchmark-{size}.snap')
+    user.sp.save_snapshot(path)
+
+    def run():
+        sp = session()
+        sp.load_snapshot(path)
+        if create:
+            sp.factory.cache.values()
+        return sp
+    return run
+
+
+def bench_load_snapshot_all(library, size):
+    return bench_load_snapshot(library, size, create=True)
+
+
+def bench_export_parquet(library, size):
+    # Peak memory stays around the size of a single row group, however many tracks are exported.
+    user, tracks = loaded_user(library, size)
+    path = os.path.join(tempfile.gettempdir(), f'spotifytools-benchmark-{size}.parquet')
+    return lambda: export_collection(user, path)
+
+
+def bench_remove_duplicates(library, size):
+    user, tracks = loaded_user(library, size)
+    return lambda: remove_duplicates(tracks)
+
+
+def bench_uniform_title(library, size):
+    names = [payload['name'] for payload in track_payloads(library, size)]
+    return lambda: [uniform_title(name) for name in names]
+
+
+BENCHMARKS = {
+    'details_adapter': bench_details_adapter,
+    'adapt_details': bench_adapt_details,
+    'get_resource_create': bench_get_resource_create,
+    'get_resources': bench_get_resources,
+    'get_resource_decoded': bench_get_resource_decoded,
+    'get_resource_compact': bench_get_resource_compact,
+    'get_resource_merge': bench_get_resource_merge,
+    'filter_false_tracks': bench_filter_false_tracks,
+    'decode_playlist': bench_decode_playlist,
+    'scan_playlist': bench_scan_playlist,
+    'scan_playlist_lazy': bench_scan_playlist_lazy,
+    'get_tracks': bench_get_tracks,
+    'get_features': bench_get_features,
+    'feature_table_mean': bench_feature_table_mean,
+    'load_snapshot': bench_load_snapshot,
+    'load_snapshot_all': bench_load_snapshot_all,
+    'export_parquet': bench_export_parquet,
+    'remove_duplicates': bench_remove_duplicates,
+    'uniform_title': bench_uniform_title,
+}
+
+
+def measure(benchmark, library, size, repeat):
+    """
+    Return the best time of the benchmark in seconds, the peak memory allocated by a single run and the memory still
+    held by its result in bytes.
+    """
+    times = []
+    for i in range(repeat):
+        run = benchmark(library, size)
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+        del run
+    run = benchmark(library, size)
+    gc.collect()
+    tracemalloc.start()
+    result = run()
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return min(times), peak, retained
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, previous):
+    """Print the change of throughput and peak memory against previous results."""
+    previous = {(result['benchmark'], result['size']): result for result in previous['results']}
+    print(f"\n{'benchmark':<24}{'size':>9}{'throughput':>12}{'peak memory':>13}{'retained':>10}")
+    for result in results:
+        if before := previous.get((result['benchmark'], result['size'])):
+            speed = result['throughput'] / before['throughput']
+            memory = result['peak_memory'] / before['peak_memory'] if before['peak_memory'] else float('nan')
+            # Results saved before retained memory was measured don't have it.
+            retained = before.get('retained_memory')
+            retained = result['retained_memory'] / retained if retained else float('nan')
+            print(f"{result['benchmark']:<24}{result['size']:>9}{speed:>11.2f}x{memory:>12.2f}x{retained:>9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths of building and processing resources.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Numbers of tracks, up to 1M.")
+    parser.add_argument('--benchmarks', nargs='+', choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=3, help="Number of timed runs, the best one is reported.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Path of the JSON results file.")
+    parser.add_argument('--compare', help="Path of previous JSON results to compare against.")
+    args = parser.parse_args()
+
+    library = SyntheticLibrary(seed=args.seed, tracks=max(args.sizes))
+    results = []
+    print(f"{'benchmark':<24}{'size':>9}{'seconds':>10}{'items/s':>12}{'peak MB':>10}{'retained MB':>13}")
+    for size in args.sizes:
+        for name in args.benchmarks:
+            seconds, peak, retained = measure(BENCHMARKS[name], library, size, args.repeat)
+            results.append({'benchmark': name, 'size': size, 'seconds': seconds, 'throughput': size / seconds,
+                            'peak_memory': peak, 'retained_memory': retained})
+            print(f"{name:<24}{size:>9}{seconds:>10.4f}{size / seconds:>12.0f}{peak / 2 ** 20:>10.1f}"
+                  f"{retained / 2 ** 20:>13.1f}")
+
+    output = args.output or f"benchmark-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.json"
+    with open(output, 'w') as file:
+        json.dump({
+            'revision': git_revision(),
+            'date': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'seed': args.seed,
+            'results': results,
+        }, file, indent=2)
+    print(f"Results saved to {output}")
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import gzip
+import json
+import timeit
+
+from spotifytools import transport
+from spotifytools.synthetic import SyntheticLibrary
+
+"""
+Measures the cost of decoding a single page of Spotify responses.
+
+Compares the standard library parser used by requests with the parser used by the transport and shows the size of
+each page before and after compression. Pages are generated by SyntheticLibrary, so no network is needed.
+
+    python -m benchmarks.json_decode --repeat 200
+"""
+
+
+def pages(library):
+    """Return the encoded payloads of the largest responses requested by SpotifySession."""
+    return {
+        'playlist_items (100)': library.playlist_items(0, 0, 100),
+        'albums (20)': {'albums': [library.album(n) for n in range(20)]},
+        'tracks (50)': {'tracks': [library.track(n) for n in range(50)]},
+        'audio_features (100)': {'audio_features': [library.features(n) for n in range(100)]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cost of decoding pages of Spotify responses.")
+    parser.add_argument('--repeat', type=int, default=100, help="Number of times each page is decoded.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    library = SyntheticLibrary(seed=args.seed, playlist_tracks=100)
+    parser_name = 'orjson' if transport.orjson is not None else 'json (orjson not installed)'
+    print(f"{'page':<22}{'bytes':>10}{'gzip':>10}{'json ms':>10}{parser_name + ' ms':>12}{'speedup':>10}")
+    for name, payload in pages(library).items():
+        content = json.dumps(payload).encode()
+        before = timeit.timeit(lambda: json.loads(content), number=args.repeat) / args.repeat * 1000
+        after = timeit.timeit(lambda: transport.loads(content), number=args.repeat) / args.repeat * 1000
+        print(f"{name:<22}{len(content):>10}{len(gzip.compress(content)):>10}{before:>10.3f}{after:>12.3f}"
+              f"{before / after:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
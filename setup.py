@@ -32,6 +32,8 @@ setup(
                         'langdetect>=1.0.9',
                         'Levenshtein>=0.20.9',
                         'lyricsgenius>=3.0.1',
+                        'numpy>=1.21',
+                        'pyarrow>=10.0',
                         'python-dotenv>=0.21.1',
                         'python-Levenshtein>=0.20.9',
                         'rapidfuzz>=2.13.7',
@@ -1,3 +1,4 @@
 from spotifytools.genius_session import GeniusSession
 from spotifytools.spotify_session import SpotifySession
+from spotifytools.async_spotify_session import AsyncSpotifySession
 from spotifytools.spotify import *
\ No newline at end of file
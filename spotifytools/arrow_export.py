@@ -0,0 +1,147 @@
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import spotifytools.spotify as spotify
+from spotifytools.exceptions import SpotifyToolsException
+
+"""
+Export of tracks in a collection with their details and audio features to Parquet or Arrow IPC files.
+
+Each row is a track with the URIs of its album and artists as keys, and the playlist it's in along with its position
+there, so a track in several playlists of a user has a row for each of them. Children which aren't loaded yet are
+downloaded page by page and rows are written in row groups as the pages arrive. Details and features of the tracks in
+each row group are loaded before it's written, and those Spotify doesn't have are written as nulls.
+
+Only one row group and the pages requested ahead are held by the export however large it is, but tracks stay in the
+cache of the session's factory, so memory use is only bounded for sessions created with max_resources.
+"""
+
+# Number of rows in each row group, or record batch of an Arrow file.
+ROW_GROUP_SIZE = 65536
+
+SCHEMA = pa.schema([
+    ('uri', pa.string()),
+    ('name', pa.string()),
+    ('album', pa.string()),
+    ('artists', pa.list_(pa.string())),
+    ('playlist', pa.string()),
+    ('position', pa.int32()),
+    ('duration', pa.int32()),
+    ('popularity', pa.int8()),
+    ('explicit', pa.bool_()),
+    ('track_number', pa.int16()),
+    ('disc_number', pa.int16()),
+    ('valence', pa.float32()),
+    ('energy', pa.float32()),
+    ('dance', pa.float32()),
+    ('speech', pa.float32()),
+    ('acoustic', pa.float32()),
+    ('instrumental', pa.float32()),
+    ('live', pa.float32()),
+    ('tempo', pa.float32()),
+    ('key', pa.int8()),
+    ('mode', pa.int8()),
+    ('signature', pa.int8()),
+])
+
+# Columns taken from the details of the track.
+DETAILS = [name for name in SCHEMA.names if name not in ('uri', 'album', 'artists', 'playlist', 'position')]
+
+FORMATS = {'.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+
+
+def iter_rows(collection, playlist_uri=None, keep=False):
+    """Yield each track under the collection with the URI of the playlist it's in and its position there."""
+    for position, child in enumerate(collection.iter_children(keep)):
+        if isinstance(child, spotify.Playlist):
+            yield from iter_rows(child, child.uri, keep)
+        elif isinstance(child, spotify.Collection):
+            yield from iter_rows(child, playlist_uri, keep)
+        elif child.resource_type is spotify.Track:
+            yield child, playlist_uri, position if playlist_uri is not None else None
+
+
+def iter_batches(collection, row_group_size=ROW_GROUP_SIZE, keep=False, load=True):
+    """
+    Yield record batches of the collection's rows.
+
+    Details and features missing from the tracks of each batch are loaded before it's built, unless load is False.
+    The tracks stay in the cache of the session's factory, so memory use only stays within a batch and the pages
+    requested ahead if the session was created with max_resources.
+    """
+    # Tracks of an artist's albums are only included if the artist is one of their artists, like in get_tracks.
+    artist = collection if isinstance(collection, spotify.Artist) else None
+    rows = []
+    playlist_uri = collection.uri if isinstance(collection, spotify.Playlist) else None
+    for row in iter_rows(collection, playlist_uri, keep):
+        if artist is not None and artist not in row[0].artists:
+            continue
+        rows.append(row)
+        if len(rows) == row_group_size:
+            yield record_batch(collection.sp, rows, load)
+            rows = []
+    if rows:
+        yield record_batch(collection.sp, rows, load)
+
+
+def record_batch(sp, rows, load=True):
+    """Return a record batch of rows yielded by iter_rows, loading details and features of their tracks first."""
+    if load:
+        # A track in several playlists has a row for each of them.
+        sp.load(list({track.uri: track for track, _, _ in rows}.values()), details=True, features=True)
+    columns = {name: [] for name in SCHEMA.names}
+    for track, playlist_uri, position in rows:
+        details = track.details
+        columns['uri'].append(track.uri)
+        columns['album'].append(track.album.uri if track.album is not None else None)
+        columns['artists'].append([track_artist.uri for track_artist in track.artists or []])
+        columns['playlist'].append(playlist_uri)
+        columns['position'].append(position)
+        for name in DETAILS:
+            columns[name].append(details.get(name))
+    return pa.RecordBatch.from_pydict(columns, schema=SCHEMA)
+
+
+def export_collection(collection, path, file_format=None, row_group_size=ROW_GROUP_SIZE, keep=False, load=True):
+    """
+    Write tracks of the collection to a Parquet or Arrow IPC file. Returns the number of rows written.
+
+    The format is taken from the extension of the path unless it's given, and defaults to Parquet. Children of the
+    collection which aren't loaded yet are downloaded as in Collection.iter_children, and are only added to their
+    collections if keep is set. Details and features of the tracks are loaded unless load is False, see iter_batches.
+    """
+    file_format = file_format or FORMATS.get(os.path.splitext(path)[1], 'parquet')
+    if file_format == 'parquet':
+        writer = pq.ParquetWriter(path, SCHEMA, compression='zstd')
+    elif file_format == 'arrow':
+        writer = pa.ipc.new_file(path, SCHEMA)
+    else:
+        raise SpotifyToolsException(f"Unsupported export format: {file_format}.")
+    rows = 0
+    with writer:
+        for batch in iter_batches(collection, row_group_size, keep, load):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def read_export(path, columns=None, filters=None):
+    """
+    Read an exported file into a table, optionally only some of its columns and the rows matching filters.
+
+    Filters are a pyarrow.compute expression, e.g. pyarrow.compute.field('energy') > 0.8. Parquet files are read
+    only as far as the columns and the filters need.
+    """
+    with open(path, 'rb') as file:
+        magic = file.read(6)
+    if magic[:4] == b'PAR1':
+        return pq.read_table(path, columns=columns, filters=filters)
+    if magic == b'ARROW1':
+        # The table is read without copying from the memory map, which stays open as long as the table uses it.
+        table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+        if filters is not None:
+            table = table.filter(filters)
+        return table.select(columns) if columns else table
+    raise SpotifyToolsException(f"Not an exported file: {path}.")
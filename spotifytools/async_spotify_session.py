@@ -0,0 +1,131 @@
+import asyncio
+from typing import List
+
+import spotifytools.spotify as spotify
+from spotifytools.spotify_session import SpotifySession
+from spotifytools.exceptions import SpotifyToolsUnauthorizedException
+
+"""
+Asyncio interface for loading large amounts of Spotify data concurrently.
+
+Spotipy only offers blocking requests, so every request is made by the request methods of a regular SpotifySession
+on a worker thread, while all parsing happens on the event loop. This way resources are only ever created by the
+session's ResourceFactory from a single thread and are shared with the wrapped synchronous session.
+"""
+
+# Default number of requests allowed to be in flight at the same time.
+CONCURRENCY = 8
+
+
+class AsyncSpotifySession:
+
+    def __init__(self, session: SpotifySession = None, concurrency=CONCURRENCY):
+        """Wraps an existing session or initializes a new unauthorized one."""
+        self.session = session or SpotifySession()
+        self.factory = self.session.factory
+        self.concurrency = concurrency
+        self._loop = None
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        """Return the semaphore limiting concurrent requests, creating a new one for each event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def _call(self, request_method, *args, **kwargs):
+        """Run a blocking request method on a worker thread without exceeding the concurrency cap."""
+        async with self.semaphore:
+            return await asyncio.to_thread(request_method, *args, **kwargs)
+
+    async def fetch_item(self, uri, reload=False, raw=False):
+        if uri not in self.factory.cache or reload or raw:
+            if not (reload or raw) and (shared := self.factory.from_shared_cache([uri])):
+                return shared[0]
+            response = await self._call(self.session._item, uri, refresh=reload)
+            if raw:
+                return response
+            resource = self.factory.get_resource(response)
+            self.factory.share([resource])
+            return resource
+        else:
+            return self.factory.cache[uri]
+
+    async def search(self, query, search_type='track,artist,playlist,album', limit=50):
+        """Returns objects representing Spotify search results."""
+        response = await self._call(self.session._search, query, search_type, limit)
+        return self.session._parse_search(response)
+
+    async def fetch_user_playlists(self, user: spotify.User):
+        """Return all publicly visible playlists from the library of user with given id."""
+        if not self.session.authorized:
+            raise SpotifyToolsUnauthorizedException()
+        pages = await self._fetch_pages(user, self.session._user_playlists, 0, 50)
+        return self.factory.get_resources([item for page in pages if 'items' in page for item in page['items']])
+
+    async def load(self, items: List[spotify.Resource], details=False, features=False, children=False):
+        """
+        Downloads and updates details, features and children for a list of resources.
+
+        Works like SpotifySession.load, except all batches of all types are requested concurrently.
+        Returns a summary of the load in the same format.
+        """
+        if not isinstance(items, list):
+            items = [items]
+
+        fetch_methods = {
+            'details': self._fetch_bulk_details,
+            'features': self._fetch_bulk_details,
+            'children': self._fetch_bulk_children,
+        }
+
+        plan, summary = self.session._plan_load(items, details, features, children)
+        plan = self.session._skip_shared(plan, summary)
+        requests = await asyncio.gather(*(fetch_methods[c](batch, *case) for c, batch, case in plan))
+        for (c, batch, case), count in zip(plan, requests):
+            summary[c]['requested'] += len(batch)
+            summary[c]['requests'] += count
+        return summary
+
+    async def _fetch_bulk_details(self, items, request_method, parsing_method, limit):
+        """Requests all batches of items at once and passes each response to parsing_method as soon as it arrives."""
+
+        async def fetch_batch(batch):
+            response = await self._call(request_method, batch)
+            parsing_method(batch, response)
+
+        batches = [items[i: i + limit] for i in range(0, len(items), limit)]
+        await asyncio.gather(*(fetch_batch(batch) for batch in batches))
+        return len(batches)
+
+    async def _fetch_bulk_children(self, items, request_method, parsing_method, limit):
+        """Requests the children of all items at once and passes them to parsing_method once each item is complete."""
+
+        async def fetch_children(item):
+            offset = len(item.children)  # Compensate for children already known.
+            pages = await self._fetch_pages(item, request_method, offset, limit)
+            parsing_method(item, [child for page in pages for child in page['items']])
+            return len(pages)
+
+        return sum(await asyncio.gather(*(fetch_children(item) for item in items)))
+
+    async def _fetch_pages(self, item, request_method, offset, limit):
+        """
+        Return all pages of a paged response in order.
+
+        The first page reports the total number of items, so all remaining pages can be requested at once.
+        If the total is missing, the pages are followed one by one.
+        """
+        response = await self._call(request_method, item, offset=offset)
+        pages = [response]
+        if offsets := SpotifySession._remaining_offsets(response, offset, limit):
+            pages.extend(await asyncio.gather(*(self._call(request_method, item, offset=o) for o in offsets)))
+        elif 'total' not in response:
+            while response['next']:
+                offset += limit
+                response = await self._call(request_method, item, offset=offset)
+                pages.append(response)
+        return pages
@@ -0,0 +1,165 @@
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from spotifytools.exceptions import SpotifyToolsException
+from spotifytools.transport import Transport
+
+"""
+Record and replay of Spotify API responses.
+
+In record mode, requests are sent to Spotify and their responses are stored in a cassette file. In replay mode, the
+stored responses are returned without touching the network, after an optional artificial latency. Replaying the same
+cassette makes the whole path from a request through decoding, parsing and loading reproducible on a machine without
+network access, so it can be profiled and benchmarked.
+
+A replaying session needs no credentials for Spotify, so it's given a static access token:
+
+    transport = CassetteTransport('library.json', mode='replay', latency=0.05)
+    sp = SpotifySession(transport=transport, access_token='replay')
+"""
+
+MODES = ('record', 'replay')
+
+# Response headers kept in the cassette.
+HEADERS = ('Content-Type', 'Retry-After')
+
+
+class CassetteMissException(SpotifyToolsException):
+    """Raised when a replayed request has no recorded response."""
+    pass
+
+
+def request_key(method, url):
+    """Return a key identifying a request, independent of the order of query parameters."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method} {urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))}"
+
+
+class Cassette:
+    """Responses recorded for each request, in the order they were received."""
+
+    def __init__(self, path):
+        self.path = path
+        self.interactions = {}  # Lists of recorded responses indexed by request key.
+        self.played = {}  # Number of times each request was replayed.
+        self.lock = threading.Lock()
+
+    def load(self):
+        with open(self.path) as file:
+            data = json.load(file)
+        self.interactions = {}
+        for interaction in data['interactions']:
+            self.interactions.setdefault(interaction['request'], []).append(interaction['response'])
+        self.played = {}
+        return self
+
+    def save(self):
+        interactions = [{'request': key, 'response': response}
+                        for key, responses in self.interactions.items() for response in responses]
+        with open(self.path, 'w') as file:
+            json.dump({'version': 1, 'interactions': interactions}, file)
+
+    def record(self, key, response: requests.Response):
+        entry = {
+            'status': response.status_code,
+            'headers': {header: response.headers[header] for header in HEADERS if header in response.headers},
+            'body': response.content.decode('utf-8'),
+        }
+        with self.lock:
+            self.interactions.setdefault(key, []).append(entry)
+
+    def play(self, key):
+        """
+        Return the next response recorded for the request.
+
+        Requests made more times than they were recorded get the last recorded response again.
+        """
+        with self.lock:
+            if key not in self.interactions:
+                raise CassetteMissException(f"No response recorded for {key}.")
+            responses = self.interactions[key]
+            played = self.played.get(key, 0)
+            self.played[key] = played + 1
+        return responses[min(played, len(responses) - 1)]
+
+
+class RecordingAdapter(requests.adapters.HTTPAdapter):
+    """Sends requests to the network and records their responses."""
+
+    def __init__(self, cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        self.cassette.record(request_key(request.method, request.url), response)
+        return response
+
+
+class ReplayAdapter(requests.adapters.BaseAdapter):
+    """Answers requests with recorded responses after an artificial latency."""
+
+    def __init__(self, cassette, latency=0.0, jitter=0.0, seed=0):
+        super().__init__()
+        self.cassette = cassette
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+
+    def send(self, request, **kwargs):
+        entry = self.cassette.play(request_key(request.method, request.url))
+        if delay := self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0):
+            time.sleep(delay)
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = entry['body'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.reason = requests.status_codes._codes.get(entry['status'], ('',))[0].upper()
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class CassetteTransport(Transport):
+    """
+    Transport recording responses to a cassette or replaying them from it.
+
+    Latency in seconds is added to every replayed response, plus a random jitter of up to the given number of seconds.
+    """
+
+    def __init__(self, path, mode='replay', latency=0.0, jitter=0.0, seed=0, **kwargs):
+        super().__init__(**kwargs)
+        if mode not in MODES:
+            raise SpotifyToolsException(f"Unknown cassette mode: {mode}.")
+        self.mode = mode
+        self.cassette = Cassette(path)
+        if mode == 'record':
+            adapter = RecordingAdapter(self.cassette, max_retries=self.adapters['https://'].max_retries)
+        else:
+            self.cassette.load()
+            adapter = ReplayAdapter(self.cassette, latency, jitter, seed)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def save(self):
+        """Write the recorded responses to the cassette file."""
+        self.cassette.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self.mode == 'record':
+            self.save()
+        self.close()
@@ -0,0 +1,142 @@
+import weakref
+
+import numpy as np
+
+from spotifytools.interner import Interner
+
+"""
+Columnar store of numeric details and audio features of tracks.
+
+Each track gets a dense id, which is the number of its row in a single NumPy array with a column for each detail.
+Rows are found by the dense URI ids the factory's interner gives resources, so looking up a track is indexing a list
+rather than hashing its URI.
+Aggregates over any selection of tracks are then computed with vectorized operations instead of walking through the
+details of every track in Python. Values missing from a track are stored as NaN and skipped by the aggregates, which
+also masks the audio features of tracks for which Spotify has none.
+
+A row is rewritten whenever the details of its track changed since it was written, and released along with the track,
+so the table doesn't outgrow a bounded resource cache. Released rows are filled with NaN and reused by new tracks.
+"""
+
+# Details that can be summed up and averaged.
+COLUMNS = ('popularity', 'energy', 'dance', 'valence', 'duration', 'explicit', 'tempo', 'live', 'speech', 'acoustic',
+           'instrumental', 'mode', 'signature', 'track_number')
+
+# Number of rows allocated up front, the array doubles in size whenever it runs out of rows.
+INITIAL_CAPACITY = 1024
+
+
+class FeatureTable:
+
+    def __init__(self, columns=COLUMNS, capacity=INITIAL_CAPACITY, interner: Interner = None):
+        """
+        The interner is the one of the factory creating the tracks, whose URI ids the tracks carry. Without it, the
+        table gives URIs ids of its own.
+        """
+        self.columns = tuple(columns)
+        self.values = np.full((capacity, len(self.columns)), np.nan)
+        self.interner = interner or Interner()
+        self.resource_ids = interner is not None  # Whether the URI ids of tracks come from the table's interner.
+        self.rows = []  # Rows of tracks indexed by URI id, None for URIs without a row.
+        # URI ids of each row, weak references to their tracks, and revisions of the track details written to them.
+        self.uri_ids = []
+        self.tracks = []
+        self.revisions = []
+        self.refs = {}  # Rows indexed by the weak references to their tracks.
+        self.free = []  # Released rows available to new tracks.
+        # References of released tracks, collected by their callbacks, which may run on any thread at any time.
+        self.released = []
+
+    def __len__(self):
+        self._collect()
+        return len(self.uri_ids) - len(self.free)
+
+    def __contains__(self, uri):
+        self._collect()
+        uri_id = self.interner.ids.get(uri)
+        return uri_id is not None and uri_id < len(self.rows) and self.rows[uri_id] is not None
+
+    def update(self, tracks):
+        """
+        Write values of the tracks to their rows and return an array of their ids.
+
+        Tracks are added to the table the first time they're seen. Rows are rewritten only if the details of the track
+        changed since, otherwise it's only a lookup of the id.
+        """
+        self._collect()
+        ids = np.empty(len(tracks), dtype=np.intp)
+        rows, revisions = self.rows, self.revisions
+        for n, track in enumerate(tracks):
+            uri_id = track.uri_id if self.resource_ids else None
+            if uri_id is None:
+                uri_id = self.interner.uri_id(track.uri)
+            if uri_id >= len(rows):
+                rows.extend([None] * (uri_id + 1 - len(rows)))
+            row = rows[uri_id]
+            if row is None:
+                row = rows[uri_id] = self._add(uri_id, track)
+            elif self.tracks[row]() is not track:
+                # Another instance of the track, so the row is released along with it instead.
+                self._reference(row, track)
+                revisions[row] = None
+            if revisions[row] != track.revision:
+                self._write(row, track)
+            ids[n] = row
+        return ids
+
+    def column(self, name, ids=None):
+        """Return values of a column for the given ids or for all tracks, with NaN for missing values."""
+        return self._rows(ids)[:, self.columns.index(name)]
+
+    def mean(self, ids=None):
+        """Return the average of each column over the given ids or all tracks, skipping columns with no values."""
+        rows = self._rows(ids)
+        present = ~np.isnan(rows)
+        counts = present.sum(axis=0)
+        sums = np.where(present, rows, 0).sum(axis=0)
+        return {column: float(sums[n] / counts[n]) for n, column in enumerate(self.columns) if counts[n]}
+
+    def _rows(self, ids):
+        if ids is None:
+            # Released rows are all NaN, so they're skipped like missing values.
+            self._collect()
+            return self.values[:len(self.uri_ids)]
+        return self.values[ids]
+
+    def _add(self, uri_id, track):
+        if self.free:
+            row = self.free.pop()
+            self.uri_ids[row] = uri_id
+        else:
+            row = len(self.uri_ids)
+            if row == len(self.values):
+                values = np.full((max(2 * row, 1), len(self.columns)), np.nan)
+                values[:row] = self.values
+                self.values = values
+            self.uri_ids.append(uri_id)
+            self.tracks.append(None)
+            self.revisions.append(None)
+        self._reference(row, track)
+        return row
+
+    def _reference(self, row, track):
+        self.refs.pop(self.tracks[row], None)
+        self.tracks[row] = ref = weakref.ref(track, self.released.append)
+        self.refs[ref] = row
+
+    def _write(self, row, track):
+        details = track.details
+        self.values[row] = [np.nan if details.get(column) is None else details[column] for column in self.columns]
+        self.revisions[row] = track.revision
+
+    def _collect(self):
+        """Release rows of tracks which no longer exist."""
+        while self.released:
+            row = self.refs.pop(self.released.pop(), None)
+            if row is None:
+                # The reference was already replaced by one to another instance of the track.
+                continue
+            self.rows[self.uri_ids[row]] = None
+            self.values[row] = np.nan
+            self.uri_ids[row] = self.tracks[row] = self.revisions[row] = None
+            self.free.append(row)
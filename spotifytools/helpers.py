@@ -5,33 +5,43 @@ import langdetect
 from langcodes import Language
 
 
+# These entries contain data representing another Spotify resource.
+RELATED_RESOURCES = frozenset(['owner', 'artist', 'artists', 'tracks', 'album', 'albums'])
+
+# Alias and procedure to extract each parsed detail.
+DETAIL_PROCEDURES = {
+    'external_urls': ('url', lambda data: data['spotify']),
+    'followers': ('followers', lambda data: data["total"]),
+    'tracks': ('total_tracks', lambda data: data["total"]),
+    'images': ('images', lambda data: sort_image_urls(data)),
+    'duration_ms': ('duration', None),
+    'display_name': ('name', None),
+}
+
+# Entries of each resource type which are processed by the adapters, all other entries are copied as they are.
+TYPE_DETAILS = {
+    'track': ['external_urls', 'duration_ms', 'artists', 'album'],
+    'album': ['external_urls', 'images', 'artists', 'tracks'],
+    'artist': ['external_urls', 'followers', 'images'],
+    'playlist': ['external_urls', 'followers', 'images', 'owner', 'tracks'],
+    'user': ['external_urls', 'followers', 'images', 'display_name'],
+}
+
+
 def details_adapter(details):
     """
     Processes resource data from Spotify API for easier processing.
     """
-
-    # These entries contain data representing another Spotify resource.
-    related_resources = ['owner', 'artist', 'artists', 'tracks', 'album', 'albums']
-
-    # Alias and procedure to extract each parsed detail.
-    procedures = {
-        'external_urls': ('url', lambda data: data['spotify']),
-        'followers': ('followers', lambda data: data["total"]),
-        'tracks': ('total_tracks', lambda data: data["total"]),
-        'images': ('images', lambda data: sort_image_urls(data)),
-        'duration_ms': ('duration', None),
-        'display_name': ('name', None),
-    }
     parsed_details = {}
 
     for detail in details:
-        if detail in procedures:
-            new_name, procedure = procedures[detail]
+        if detail in DETAIL_PROCEDURES:
+            new_name, procedure = DETAIL_PROCEDURES[detail]
             parsed_details[new_name] = procedure(details[detail]) if procedure else details[detail]
             if new_name == detail:
                 # If no alias was defined, continue to the next detail.
                 continue
-        if detail in related_resources:
+        if detail in RELATED_RESOURCES:
             # Append '_data' to the key so it doesn't conflict with the field containing the Resource object.
             parsed_details[detail + '_data'] = details[detail]
         else:
@@ -40,6 +50,44 @@ def details_adapter(details):
     return parsed_details
 
 
+class TypeAdapter:
+    """
+    Adapter of data of a single resource type, equivalent to details_adapter.
+
+    The steps for the known entries of the type are prepared once, so adapting data is a copy of the dictionary
+    followed by only those steps.
+    """
+
+    def __init__(self, details):
+        self.steps = []
+        for detail in details:
+            new_name, procedure = DETAIL_PROCEDURES.get(detail, (None, None))
+            related = detail + '_data' if detail in RELATED_RESOURCES else None
+            self.steps.append((detail, new_name, procedure, related))
+
+    def __call__(self, details):
+        parsed_details = details.copy()
+        for detail, new_name, procedure, related in self.steps:
+            if detail not in parsed_details:
+                continue
+            value = parsed_details[detail]
+            if new_name:
+                parsed_details[new_name] = procedure(value) if procedure else value
+            if related:
+                # Append '_data' to the key so it doesn't conflict with the field containing the Resource object.
+                parsed_details[related] = parsed_details.pop(detail)
+        return parsed_details
+
+
+TYPE_ADAPTERS = {resource_type: TypeAdapter(details) for resource_type, details in TYPE_DETAILS.items()}
+
+
+def adapt_details(details):
+    """Process resource data with the adapter of its type, or with details_adapter if the type isn't known."""
+    adapter = TYPE_ADAPTERS.get(details.get('type'))
+    return adapter(details) if adapter else details_adapter(details)
+
+
 def features_adapter(features):
     """
     Processes track audio features from Spotify API for easier processing.
@@ -0,0 +1,90 @@
+import threading
+
+"""
+Dense integer ids of URIs and a single copy of each repeated string.
+
+Resources parsed from separate responses carry their own copies of the same strings: URIs and names of artists and
+albums nested in every track, URLs, and lists like available markets which are identical for most of a library.
+The interner keeps one instance of each string and of each list of strings, and gives every URI a small integer id,
+assigned in the order URIs are seen, which indexes like FeatureTable use instead of the URI strings. Lists of strings
+are shared as tuples, so a resource can't change the list of every other resource holding it.
+
+With a maximum size, the interner starts over once it holds more strings and lists than that, so it doesn't keep
+strings of resources released long ago. Strings interned before stay shared by the resources which hold them. URI ids
+are never dropped, since indexes keyed on them must stay valid, so they take one entry for each URI ever seen.
+"""
+
+
+class Interner:
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.ids = {}  # Dense ids indexed by URI.
+        self.uris = []  # URIs indexed by their ids.
+        self.strings = {}
+        self.lists = {}  # Shared tuples of strings indexed by their contents.
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.strings) + len(self.lists)
+
+    def uri_id(self, uri):
+        """Return the id of the URI, assigning the next one if the URI wasn't seen before."""
+        uri_id = self.ids.get(uri)
+        if uri_id is None:
+            with self.lock:
+                uri_id = self.ids.get(uri)
+                if uri_id is None:
+                    uri_id = self.ids[uri] = len(self.uris)
+                    self.uris.append(uri)
+        return uri_id
+
+    def uri(self, uri_id):
+        return self.uris[uri_id]
+
+    def string(self, value):
+        return self.strings.setdefault(value, value)
+
+    def intern(self, value):
+        """
+        Return the value with its strings replaced by shared ones, including strings in nested dictionaries and lists.
+
+        Dictionaries and lists of other values are updated in place, since replacing a string with an equal one
+        doesn't change them.
+        """
+        strings = self.strings
+        if self.max_size is not None and len(strings) + len(self.lists) > self.max_size:
+            # Tables are cleared in place, since callers further up in the recursion refer to them.
+            self.clear()
+        if isinstance(value, str):
+            return strings.setdefault(value, value)
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if isinstance(item, str):
+                    value[key] = strings.setdefault(item, item)
+                elif isinstance(item, (dict, list)):
+                    value[key] = self.intern(item)
+            return value
+        if isinstance(value, list) and value:
+            if isinstance(value[0], str):
+                key = tuple(value)
+                try:
+                    shared = self.lists.get(key)
+                except TypeError:
+                    # Not all items are strings, the list can't be shared.
+                    shared = key = None
+                if key is not None:
+                    if shared is None:
+                        shared = self.lists[key] = tuple(strings.setdefault(item, item) for item in key)
+                    return shared
+            for n, item in enumerate(value):
+                value[n] = self.intern(item)
+        return value
+
+    def clear(self):
+        """Drop the shared strings and lists, keeping the ids of URIs."""
+        self.strings.clear()
+        self.lists.clear()
+
+    def stats(self):
+        return {'uris': len(self.uris), 'strings': len(self.strings), 'lists': len(self.lists)}
@@ -0,0 +1,287 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import List
+
+import spotifytools.spotify as spotify
+from spotifytools.spotify.resource import compact_details
+from spotifytools.transport import loads
+
+"""
+Local database of a library, for querying and restoring it without going back to the API.
+
+Resources are stored in an SQLite database with a table for each type. Details used in queries are kept in columns,
+and all details in a JSON column, with raw data of related resources reduced to references. Artists of tracks and
+albums, children of collections, including playlist membership, and audio features are kept in separate tables.
+
+Saving is incremental: rows of resources already in the database are updated, with new details merged into the stored
+ones, so saving a simplified version of a resource doesn't lose its complete details. Resources are restored through
+the session's factory, so they're merged with resources already in the session.
+"""
+
+# Default location of the library database.
+DATABASE_PATH = '.spotifytools_library.sqlite'
+
+# Details kept in columns of each table, indexed by table. Tables are listed in the order resources are restored,
+# so the resources each of them links to are restored first.
+COLUMNS = {
+    'users': {'name': 'TEXT', 'followers': 'INTEGER'},
+    'artists': {'name': 'TEXT', 'popularity': 'INTEGER', 'followers': 'INTEGER'},
+    'albums': {'name': 'TEXT', 'album_type': 'TEXT', 'release_date': 'TEXT', 'total_tracks': 'INTEGER',
+               'popularity': 'INTEGER'},
+    'tracks': {'name': 'TEXT', 'album': 'TEXT', 'duration': 'INTEGER', 'popularity': 'INTEGER', 'explicit': 'INTEGER',
+               'track_number': 'INTEGER', 'disc_number': 'INTEGER'},
+    'playlists': {'name': 'TEXT', 'owner': 'TEXT', 'snapshot_id': 'TEXT', 'total_tracks': 'INTEGER',
+                  'followers': 'INTEGER'},
+}
+TABLES = {spotify.User: 'users', spotify.Artist: 'artists', spotify.Album: 'albums', spotify.Track: 'tracks',
+          spotify.Playlist: 'playlists'}
+URI_TYPES = {'user': 'users', 'artist': 'artists', 'album': 'albums', 'track': 'tracks', 'playlist': 'playlists'}
+COLLECTION_TABLES = ['users', 'artists', 'albums', 'playlists']
+
+# Audio features as aliased by features_adapter.
+FEATURES = ('valence', 'energy', 'dance', 'speech', 'acoustic', 'instrumental', 'live', 'tempo', 'key', 'mode',
+            'signature')
+
+SCHEMA = [
+    *(f"CREATE TABLE IF NOT EXISTS {table} (uri TEXT PRIMARY KEY, "
+      f"{''.join(f'{column} {column_type}, ' for column, column_type in columns.items())}"
+      f"{'children_loaded INTEGER NOT NULL DEFAULT 0, ' if table in COLLECTION_TABLES else ''}"
+      f"details TEXT NOT NULL, updated REAL NOT NULL)" for table, columns in COLUMNS.items()),
+    "CREATE TABLE IF NOT EXISTS track_artists (track TEXT NOT NULL, position INTEGER NOT NULL, artist TEXT NOT NULL, "
+    "PRIMARY KEY (track, position))",
+    "CREATE TABLE IF NOT EXISTS album_artists (album TEXT NOT NULL, position INTEGER NOT NULL, artist TEXT NOT NULL, "
+    "PRIMARY KEY (album, position))",
+    "CREATE TABLE IF NOT EXISTS children (parent TEXT NOT NULL, position INTEGER NOT NULL, child TEXT NOT NULL, "
+    "PRIMARY KEY (parent, position))",
+    "CREATE TABLE IF NOT EXISTS features (track TEXT PRIMARY KEY, available INTEGER NOT NULL, "
+    f"{', '.join(f'{feature} REAL' for feature in FEATURES)})",
+    "CREATE INDEX IF NOT EXISTS tracks_album ON tracks (album)",
+    "CREATE INDEX IF NOT EXISTS tracks_name ON tracks (name)",
+    "CREATE INDEX IF NOT EXISTS playlists_owner ON playlists (owner)",
+    "CREATE INDEX IF NOT EXISTS track_artists_artist ON track_artists (artist)",
+    "CREATE INDEX IF NOT EXISTS album_artists_artist ON album_artists (artist)",
+    "CREATE INDEX IF NOT EXISTS children_child ON children (child)",
+]
+
+# Maximum number of SQL variables in a single query.
+CHUNK_SIZE = 500
+
+
+def uri_table(uri):
+    # Legacy playlist URIs include the owner, e.g. 'spotify:user:owner:playlist:id'.
+    return URI_TYPES.get(uri.split(':')[-2])
+
+
+class LibraryDatabase:
+
+    def __init__(self, path=DATABASE_PATH):
+        self.path = path
+        # The connection is shared between threads, with the lock serializing access to it.
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+
+    def save(self, items: List[spotify.Resource]):
+        """
+        Store resources with everything they link to, including children of collections, in a single transaction.
+
+        Suited for saving the items passed to SpotifySession.load once they're loaded. Returns the number of rows
+        stored in each table of resources.
+        """
+        resources = self._collect(items if isinstance(items, list) else [items])
+        rows = {table: [] for table in COLUMNS}
+        now = time.time()
+        for resource in resources:
+            table = TABLES[resource.resource_type]
+            details = compact_details(resource.details)
+            if table == 'tracks':
+                details = {detail: value for detail, value in details.items() if detail not in FEATURES}
+            values = {column: details.get(column) for column in COLUMNS[table]}
+            if table == 'tracks':
+                values['album'] = resource.album.uri if resource.album is not None else None
+            elif table == 'playlists':
+                values['owner'] = resource.owner.uri if resource.owner is not None else None
+            if table in COLLECTION_TABLES:
+                values['children_loaded'] = int(resource.children_loaded)
+            rows[table].append((resource.uri, *values.values(), details, now))
+
+        tracks = [resource for resource in resources if resource.resource_type is spotify.Track]
+        albums = [resource for resource in resources if isinstance(resource, spotify.Album)]
+        collections = [resource for resource in resources
+                       if isinstance(resource, spotify.Collection) and resource.children_loaded]
+        with self.lock, self.connection:
+            for table, table_rows in rows.items():
+                self._upsert(table, table_rows)
+            self._replace_links('track_artists', 'track', {track.uri: track.artists for track in tracks})
+            self._replace_links('album_artists', 'album', {album.uri: album.artists for album in albums})
+            self._replace_links('children', 'parent', {collection.uri: collection.children
+                                                       for collection in collections})
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO features VALUES (?, ?{', ?' * len(FEATURES)})",
+                [(track.uri, int(track.features), *(track.details.get(feature) for feature in FEATURES))
+                 for track in tracks if track.features is not None])
+        return {table: len(table_rows) for table, table_rows in rows.items()}
+
+    def _collect(self, items):
+        """Return the items and all resources reachable from them, each once, leaving out those without a table."""
+        found = {}
+        stack = list(items)
+        while stack:
+            resource = stack.pop()
+            if resource is None:
+                continue
+            # Collections which aren't resources, like search results, have no URI but their children are saved.
+            key = resource.uri if isinstance(resource, spotify.Resource) else id(resource)
+            if key in found:
+                continue
+            found[key] = resource
+            if isinstance(resource, spotify.Collection):
+                stack.extend(resource.children)
+            if resource.resource_type in (spotify.Track, spotify.Album):
+                stack.extend(resource.artists or [])
+            if resource.resource_type is spotify.Track:
+                stack.append(resource.album)
+            if isinstance(resource, spotify.Playlist):
+                stack.append(resource.owner)
+        return [resource for resource in found.values() if resource.resource_type in TABLES]
+
+    def _upsert(self, table, rows):
+        if not rows:
+            return
+        # Details are merged with the stored ones here, since json_patch would drop details whose value is null.
+        stored = dict(self._select_in(f"SELECT uri, details FROM {table} WHERE uri IN", [row[0] for row in rows]))
+        rows = [(uri, *values, json.dumps(merge_details(loads(stored[uri]), details) if uri in stored else details),
+                 updated) for uri, *values, details, updated in rows]
+        columns = ['uri', *COLUMNS[table]]
+        # Columns keep their stored values when the new details don't have them.
+        updates = [f"{column} = coalesce(excluded.{column}, {column})" for column in columns[1:]]
+        if table in COLLECTION_TABLES:
+            # Children stay loaded when a collection is saved again before its children are loaded in the session.
+            columns.append('children_loaded')
+            updates.append("children_loaded = max(excluded.children_loaded, children_loaded)")
+        self.connection.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}, details, updated) VALUES ({', '.join('?' * len(rows[0]))}) "
+            f"ON CONFLICT (uri) DO UPDATE SET {', '.join(updates)}, details = excluded.details, "
+            f"updated = excluded.updated", rows)
+
+    def _replace_links(self, table, key, links):
+        for chunk in chunks(list(links)):
+            self.connection.execute(f"DELETE FROM {table} WHERE {key} IN ({', '.join('?' * len(chunk))})", chunk)
+        self.connection.executemany(f"INSERT INTO {table} VALUES (?, ?, ?)",
+                                    [(uri, position, item.uri) for uri, items in links.items()
+                                     for position, item in enumerate(items or [])])
+
+    def load(self, sp, uris: List[str], children=False):
+        """
+        Restore resources stored in the database into the session, along with everything they link to.
+
+        Children of collections are restored if requested, and marked as loaded if they were loaded when saved.
+        Returns the resources in the order of the URIs, leaving out those which aren't in the database.
+        """
+        with self.lock:
+            details, features, loaded_children = self._select(uris, children)
+        resources = {}
+        with sp.factory.lock:
+            # Tables are ordered so resources referenced in details of each resource are restored before it.
+            for table in COLUMNS:
+                for uri, data in details[table].items():
+                    resources[uri] = sp.factory.get_adapted_resource(loads(data))
+            for uri, (available, *values) in features.items():
+                track = resources[uri]
+                if track.features is None:
+                    track.parse_features(dict(zip(FEATURES, values)) if available else False)
+            for uri, child_uris in loaded_children.items():
+                collection = resources[uri]
+                if not collection.children_loaded:
+                    collection.children = [resources[child] for child in child_uris]
+                    collection.children_loaded = True
+        return [resources[uri] for uri in uris if uri in resources]
+
+    def _select(self, uris, children):
+        """
+        Return details of the resources and of everything they link to, indexed by table and URI, along with rows of
+        features and children of loaded collections indexed by URI.
+        """
+        details = {table: {} for table in COLUMNS}
+        features = {}
+        loaded_children = {}
+        found = set()
+        pending = set(uris)
+        while pending:
+            found.update(pending)
+            by_table = {}
+            for uri in pending:
+                by_table.setdefault(uri_table(uri), []).append(uri)
+            by_table.pop(None, None)
+            linked = set()
+            loaded = []
+            for table, table_uris in by_table.items():
+                # The resources each resource links to, other than its artists, are selected along with it.
+                link = {'tracks': 'album', 'playlists': 'owner'}.get(table, 'NULL')
+                flag = 'children_loaded' if table in COLLECTION_TABLES else '0'
+                for uri, data, linked_uri, children_loaded in self._select_in(
+                        f"SELECT uri, details, {link}, {flag} FROM {table} WHERE uri IN", table_uris):
+                    details[table][uri] = data
+                    if linked_uri:
+                        linked.add(linked_uri)
+                    if children_loaded:
+                        loaded.append(uri)
+            for query, table in [("SELECT artist FROM track_artists WHERE track IN", 'tracks'),
+                                 ("SELECT artist FROM album_artists WHERE album IN", 'albums')]:
+                linked.update(artist for artist, in self._select_in(query, by_table.get(table, [])))
+            for track, *values in self._select_in(f"SELECT track, available, {', '.join(FEATURES)} FROM features "
+                                                  f"WHERE track IN", by_table.get('tracks', [])):
+                features[track] = values
+            if children:
+                for uri in loaded:
+                    loaded_children[uri] = []
+                for parent, child in self._select_in("SELECT parent, child FROM children WHERE parent IN", loaded,
+                                                     " ORDER BY parent, position"):
+                    loaded_children[parent].append(child)
+                    linked.add(child)
+            pending = linked - found
+        # Children missing from the database can't be restored, the collection is left to be loaded from the API.
+        stored = set().union(*details.values())
+        for uri, child_uris in list(loaded_children.items()):
+            if not stored.issuperset(child_uris):
+                del loaded_children[uri]
+        return details, features, loaded_children
+
+    def _select_in(self, query, values, suffix=''):
+        for chunk in chunks(values):
+            yield from self.connection.execute(f"{query} ({', '.join('?' * len(chunk))}){suffix}", chunk)
+
+    def query(self, sp, sql, parameters=(), name='Query'):
+        """
+        Return a collection of the resources whose URIs are in the first column of the query's rows.
+
+        For example, all tracks of an artist longer than five minutes:
+            SELECT uri FROM tracks JOIN track_artists ON track = uri WHERE artist = ? AND duration > 300000
+        """
+        with self.lock:
+            uris = [row[0] for row in self.connection.execute(sql, parameters)]
+        return spotify.Collection(sp, children=self.load(sp, list(dict.fromkeys(uris))), children_loaded=True,
+                                  name=name)
+
+    def counts(self):
+        """Return the number of rows in each table of resources."""
+        with self.lock:
+            return {table: self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in COLUMNS}
+
+    def close(self):
+        self.connection.close()
+
+
+def merge_details(stored, details):
+    """Return stored details updated with new ones, except for new null values replacing stored ones."""
+    return {**stored, **{detail: value for detail, value in details.items()
+                         if value is not None or detail not in stored}}
+
+
+def chunks(values):
+    """Split values into lists short enough to be passed as SQL variables."""
+    return [values[i: i + CHUNK_SIZE] for i in range(0, len(values), CHUNK_SIZE)]
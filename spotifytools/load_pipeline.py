@@ -0,0 +1,143 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import spotifytools.spotify as spotify
+
+"""
+Recursive loading of collections as a staged pipeline.
+
+Loading a user down to track features in separate passes waits for every playlist to finish paging before the first
+feature request is made. Here all stages share one pool of workers: each page of children is parsed as soon as it
+arrives, new subcollections start paging right away, and tracks are collected into batches which are requested as
+soon as they are full. The total time approaches the time of the slowest stage rather than the sum of all stages.
+
+Responses are parsed on the calling thread, so resources are only created and updated from one thread.
+"""
+
+# Maximum number of requests in flight at the same time.
+WORKERS = 8
+
+
+class LoadPipeline:
+
+    def __init__(self, sp, details=False, features=False, workers=WORKERS):
+        self.sp = sp
+        self.workers = workers
+        cases = sp._load_cases()
+        self.children_cases = cases['children']
+        # Request method, parsing method and limit of the batch loads applied to tracks.
+        self.track_cases = {c: cases[c][spotify.Track] for c, requested in
+                            (('details', details), ('features', features)) if requested}
+        self.missing = {
+            'features': lambda track: track.features is None,
+            'details': lambda track: not track.details_loaded,
+        }
+        self.summary = {c: {'requested': 0, 'skipped': 0, 'requests': 0} for c in ['children', *self.track_cases]}
+        self.executor = None
+        self.pending = {}  # Handlers of the responses to requests in flight indexed by their futures.
+        self.pages_pending = 0
+        self.buffers = {c: [] for c in self.track_cases}  # Tracks waiting for a batch of each case.
+        self.seen = set()
+
+    def run(self, items):
+        """Load the items and everything under them and return a summary in the same format as SpotifySession.load."""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            self.executor = executor
+            self._expand(items)
+            while self.pending or any(self.buffers.values()):
+                if not self.pages_pending:
+                    # No more tracks are coming, so incomplete batches are sent as they are.
+                    for c in self.buffers:
+                        self._submit_batch(c)
+                    if not self.pending:
+                        break
+                done, _ = wait(self.pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    handler = self.pending.pop(future)
+                    handler(future.result())
+        self.executor = None
+        return self.summary
+
+    def _expand(self, items):
+        """Start loading children of new collections and add new tracks to the batches."""
+        for item in items:
+            if id(item) in self.seen:
+                continue
+            self.seen.add(id(item))
+            if item.resource_type is spotify.Track:
+                for c in self.buffers:
+                    if not self.missing[c](item):
+                        self.summary[c]['skipped'] += 1
+                        continue
+                    self.buffers[c].append(item)
+                    if len(self.buffers[c]) >= self.track_cases[c][2]:
+                        self._submit_batch(c)
+            elif isinstance(item, spotify.Collection):
+                loadable = item.resource_type in self.children_cases
+                if not item.children_loaded and loadable:
+                    self._load_children(item)
+                else:
+                    if loadable:
+                        self.summary['children']['skipped'] += 1
+                    self._expand(item.children)
+
+    def _load_children(self, item):
+        """Request the first page of the item's children and the remaining pages once the total is known."""
+        request_method, parsing_method, limit = self.children_cases[item.resource_type]
+        start = len(item.children)  # Compensate for children already known.
+        pages = {}  # Resources parsed from each page indexed by offset.
+        self.summary['children']['requested'] += 1
+
+        def complete():
+            for offset in sorted(pages):
+                item.children.extend(pages[offset])
+            item.children_loaded = True
+
+        def parse(offset, response, remaining):
+            pages[offset] = self.sp._parse_resources(response.get('items', []), item)
+            self._expand(pages[offset])
+            if remaining is None:
+                # Without the total, pages have to be followed one by one.
+                if response.get('next'):
+                    request(offset + limit, None)
+                else:
+                    complete()
+            elif len(pages) == remaining:
+                complete()
+
+        def parse_first(response):
+            offsets = self.sp._remaining_offsets(response, start, limit)
+            remaining = len(offsets) + 1 if offsets is not None else None
+            for offset in offsets or []:
+                request(offset, remaining)
+            parse(start, response, remaining)
+
+        def request(offset, remaining=None, first=False):
+            self.pages_pending += 1
+            self.summary['children']['requests'] += 1
+            future = self.executor.submit(request_method, item, offset=offset)
+
+            def handle(response):
+                self.pages_pending -= 1
+                if first:
+                    parse_first(response)
+                else:
+                    parse(offset, response, remaining)
+            self.pending[future] = handle
+
+        request(start, first=True)
+
+    def _submit_batch(self, c):
+        """Request data for the tracks waiting in the buffer of the case, up to the limit of one request."""
+        request_method, parsing_method, limit = self.track_cases[c]
+        batch, self.buffers[c] = self.buffers[c][:limit], self.buffers[c][limit:]
+        # Tracks may have been loaded by other means while waiting.
+        batch = [track for track in batch if self.missing[c](track)]
+        if self.sp.factory.shared_cache is not None:
+            shared_batch, batch = batch, self.sp._load_shared(c, batch)
+            self.summary[c]['skipped'] += len(shared_batch) - len(batch)
+        if not batch:
+            return
+        self.summary[c]['requested'] += len(batch)
+        self.summary[c]['requests'] += 1
+        future = self.executor.submit(request_method, batch)
+        self.pending[future] = lambda response: parsing_method(batch, response)
@@ -0,0 +1,144 @@
+import logging
+import random
+import threading
+import time
+
+import requests.exceptions
+from spotipy import SpotifyException
+
+"""
+Keeps the rate of requests to Spotify API close to the limit without tripping it.
+
+Spotify calculates its rate limit over a rolling window for the whole app, so by default all sessions share one limiter.
+When the limit is exceeded anyway, the API responds with status 429 and a 'Retry-After' header with the number of
+seconds to wait, which then pauses all requests going through the limiter.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Requests per second allowed on average and the number of requests allowed in a burst.
+RATE = 10
+BURST = 20
+
+# Number of retries before giving up on a request and the base and maximum of the exponential backoff in seconds.
+MAX_RETRIES = 6
+BACKOFF_BASE = 1
+BACKOFF_CAP = 30
+
+# Statuses which mean the request may succeed if repeated.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Allows an average number of calls per second with bursts of up to capacity calls."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, waiting until it's available if the bucket is empty."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Shared gate for all requests to Spotify API.
+
+    Every request takes a token from the global bucket and from the bucket of its endpoint if that endpoint has its own
+    budget. Failed requests are retried with exponential backoff and jitter, or after the time requested by the API.
+    """
+
+    def __init__(self, rate=RATE, burst=BURST, endpoint_rates=None, max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE,
+                 backoff_cap=BACKOFF_CAP):
+        self.bucket = TokenBucket(rate, burst)
+        # Buckets for endpoints with their own budget, as requests per second and burst size indexed by endpoint name.
+        self.endpoints = {endpoint: TokenBucket(*budget) for endpoint, budget in (endpoint_rates or {}).items()}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.blocked_until = 0  # Time before which no requests should be made, set by 'Retry-After'.
+        self.lock = threading.Lock()
+
+    def call(self, endpoint, func, *args, **kwargs):
+        """Call func once allowed by the rate limits, retrying it until it succeeds or runs out of retries."""
+        return self._call(endpoint, func, args, kwargs, (requests.exceptions.ReadTimeout,
+                                                         requests.exceptions.ConnectionError))
+
+    def call_write(self, endpoint, func, *args, **kwargs):
+        """
+        Call func like call, for requests changing state.
+
+        Of the connection errors, only timeouts of connecting are retried. Other errors may come after the request
+        reached the API, and repeating it could apply the change twice.
+        """
+        return self._call(endpoint, func, args, kwargs, (requests.exceptions.ConnectTimeout,))
+
+    def _call(self, endpoint, func, args, kwargs, connection_errors):
+        attempt = 0
+        while True:
+            self.wait(endpoint)
+            try:
+                return func(*args, **kwargs)
+            except connection_errors as error:
+                retry_after = None
+                failure = error
+            except SpotifyException as error:
+                if error.http_status not in RETRY_STATUSES:
+                    raise
+                retry_after = self.retry_after(error)
+                failure = error
+            attempt += 1
+            if attempt > self.max_retries:
+                raise failure
+            if retry_after is not None:
+                # The limit applies to the whole app, so all requests have to wait.
+                logger.warning(f"Rate limit exceeded on {endpoint}, waiting {retry_after}s.")
+                self.block(retry_after)
+            else:
+                delay = self.backoff(attempt)
+                logger.warning(f"Request to {endpoint} failed ({failure}), retrying in {delay:.1f}s.")
+                time.sleep(delay)
+
+    def wait(self, endpoint):
+        """Block until a request to the endpoint is allowed."""
+        if (delay := self.blocked_until - time.monotonic()) > 0:
+            time.sleep(delay)
+        self.bucket.acquire()
+        if endpoint in self.endpoints:
+            self.endpoints[endpoint].acquire()
+
+    def block(self, seconds):
+        """Stop all requests for the given number of seconds, starting with the next call to wait."""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def backoff(self, attempt):
+        """Return the delay before the given retry, growing exponentially up to the cap, with random jitter."""
+        delay = min(self.backoff_cap, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(delay / 2, delay)
+
+    @staticmethod
+    def retry_after(error: SpotifyException):
+        """Return the number of seconds to wait as requested by the API, or None if the response didn't specify it."""
+        value = error.headers.get('Retry-After') if error.headers else None
+        try:
+            return int(value) if value is not None else None
+        except ValueError:
+            return None
+
+
+# Limiter shared by all sessions unless they're given their own.
+shared_rate_limiter = RateLimiter()
@@ -0,0 +1,121 @@
+import json
+import threading
+import time
+from typing import Dict, List
+
+import redis
+
+"""
+Resource cache shared between processes through Redis.
+
+Worker processes each build their own ResourceFactory, but popular tracks, albums and artists are the same for all of
+them. Adapted resource payloads and audio features are stored in Redis under the resource's URI, so a resource
+downloaded by one worker can be created by all the others without making a request.
+"""
+
+# Number of seconds after which shared data expires.
+DETAILS_TTL = 7 * 24 * 60 * 60
+FEATURES_TTL = 180 * 24 * 60 * 60
+
+
+class RedisResourceCache:
+
+    def __init__(self, client=None, url=None, prefix='spotifytools', details_ttl=DETAILS_TTL, features_ttl=FEATURES_TTL):
+        """Uses the given Redis client, a client connected to the url, or a local stand-in if neither is given."""
+        self.client = client or (redis.Redis.from_url(url) if url else LocalRedis())
+        self.prefix = prefix
+        self.details_ttl = details_ttl
+        self.features_ttl = features_ttl
+
+    def get_details(self, uri):
+        """Return the adapted payload of a resource or None if it's not in the cache."""
+        return self.get_many_details([uri]).get(uri)
+
+    def get_many_details(self, uris: List[str]):
+        return self._get_many('details', uris)
+
+    def set_many_details(self, payloads: Dict):
+        self._set_many('details', payloads, self.details_ttl)
+
+    def get_many_features(self, uris: List[str]):
+        """Return features indexed by track URI. Tracks without features available in Spotify have them set to False."""
+        return self._get_many('features', uris)
+
+    def set_many_features(self, features: Dict):
+        # Missing features are stored as False, to tell them apart from tracks which were never cached.
+        self._set_many('features', {uri: features[uri] or False for uri in features}, self.features_ttl)
+
+    def _key(self, kind, uri):
+        return f"{self.prefix}:{kind}:{uri}"
+
+    def _get_many(self, kind, uris):
+        """Get values for all URIs with a single round trip and return the ones found indexed by URI."""
+        if not uris:
+            return {}
+        values = self.client.mget([self._key(kind, uri) for uri in uris])
+        return {uri: json.loads(value) for uri, value in zip(uris, values) if value is not None}
+
+    def _set_many(self, kind, values, ttl):
+        """Set all values with a single round trip."""
+        pipeline = self.client.pipeline()
+        for uri, value in values.items():
+            pipeline.set(self._key(kind, uri), json.dumps(value), ex=ttl)
+        pipeline.execute()
+
+
+class LocalRedis:
+    """
+    Minimal in-memory stand-in for a Redis client.
+
+    Implements only the commands used by RedisResourceCache, so it can be used offline in tests or in a single process.
+    """
+
+    def __init__(self):
+        self.data = {}  # Tuples of the value and its expiry time indexed by key.
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.mget([key])[0]
+
+    def mget(self, keys):
+        now = time.monotonic()
+        with self.lock:
+            values = [self.data.get(key) for key in keys]
+        return [value if value and (expires is None or expires > now) else None for value, expires in
+                (entry or (None, None) for entry in values)]
+
+    def set(self, key, value, ex=None):
+        if isinstance(value, str):
+            value = value.encode()
+        with self.lock:
+            self.data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *keys):
+        with self.lock:
+            return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def flushdb(self):
+        with self.lock:
+            self.data.clear()
+        return True
+
+    def pipeline(self):
+        return LocalPipeline(self)
+
+
+class LocalPipeline:
+    """Queues commands for LocalRedis and runs them on execute."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def set(self, key, value, ex=None):
+        self.commands.append((self.client.set, (key, value, ex)))
+        return self
+
+    def execute(self):
+        results = [command(*args) for command, args in self.commands]
+        self.commands = []
+        return results
@@ -0,0 +1,134 @@
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Dict
+
+"""
+Turns loads of single items into batched requests.
+
+Code working on one resource at a time from many threads, like calling Track.get_features for each track in a pool,
+would otherwise send a separate request for every item. The first item is loaded right away, and items submitted
+while a batch of their kind is loading are collected and sent together as soon as it's done, or once a batch is full.
+Each caller waits for the batch its item belongs to.
+
+A loop calling Track.get_features for one track after another never has more than one item waiting, so batches which
+aren't full are filled up with the siblings of their items: the following children of the collection last iterated
+that holds the item, which are missing the same data. The next calls of the loop then find their data loaded.
+"""
+
+# Number of seconds to wait for more items before sending a batch when nothing is loading. No wait by default, so a
+# single call doesn't take longer than its request.
+WINDOW = 0
+
+# Maximum number of items in a batch for each kind of load.
+LIMITS = {
+    'features': 100,
+    'details': 50,
+}
+
+# Checks whether an item is missing the data of each kind of load.
+MISSING = {
+    'features': lambda item: item.features is None,
+    'details': lambda item: not item.details_loaded,
+}
+
+# Number of most recently iterated collections searched for the siblings of an item.
+PARENTS = 16
+
+
+class RequestAggregator:
+
+    def __init__(self, sp, window=WINDOW, limits: Dict = None):
+        self.sp = sp
+        self.window = window
+        self.limits = {**LIMITS, **(limits or {})}
+        self.pending = {}  # Lists of tuples of an item and the future waiting for it, indexed by kind of load.
+        self.loading = {}  # Number of batches being loaded, indexed by kind of load.
+        self.timers = {}
+        self.parents = []  # Weak references to the collections iterated most recently, last one first.
+        self.lock = threading.Lock()
+
+    def add_parent(self, collection):
+        """Note the collection is being iterated, so its children can fill up batches with their siblings."""
+        with self.lock:
+            if self.parents and self.parents[0]() is collection:
+                return
+            others = [ref for ref in self.parents if ref() is not None and ref() is not collection]
+            self.parents = [weakref.ref(collection)] + others[:PARENTS - 1]
+
+    def siblings(self, item):
+        """Return the children following and then preceding the item in the last iterated collection holding it."""
+        with self.lock:
+            parents = [ref() for ref in self.parents]
+        for parent in parents:
+            if parent is None:
+                continue
+            children = parent.children
+            for i, child in enumerate(children):
+                if child is item:
+                    return children[i + 1:] + children[:i]
+        return []
+
+    def fill(self, kind, items):
+        """Fill up a batch with siblings of its items of the same type which are missing the data."""
+        room = self.limits[kind] - len(items)
+        batch = {id(item): item for item in items}
+        missing = MISSING[kind]
+        for item in items:
+            if room <= 0:
+                break
+            for sibling in self.siblings(item):
+                if id(sibling) not in batch and sibling.resource_type is item.resource_type and missing(sibling):
+                    batch[id(sibling)] = sibling
+                    room -= 1
+                    if not room:
+                        break
+        return list(batch.values())
+
+    def load(self, kind, item):
+        """Load the item as part of a batch and return it once loaded."""
+        return self.submit(kind, item).result()
+
+    def submit(self, kind, item):
+        """Add the item to the next batch of its kind and return a future resolved once the batch is loaded."""
+        future = Future()
+        with self.lock:
+            batch = self.pending.setdefault(kind, [])
+            batch.append((item, future))
+            full = len(batch) >= self.limits[kind]
+            # Items submitted while a batch is loading are sent once it's done.
+            idle = not self.loading.get(kind)
+            send = full or (idle and not self.window)
+            if not send and idle and kind not in self.timers:
+                self.timers[kind] = threading.Timer(self.window, self.flush, [kind])
+                self.timers[kind].daemon = True
+                self.timers[kind].start()
+        if send:
+            self.flush(kind)
+        return future
+
+    def flush(self, kind):
+        """Load all items waiting for the kind of load in a single batch and resolve their futures."""
+        with self.lock:
+            batch = self.pending.pop(kind, [])
+            if timer := self.timers.pop(kind, None):
+                timer.cancel()
+            if not batch:
+                return
+            self.loading[kind] = self.loading.get(kind, 0) + 1
+        items = list({id(item): item for item, future in batch}.values())
+        try:
+            self.sp.load(self.fill(kind, items), **{kind: True})
+        except Exception as error:
+            for item, future in batch:
+                future.set_exception(error)
+        else:
+            for item, future in batch:
+                future.set_result(item)
+        finally:
+            with self.lock:
+                self.loading[kind] -= 1
+                follow = not self.loading[kind] and kind in self.pending
+            if follow:
+                # Sent from another thread, so the caller which made this batch doesn't wait for the next one.
+                threading.Thread(target=self.flush, args=[kind], daemon=True).start()
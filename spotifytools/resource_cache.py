@@ -0,0 +1,215 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+"""
+Bounded cache of resources created by a ResourceFactory.
+
+Resources are kept in three tiers:
+- pinned resources are never evicted, e.g. the connected user,
+- the most recently used resources are kept in an LRU tier of limited size,
+- resources evicted from the LRU tier are only weakly referenced, so they stay in the cache for as long as something
+  else refers to them, like a playlist listing them as its children, and are released otherwise.
+
+The weak tier keeps resources unique: a resource is never created again while another instance of it still exists.
+Lookups with get are counted as hits or misses and evictions from the LRU tier are counted as well, so the size of
+the LRU tier can be tuned.
+
+Sources, like a loaded snapshot, hold resources which aren't created yet. Their pending resources count as being in
+the cache and each one is created by its source when it's first looked up. Listing the values creates all of them.
+"""
+
+
+class ResourceCache:
+    """Dictionary of resources indexed by URI with a bounded number of strong references."""
+
+    def __init__(self, max_size=None):
+        """With no maximum size, all resources are kept like in a regular dictionary."""
+        self.max_size = max_size
+        self.pinned = {}
+        self.recent = OrderedDict()
+        self.weak = weakref.WeakValueDictionary()
+        self.sources = []
+        self.hits = 0
+        self.weak_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+
+    def get(self, uri, default=None):
+        """Return the resource, counting the lookup as a hit or a miss."""
+        with self.lock:
+            resource, tier = self._find(uri)
+            if resource is None:
+                self.misses += 1
+                return default
+            if tier is self.weak:
+                self.weak_hits += 1
+            else:
+                self.hits += 1
+            return resource
+
+    def __getitem__(self, uri):
+        with self.lock:
+            resource, tier = self._find(uri)
+        if resource is None:
+            raise KeyError(uri)
+        return resource
+
+    def __setitem__(self, uri, resource):
+        with self.lock:
+            if uri in self.pinned:
+                self.pinned[uri] = resource
+                return
+            if uri in self.weak:
+                del self.weak[uri]
+            for source in self.sources:
+                source.pending.pop(uri, None)
+            self._add_recent(uri, resource)
+
+    def update(self, resources):
+        """Add resources from a dictionary indexed by URI under a single acquisition of the lock."""
+        with self.lock:
+            if self.pinned or self.weak or self.sources or self.max_size is not None:
+                for uri, resource in resources.items():
+                    self[uri] = resource
+            else:
+                # Nothing to evict and no other tier to move resources from.
+                self.recent.update(resources)
+
+    def __delitem__(self, uri):
+        with self.lock:
+            found = [tier.pop(uri, None) for tier in (self.pinned, self.recent, self.weak)]
+            found += [source.pending.pop(uri, None) for source in self.sources]
+        if all(resource is None for resource in found):
+            raise KeyError(uri)
+
+    def __contains__(self, uri):
+        with self.lock:
+            return uri in self.recent or uri in self.pinned or uri in self.weak or \
+                any(uri in source.pending for source in self.sources)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.pinned) + len(self.recent) + len(self.weak) + \
+                sum(len(source.pending) for source in self.sources)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        with self.lock:
+            return [*self.pinned, *self.recent, *self.weak.keys(), *(uri for source in self.sources
+                                                                     for uri in source.pending)]
+
+    def values(self):
+        with self.lock:
+            self._create_pending()
+            return [*self.pinned.values(), *self.recent.values(), *self.weak.values()]
+
+    def items(self):
+        with self.lock:
+            self._create_pending()
+            return [*self.pinned.items(), *self.recent.items(), *self.weak.items()]
+
+    def add_source(self, source):
+        """
+        Add a source of resources created on demand.
+
+        The source has a pending dictionary, whose keys are the URIs of the resources left to create, a build method,
+        creating one of them and adding it to the cache, and a build_all method creating all of them. Both are called
+        with the lock held.
+        """
+        with self.lock:
+            self.sources.append(source)
+
+    def pin(self, resource):
+        """Keep the resource in the cache until it's unpinned."""
+        with self.lock:
+            self.recent.pop(resource.uri, None)
+            self.weak.pop(resource.uri, None)
+            self.pinned[resource.uri] = resource
+
+    def unpin(self, resource):
+        """Return a pinned resource to the LRU tier."""
+        with self.lock:
+            if self.pinned.pop(resource.uri, None) is not None:
+                self._add_recent(resource.uri, resource)
+
+    def clear(self):
+        with self.lock:
+            self.pinned.clear()
+            self.recent.clear()
+            self.weak.clear()
+            self.sources.clear()
+
+    def stats(self):
+        """Return the sizes of the tiers and the numbers of hits, misses and evictions."""
+        with self.lock:
+            return {
+                'pinned': len(self.pinned),
+                'recent': len(self.recent),
+                'weak': len(self.weak),
+                'pending': sum(len(source.pending) for source in self.sources),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'weak_hits': self.weak_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def prometheus(self, prefix='spotifytools'):
+        """Return the stats as text in the Prometheus exposition format."""
+        stats = self.stats()
+        lines = []
+        for name, key, kind, description in [
+            ('resource_cache_size', None, 'gauge', "Resources in each tier of the resource cache."),
+            ('resource_cache_hits_total', 'hits', 'counter', "Resources found in the pinned or LRU tier."),
+            ('resource_cache_weak_hits_total', 'weak_hits', 'counter', "Evicted resources found still in use."),
+            ('resource_cache_misses_total', 'misses', 'counter', "Resources missing from the cache."),
+            ('resource_cache_evictions_total', 'evictions', 'counter', "Resources evicted from the LRU tier."),
+        ]:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            if key:
+                lines.append(f"{prefix}_{name} {stats[key]}")
+            else:
+                for tier in ('pinned', 'recent', 'weak', 'pending'):
+                    lines.append(f'{prefix}_{name}{{tier="{tier}"}} {stats[tier]}')
+        return '\n'.join(lines) + '\n'
+
+    def _find(self, uri):
+        # Must be called with the lock held.
+        if uri in self.recent:
+            self.recent.move_to_end(uri)
+            return self.recent[uri], self.recent
+        if uri in self.pinned:
+            return self.pinned[uri], self.pinned
+        resource = self.weak.get(uri)
+        if resource is not None:
+            # The resource is still used elsewhere, so it's brought back to the LRU tier.
+            del self.weak[uri]
+            self._add_recent(uri, resource)
+            return resource, self.weak
+        for source in self.sources:
+            if uri in source.pending:
+                resource = source.build(uri)
+                self.sources = [source for source in self.sources if source.pending]
+                return resource, self.recent
+        return None, self.weak
+
+    def _create_pending(self):
+        # Must be called with the lock held.
+        while self.sources:
+            self.sources[0].build_all()
+            self.sources = [source for source in self.sources if source.pending]
+
+    def _add_recent(self, uri, resource):
+        # Must be called with the lock held.
+        self.recent[uri] = resource
+        self.recent.move_to_end(uri)
+        if self.max_size is not None:
+            while len(self.recent) > self.max_size:
+                evicted_uri, evicted = self.recent.popitem(last=False)
+                self.weak[evicted_uri] = evicted
+                self.evictions += 1
@@ -1,15 +1,39 @@
-from typing import Dict
+import threading
+from typing import Dict, List
 
 import spotifytools.spotify as spotify
 from spotifytools.exceptions import SpotifyToolsException
-from spotifytools.helpers import filter_false_tracks, details_adapter
+from spotifytools.helpers import filter_false_tracks, adapt_details
+from spotifytools.resource_cache import ResourceCache
+from spotifytools.interner import Interner
+
+# Strings and lists kept by the interner for each resource, when the number of resources is bounded.
+STRINGS_PER_RESOURCE = 16
 
 
 class ResourceFactory:
 
-    def __init__(self, sp):
+    def __init__(self, sp, shared_cache=None, compact=False, max_resources=None, lazy=False):
+        """
+        In compact mode, resources keep their details only in the details dictionary and drop raw data of related
+        resources once it's parsed, and strings repeated in the data are interned. This takes considerably less memory
+        for large libraries, at the cost of slower parsing.
+        With a maximum number of resources, the least recently used ones are only kept while they're used elsewhere.
+        In lazy mode, new tracks in batches of data are returned as a LazyTrack, which is only parsed when more than
+        its URI and name is needed.
+        """
         self.sp = sp
-        self.cache = {}
+        self.cache = ResourceCache(max_resources)
+        # Strings of parsed data are interned in compact mode, keeping a number of them in proportion to the resources.
+        self.interner = Interner(None if max_resources is None else max_resources * STRINGS_PER_RESOURCE)
+        self.compact = compact
+        self.lazy = lazy
+        # Optional cache of adapted payloads shared with other processes, such as RedisResourceCache.
+        self.shared_cache = shared_cache
+        self._prefetched = {}  # Payloads fetched from the shared cache ahead of parsing a batch, indexed by URI.
+        self._resolved = None  # Nested resources already resolved in the batch being parsed, indexed by URI.
+        # Batched loads are parsed on other threads, so creating and updating resources is serialized.
+        self.lock = threading.RLock()
 
     def get_resource(self, raw_data: Dict, refresh=False):
         """
@@ -17,23 +41,137 @@ class ResourceFactory:
 
         This is the only way through which instances of Resource should be initialized or updated.
         """
-        data = details_adapter(raw_data)
+        with self.lock:
+            if 'uri' not in raw_data:
+                return self._get_adapted_resource(adapt_details(raw_data))
+            # The resource is looked up once, so every call counts as a single hit or miss of the cache.
+            return self._complete_resource(self.cache.get(raw_data['uri']), raw_data)
+
+    def get_resources(self, raw_list: List[Dict]):
+        """
+        Return existing or new resources for a batch of Spotify API data, such as a page of playlist items.
 
+        The batch is parsed under a single acquisition of the lock. Artists, albums and owners nested in the data are
+        resolved once per batch, however many items of the batch they appear in.
+        """
+        with self.lock:
+            if self.lazy:
+                return [self._get_lazy(raw_data) for raw_data in raw_list]
+            outer = self._resolved
+            if outer is None:
+                # Batches parsed within another batch, like tracks of an album in a page of albums, share its state.
+                self.prefetch(raw_list)
+                self._resolved = {}
+            try:
+                return [self.get_resource(raw_data) for raw_data in raw_list]
+            finally:
+                self._resolved = outer
+
+    def materialize(self, lazy_track):
+        """Create the track standing behind a LazyTrack from its raw data."""
+        with self.lock:
+            if lazy_track.resource is None:
+                lazy_track.resource = self._create_resource(adapt_details(lazy_track.raw_data))
+                lazy_track.raw_data = None
+                # The stand-in remains the instance of the track returned by the factory.
+                self.cache[lazy_track.uri] = lazy_track
+            return lazy_track.resource
+
+    def get_adapted_resource(self, data: Dict):
+        """Return an existing resource or create a new one from data already processed by adapt_details."""
+        with self.lock:
+            return self._get_adapted_resource(data)
+
+    def _get_adapted_resource(self, data: Dict):
         if 'uri' not in data:
             raise SpotifyToolsException(f"No URI supplied for resource: {data}.")
-        uri = data['uri']
-
-        # Check if the resource exists and return it if it does.
-        if uri in self.cache:
-            resource = self.cache[uri]
-            # Parse the new data if it contains some missing information.
-            if new_details := {detail: data[detail] for detail in data if detail not in resource.details}:
-                resource.parse_details(new_details)
+        # It's looked up once, since a resource in the weak tier can be released between two lookups.
+        return self._update_resource(self.cache.get(data['uri']), data)
+
+    def _complete_resource(self, resource, raw_data: Dict):
+        """Complete the resource found in the cache with Spotify API data, or create it if none was found."""
+        # Data of an existing resource often has nothing new in it, in which case it doesn't need to be adapted.
+        if resource is not None and all(key in resource.details or key + '_data' in resource.details
+                                        for key in raw_data):
             return resource
-        else:
-            # Create a new resource if it doesn't exist.
-            resource = self._parse_resource(data)
+        return self._update_resource(resource, adapt_details(raw_data))
+
+    def _update_resource(self, resource, data: Dict):
+        """Complete the resource found in the cache with the adapted data, or create it if none was found."""
+        if resource is None:
+            return self._create_resource(data)
+        # Parse the new data if it contains some missing information.
+        if new_details := {detail: data[detail] for detail in data if detail not in resource.details}:
+            resource.parse_details(self.interner.intern(new_details) if self.compact else new_details)
+        return resource
+
+    def _create_resource(self, data: Dict):
+        # Complete the data from the shared cache if another process already downloaded this resource.
+        if self.shared_cache is not None and (shared_data := self._shared_payload(data['uri'])):
+            data = {**shared_data, **data}
+        resource = self._parse_resource(self.interner.intern(data) if self.compact else data)
+        if self.compact:
+            resource.compact()
+        return resource
+
+    def _get_lazy(self, raw_data: Dict):
+        """Return the resource of the data, standing in for tracks which aren't parsed yet with a LazyTrack."""
+        if raw_data.get('type') != 'track' or 'uri' not in raw_data:
+            return self.get_resource(raw_data)
+        resource = self.cache.get(raw_data['uri'])
+        if isinstance(resource, spotify.LazyTrack) and not resource.materialized:
+            # Data missing from the stand-in's raw data is added to it, like details are added to parsed resources.
+            if raw_data.keys() - resource.raw_data.keys():
+                resource.raw_data = {**raw_data, **resource.raw_data}
             return resource
+        if resource is not None:
+            return self._complete_resource(resource, raw_data)
+        resource = self.cache[raw_data['uri']] = spotify.LazyTrack(self, raw_data)
+        return resource
+
+    def prefetch(self, raw_list: List[Dict]):
+        """
+        Get payloads of all resources in a batch of Spotify API data from the shared cache in a single round trip.
+
+        Includes artists, albums and owners nested in the data. The payloads are used when the resources are created.
+        """
+        if self.shared_cache is None:
+            return
+        uris = set()
+        for raw_data in raw_list:
+            for data in [raw_data, raw_data.get('album'), raw_data.get('owner'), *raw_data.get('artists', [])]:
+                if data and 'uri' in data and data['uri'] not in self.cache:
+                    uris.add(data['uri'])
+        payloads = self.shared_cache.get_many_details(list(uris))
+        # Remember misses as well, so they aren't looked up again one by one.
+        self._prefetched = {uri: payloads.get(uri) for uri in uris}
+
+    def share(self, resources: List):
+        """Store complete details of resources in the shared cache."""
+        if self.shared_cache is not None:
+            self.shared_cache.set_many_details({resource.uri: resource.details for resource in resources})
+
+    def from_shared_cache(self, uris: List[str]):
+        """Create or complete resources with payloads available in the shared cache and return them."""
+        if self.shared_cache is None:
+            return []
+        payloads = self.shared_cache.get_many_details(uris)
+        with self.lock:
+            return [self._get_adapted_resource(payloads[uri]) for uri in uris if uri in payloads]
+
+    def _shared_payload(self, uri):
+        if uri in self._prefetched:
+            return self._prefetched.pop(uri)
+        return self.shared_cache.get_details(uri)
+
+    def _get_nested(self, data: Dict):
+        """Return the resource of data nested in another resource's data, resolving it once per batch."""
+        if self._resolved is None:
+            return self.get_resource(data)
+        uri = data.get('uri')
+        if uri not in self._resolved:
+            self._resolved[uri] = self.get_resource(data)
+        return self._resolved[uri]
 
     def _parse_resource(self, raw_data: Dict):
         """Recognizes the resource type from the raw data and calls the correct constructor or method."""
@@ -63,15 +201,16 @@ class ResourceFactory:
             raise SpotifyToolsException(f"Parser didn't recognize object: {raw_data}")
 
         # Cache and return
+        resource.uri_id = self.interner.uri_id(resource.uri)
         self.cache[resource.uri] = resource
         return resource
 
     def _parse_playlist(self, raw_data):
         # Create the user.
-        owner = self.get_resource(raw_data["owner_data"])
+        owner = self._get_nested(raw_data["owner_data"])
         # Parse track data that may be included with the playlist data.
         if 'items' in raw_data['tracks_data']:
-            children = [self.get_resource(track) for track in filter_false_tracks(raw_data['tracks_data']['items'])]
+            children = self.get_resources(filter_false_tracks(raw_data['tracks_data']['items']))
             children_loaded = not raw_data['tracks_data']["next"]
         else:
             children = None
@@ -82,26 +221,25 @@ class ResourceFactory:
 
     def _parse_album(self, raw_data):
         # Parse artist data.
-        artists = [self.get_resource(artist) for artist in raw_data["artists_data"]]
+        artists = [self._get_nested(artist) for artist in raw_data["artists_data"]]
         # Create the album.
         album = spotify.Album(self.sp, raw_data=raw_data, artists=artists)
+        self.cache[album.uri] = album  # Cached early so its tracks can refer to it.
         # Tracks in album data miss their 'album' key, so it has to be injected after the album is created.
         if 'tracks_data' in raw_data and 'items' in raw_data['tracks_data']:
-            children = []
-            children_data = raw_data['tracks_data']['items']
-            for child in filter_false_tracks(children_data):
+            children_data = filter_false_tracks(raw_data['tracks_data']['items'])
+            for child in children_data:
                 # Restore the reference to the album if it's missing.
                 if 'album_data' not in child:
                     child['album_data'] = {'uri': raw_data['uri']}
-                children.append(self.get_resource(child))
-            album.children = children
+            album.children = self.get_resources(children_data)
             album.children_loaded = not raw_data["tracks_data"]["next"]
         return album
 
     def _parse_track(self, raw_data):
         # Parse artist and album data.
-        artists = [self.get_resource(artist) for artist in raw_data["artists_data"]]
-        album = self.get_resource(raw_data["album_data"])
+        artists = [self._get_nested(artist) for artist in raw_data["artists_data"]]
+        album = self._get_nested(raw_data["album_data"])
         # Create the track.
         track = spotify.Track(self.sp, raw_data=raw_data, artists=artists, album=album)
         return track
@@ -0,0 +1,109 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+
+"""
+Persistent cache of Spotify API responses.
+
+Responses are stored per endpoint and key in an SQLite database, so data downloaded in one session can be reused by
+the next ones. Batch endpoints are cached per item, which lets a batch be completed from the cache with a request only
+for the missing items.
+"""
+
+# Default location of the cache database.
+CACHE_PATH = '.spotifytools_cache.sqlite'
+
+# Maximum number of responses kept in the cache before the least recently used ones are evicted.
+MAX_ENTRIES = 500000
+
+# Number of seconds after which a cached response is considered stale, indexed by endpoint.
+DAY = 24 * 60 * 60
+TTLS = {
+    'track_features': 180 * DAY,  # Audio features never change.
+    'track_details': 7 * DAY,  # Popularity changes over time.
+    'album_details': 30 * DAY,
+    'artist_details': DAY,  # Followers and popularity change often.
+    'item': DAY,
+    'playlist_items': 60 * 60,  # Playlists are edited by their owners at any time.
+    'album_tracks': 30 * DAY,
+    'artist_albums': 7 * DAY,
+}
+DEFAULT_TTL = DAY
+
+
+class ResponseCache:
+
+    def __init__(self, path=CACHE_PATH, ttls: Dict = None, max_entries=MAX_ENTRIES, bypass=False):
+        self.path = path
+        self.ttls = {**TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self.bypass = bypass  # Ignore the cache completely while set.
+        # The connection is shared between the threads requesting pages, with the lock serializing access to it.
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS responses (endpoint TEXT NOT NULL, key TEXT NOT NULL, "
+                                    "response TEXT, created REAL NOT NULL, accessed REAL NOT NULL, "
+                                    "PRIMARY KEY (endpoint, key))")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            # Number of stored responses, kept up to date on every change instead of counting rows on each write.
+            self.count = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, endpoint, key):
+        """Return the cached response or None if it's missing or stale."""
+        return self.get_many(endpoint, [key]).get(key)
+
+    def get_many(self, endpoint, keys: List[str]):
+        """Return a dictionary of fresh responses available in the cache indexed by key."""
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        oldest = now - self.ttls.get(endpoint, DEFAULT_TTL)
+        results = {}
+        with self.lock, self.connection:
+            # Query in chunks to stay under the limit of SQL variables.
+            for i in range(0, len(keys), 500):
+                chunk = keys[i: i + 500]
+                rows = self.connection.execute(
+                    f"SELECT key, response FROM responses WHERE endpoint = ? AND created > ? "
+                    f"AND key IN ({','.join('?' * len(chunk))})", [endpoint, oldest, *chunk])
+                results.update((key, json.loads(response)) for key, response in rows)
+            self.connection.executemany("UPDATE responses SET accessed = ? WHERE endpoint = ? AND key = ?",
+                                        [(now, endpoint, key) for key in results])
+        return results
+
+    def set(self, endpoint, key, response):
+        self.set_many(endpoint, {key: response})
+
+    def set_many(self, endpoint, responses: Dict):
+        """Store responses indexed by key and evict the least recently used ones if the cache is full."""
+        now = time.time()
+        keys = list(responses)
+        with self.lock, self.connection:
+            existing = sum(self.connection.execute(
+                f"SELECT COUNT(*) FROM responses WHERE endpoint = ? AND key IN ({','.join('?' * len(chunk))})",
+                [endpoint, *chunk]).fetchone()[0] for chunk in (keys[i: i + 500] for i in range(0, len(keys), 500)))
+            self.count += len(keys) - existing
+            self.connection.executemany("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                                        [(endpoint, key, json.dumps(response), now, now)
+                                         for key, response in responses.items()])
+            self._evict()
+
+    def _evict(self):
+        if self.count > self.max_entries:
+            self.connection.execute("DELETE FROM responses WHERE rowid IN "
+                                    "(SELECT rowid FROM responses ORDER BY accessed LIMIT ?)",
+                                    [self.count - self.max_entries])
+            self.count = self.max_entries
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM responses")
+            self.count = 0
+
+    def close(self):
+        self.connection.close()
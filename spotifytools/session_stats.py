@@ -0,0 +1,165 @@
+import bisect
+import threading
+import time
+
+"""
+Per-endpoint instrumentation of requests made by a session.
+
+Records the number of requests, attempts including retries, errors, latency histograms, response sizes and response
+cache hits for each endpoint. Recording an event is a few additions under a lock, so the stats can stay enabled in
+production. Stats are available as a dictionary or as text in the Prometheus exposition format.
+"""
+
+# Upper bounds of latency histogram buckets in seconds.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf'))
+
+# Endpoint under which responses are counted if they weren't requested by an instrumented method.
+OTHER = 'other'
+
+
+class EndpointStats:
+    """Counters of a single endpoint."""
+
+    def __init__(self):
+        self.requests = 0
+        self.attempts = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self.bytes = 0
+        self.wire_bytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def as_dict(self):
+        cumulative, total = {}, 0
+        for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets):
+            total += count
+            cumulative[bound] = total
+        return {
+            'requests': self.requests,
+            'attempts': self.attempts,
+            'retries': max(self.attempts - self.requests, 0),
+            'errors': self.errors,
+            'latency': {
+                'count': self.attempts,
+                'sum': self.latency_sum,
+                'mean': self.latency_sum / self.attempts if self.attempts else None,
+                'buckets': cumulative,
+            },
+            'bytes': self.bytes,
+            'wire_bytes': self.wire_bytes,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+class SessionStats:
+
+    def __init__(self):
+        self.endpoints = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()  # Endpoint of the request being made by the current thread.
+
+    def _endpoint(self, endpoint):
+        # Must be called with the lock held.
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = EndpointStats()
+        return self.endpoints[endpoint]
+
+    def count_request(self, endpoint):
+        """Count a request, which may take several attempts."""
+        with self.lock:
+            self._endpoint(endpoint).requests += 1
+
+    def timed(self, endpoint, func):
+        """Return func wrapped to record the latency and the outcome of every attempt under the endpoint."""
+
+        def inner(*args, **kwargs):
+            # Calls can be nested, e.g. a session method calling another one, so the outer endpoint is restored after.
+            previous = getattr(self.local, 'endpoint', None)
+            self.local.endpoint = endpoint
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                self.record_attempt(endpoint, time.perf_counter() - start, error=True)
+                raise
+            else:
+                self.record_attempt(endpoint, time.perf_counter() - start)
+                return result
+            finally:
+                self.local.endpoint = previous
+
+        return inner
+
+    def record_attempt(self, endpoint, latency, error=False):
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, latency)
+        with self.lock:
+            stats = self._endpoint(endpoint)
+            stats.attempts += 1
+            stats.errors += error
+            stats.latency_sum += latency
+            stats.latency_buckets[bucket] += 1
+
+    def record_response(self, response, *args, **kwargs):
+        """
+        Count the size of a response. Works as a requests response hook.
+
+        The decoded size of the body is counted as bytes, and the size sent over the network, which is smaller for
+        compressed responses, as wire bytes. The decoded size of the last response is also kept for the thread, since
+        the wire size isn't known for responses sent without a Content-Length.
+        """
+        self.local.response_bytes = size = len(response.content or b'')
+        length = response.headers.get('Content-Length')
+        wire_size = int(length) if length is not None else size
+        with self.lock:
+            stats = self._endpoint(getattr(self.local, 'endpoint', None) or OTHER)
+            stats.bytes += size
+            stats.wire_bytes += wire_size
+
+    def record_cache(self, endpoint, hits=0, misses=0):
+        with self.lock:
+            stats = self._endpoint(endpoint)
+            stats.cache_hits += hits
+            stats.cache_misses += misses
+
+    def snapshot(self):
+        """Return stats of each endpoint as a dictionary indexed by endpoint."""
+        with self.lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in sorted(self.endpoints.items())}
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+
+    def prometheus(self, prefix='spotifytools'):
+        """Return the stats as text in the Prometheus exposition format."""
+        snapshot = self.snapshot()
+        counters = [
+            ('requests_total', 'requests', "Requests made to Spotify API."),
+            ('attempts_total', 'attempts', "Attempts made to complete requests, including retries."),
+            ('retries_total', 'retries', "Attempts repeated after a failure."),
+            ('errors_total', 'errors', "Failed attempts."),
+            ('response_bytes_total', 'bytes', "Bytes received in response bodies."),
+            ('response_wire_bytes_total', 'wire_bytes', "Bytes of response bodies received over the network."),
+            ('cache_hits_total', 'cache_hits', "Items served from the response cache."),
+            ('cache_misses_total', 'cache_misses', "Items missing from the response cache."),
+        ]
+        lines = []
+        for name, key, description in counters:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for endpoint, stats in snapshot.items():
+                lines.append(f'{prefix}_{name}{{endpoint="{endpoint}"}} {stats[key]}')
+        name = f"{prefix}_request_duration_seconds"
+        lines.append(f"# HELP {name} Latency of attempts to complete requests.")
+        lines.append(f"# TYPE {name} histogram")
+        for endpoint, stats in snapshot.items():
+            latency = stats['latency']
+            for bound, count in latency['buckets'].items():
+                le = '+Inf' if bound == float('inf') else bound
+                lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{le}"}} {count}')
+            lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {latency["sum"]}')
+            lines.append(f'{name}_count{{endpoint="{endpoint}"}} {latency["count"]}')
+        return '\n'.join(lines) + '\n'
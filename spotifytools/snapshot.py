@@ -0,0 +1,260 @@
+import gc
+import json
+import marshal
+import mmap
+import os
+import struct
+
+import numpy as np
+
+import spotifytools.spotify as spotify
+from spotifytools.exceptions import SpotifyToolsException
+from spotifytools.interner import Interner
+
+"""
+Binary snapshot of all resources of a factory, for restoring them without any requests.
+
+The file starts with a magic number and the offset of a JSON header, which lists the offset, length and type of each
+section. Links between resources - artists, albums, owners and children - are stored as arrays of resource indexes,
+with lists of links in the CSR layout: an array of offsets into one flat array of indexes. Numeric sections are
+aligned to 8 bytes, so they're used as NumPy arrays over the memory-mapped file without being read or copied.
+
+Details are stored as marshal blocks of BLOCK_SIZE resources, without the raw data of related resources, which is
+replaced by the links. Equal strings and lists of strings, like available markets, are interned before they're
+written, so they're stored and loaded only once in each block.
+
+Loading a snapshot only reads its URIs. The snapshot is added to the factory's cache as a source of resources, which
+are created from their row when they're first looked up, along with the resources they link to. Reading all values of
+the cache creates the resources left.
+
+Tracks standing in for a LazyTrack are parsed before they're saved. Lyrics and confidence scores aren't saved.
+"""
+
+MAGIC = b'SPTSNAP\x00'
+VERSION = 2
+PREAMBLE = struct.Struct('<8sQ')  # Magic number and the offset of the header.
+BLOCK_SIZE = 1024  # Resources whose details are decoded together.
+
+# Resources are saved in this order, so everything a resource links to precedes it.
+TYPES = [spotify.User, spotify.Artist, spotify.Album, spotify.Track, spotify.Playlist]
+
+# Values of Track.features, which is None until features are loaded and False if Spotify has none.
+FEATURES = {None: -1, False: 0, True: 1}
+
+
+def save_snapshot(factory, path):
+    """Write all resources in the factory's cache to a snapshot file. Returns the number of resources saved."""
+    with factory.lock:
+        # Stand-ins are parsed first, since parsing them adds their albums and artists to the cache.
+        for resource in factory.cache.values():
+            if isinstance(resource, spotify.LazyTrack):
+                resource.materialize()
+        order = {resource_type: n for n, resource_type in enumerate(TYPES)}
+        resources = sorted((resource for resource in factory.cache.values() if resource.resource_type in order),
+                           key=lambda resource: order[resource.resource_type])
+        index = {resource.uri: n for n, resource in enumerate(resources)}
+
+        def links(items):
+            return [index[item.uri] for item in items or [] if item.uri in index]
+
+        def link(item):
+            return index.get(item.uri, -1) if item is not None else -1
+
+        interner = Interner()
+        blocks = [marshal.dumps([interner.intern({detail: value for detail, value in resource.details.items()
+                                                  if not detail.endswith('_data')})
+                                 for resource in resources[start:start + BLOCK_SIZE]], 4)
+                  for start in range(0, len(resources), BLOCK_SIZE)]
+        artists = [links(getattr(resource, 'artists', None)) for resource in resources]
+        children = [links(resource.children) if isinstance(resource, spotify.Collection) else []
+                    for resource in resources]
+        sections = {
+            'types': np.array([order[resource.resource_type] for resource in resources], dtype=np.uint8),
+            'album': np.array([link(resource.album) if resource.resource_type is spotify.Track else -1
+                               for resource in resources], dtype=np.int32),
+            'owner': np.array([link(resource.owner) if isinstance(resource, spotify.Playlist) else -1
+                               for resource in resources], dtype=np.int32),
+            'features': np.array([FEATURES[resource.features] if resource.resource_type is spotify.Track else -1
+                                  for resource in resources], dtype=np.int8),
+            'children_loaded': np.array([isinstance(resource, spotify.Collection) and resource.children_loaded
+                                         for resource in resources], dtype=np.uint8),
+            'artists_offsets': np.cumsum([0] + [len(items) for items in artists], dtype=np.int64),
+            'artists': np.array([n for items in artists for n in items], dtype=np.int32),
+            'children_offsets': np.cumsum([0] + [len(items) for items in children], dtype=np.int64),
+            'children': np.array([n for items in children for n in items], dtype=np.int32),
+            'details_offsets': np.cumsum([0] + [len(block) for block in blocks], dtype=np.int64),
+            'details': b''.join(blocks),
+            'uris': '\n'.join(resource.uri for resource in resources).encode(),
+        }
+
+    header = {'version': VERSION, 'count': len(resources), 'block_size': BLOCK_SIZE, 'sections': {}}
+    with open(path, 'wb') as file:
+        file.write(PREAMBLE.pack(MAGIC, 0))
+        for name, section in sections.items():
+            file.write(b'\x00' * (-file.tell() % 8))
+            data = section.tobytes() if isinstance(section, np.ndarray) else section
+            header['sections'][name] = {
+                'offset': file.tell(),
+                'length': len(data),
+                'dtype': section.dtype.str if isinstance(section, np.ndarray) else None,
+            }
+            file.write(data)
+        header_offset = file.tell()
+        file.write(json.dumps(header).encode())
+        file.seek(0)
+        file.write(PREAMBLE.pack(MAGIC, header_offset))
+    return len(resources)
+
+
+def load_snapshot(factory, path):
+    """
+    Add the resources saved in a snapshot file to the factory's cache. Returns the number of resources.
+
+    Resources already in the cache are kept and completed with the saved data they're missing. Others are created
+    when they're first looked up in the cache.
+    """
+    snapshot = Snapshot(factory, path)
+    with factory.lock, factory.cache.lock:
+        existing = {uri: snapshot.pending.pop(uri) for uri in set(factory.cache.keys()).intersection(snapshot.pending)}
+        if snapshot.pending:
+            factory.cache.add_source(snapshot)
+        for uri, n in existing.items():
+            snapshot.merge(factory.cache[uri], n)
+    return snapshot.count
+
+
+class Snapshot:
+    """Snapshot file mapped into memory, creating its resources on demand for a ResourceCache."""
+
+    def __init__(self, factory, path):
+        self.factory = factory
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < PREAMBLE.size:
+                raise SpotifyToolsException(f"Not a snapshot file: {path}.")
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_offset = PREAMBLE.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise SpotifyToolsException(f"Not a snapshot file: {path}.")
+        header = json.loads(self.buffer[header_offset:])
+        if header['version'] != VERSION:
+            raise SpotifyToolsException(f"Unsupported snapshot version: {header['version']}.")
+        self.count = header['count']
+        self.block_size = header['block_size']
+        self.sections = {}
+        for name, section in header['sections'].items():
+            if section['dtype'] is None:
+                self.sections[name] = (section['offset'], section['offset'] + section['length'])
+            else:
+                dtype = np.dtype(section['dtype'])
+                self.sections[name] = np.frombuffer(self.buffer, dtype, section['length'] // dtype.itemsize,
+                                                    section['offset'])
+        start, end = self.sections['uris']
+        self.uris = self.buffer[start:end].decode().split('\n') if self.count else []
+        self.pending = dict(zip(self.uris, range(self.count)))  # Rows of resources which weren't created yet, by URI.
+        # Created resources by row, kept when the cache keeps all resources anyway, so links skip cache lookups.
+        self.created = [None] * self.count if factory.cache.max_size is None else None
+        # Decoded blocks of details, kept until all their pending resources are created.
+        self.blocks = {}
+        self.remaining = [min(self.block_size, self.count - start) for start in range(0, self.count, self.block_size)]
+
+    def build(self, uri):
+        """Create the pending resource and add it to the cache. Called by the cache with its lock held."""
+        return self._create(self.pending.pop(uri), True)
+
+    def build_all(self):
+        """Create all pending resources. Called by the cache with its lock held."""
+        # Resources link to each other in cycles, so the garbage collector would scan them repeatedly while they're
+        # created.
+        collecting = gc.isenabled()
+        gc.disable()
+        # Lists are faster to index one item at a time than arrays.
+        self.sections.update({name: section.tolist() for name, section in self.sections.items()
+                              if isinstance(section, np.ndarray)})
+        try:
+            for uri in list(self.pending):
+                # Resources linked to by those created before are created along with them.
+                if uri in self.pending:
+                    self.build(uri)
+        finally:
+            if collecting:
+                gc.enable()
+
+    def merge(self, resource, n):
+        """Complete a resource which was already in the cache with the saved data it's missing."""
+        if self.created is not None:
+            self.created[n] = resource
+        data = self._details(n, True)
+        if new_details := {detail: data[detail] for detail in data if detail not in resource.details}:
+            resource.parse_details(self.factory.interner.intern(new_details) if self.factory.compact
+                                   else new_details)
+        if resource.resource_type is spotify.Track and resource.features is None:
+            resource.features = [None, False, True][self.sections['features'][n] + 1]
+        # Children are only replaced if they weren't loaded.
+        if isinstance(resource, spotify.Collection) and not resource.children_loaded:
+            self._set_children(resource, n)
+
+    def _create(self, n, pending):
+        factory = self.factory
+        sp = factory.sp
+        data = self._details(n, pending)
+        if factory.compact:
+            data = factory.interner.intern(data)
+        resource_type = TYPES[self.sections['types'][n]]
+        if resource_type is spotify.Track:
+            album = self.sections['album'][n]
+            resource = spotify.Track(sp, data, self._links('artists', n), self._resource(album) if album >= 0 else None)
+            resource.features = [None, False, True][self.sections['features'][n] + 1]
+        elif resource_type is spotify.Album:
+            resource = spotify.Album(sp, data, self._links('artists', n))
+        elif resource_type is spotify.Playlist:
+            owner = self.sections['owner'][n]
+            resource = spotify.Playlist(sp, data, self._resource(owner) if owner >= 0 else None)
+        else:
+            resource = resource_type(sp, data)
+        if factory.compact:
+            resource.compact()
+        resource.uri_id = factory.interner.uri_id(resource.uri)
+        if self.created is not None:
+            self.created[n] = resource
+        # Cached before its children are created, since they can link back to it, like tracks to their album.
+        factory.cache[resource.uri] = resource
+        if isinstance(resource, spotify.Collection):
+            self._set_children(resource, n)
+        return resource
+
+    def _resource(self, n):
+        if self.created is not None and self.created[n] is not None:
+            return self.created[n]
+        try:
+            return self.factory.cache[self.uris[n]]
+        except KeyError:
+            # Created before and released by a bounded cache since.
+            return self._create(n, False)
+
+    def _links(self, name, n):
+        offsets = self.sections[f'{name}_offsets']
+        links = self.sections[name][offsets[n]:offsets[n + 1]]
+        return [self._resource(i) for i in (links if isinstance(links, list) else links.tolist())]
+
+    def _set_children(self, resource, n):
+        children_loaded = bool(self.sections['children_loaded'][n])
+        offsets = self.sections['children_offsets']
+        if children_loaded or offsets[n] != offsets[n + 1]:
+            resource.children = self._links('children', n)
+            resource.children_loaded = children_loaded
+
+    def _details(self, n, pending):
+        number = n // self.block_size
+        block = self.blocks.get(number)
+        if block is None:
+            offsets = self.sections['details_offsets']
+            start, end = int(offsets[number]), int(offsets[number + 1])
+            offset = self.sections['details'][0]
+            block = marshal.loads(self.buffer[offset + start:offset + end])
+            if self.remaining[number]:
+                self.blocks[number] = block
+        if pending:
+            self.remaining[number] -= 1
+            if not self.remaining[number]:
+                del self.blocks[number]
+        return block[n % self.block_size]
@@ -5,6 +5,7 @@ from spotifytools.spotify.resource import Resource
 
 from spotifytools.spotify.playlist import Playlist
 from spotifytools.spotify.track import Track
+from spotifytools.spotify.lazy_track import LazyTrack
 from spotifytools.spotify.user import User
 from spotifytools.spotify.album import Album
 from spotifytools.spotify.artist import Artist
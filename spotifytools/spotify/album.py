@@ -4,6 +4,7 @@ from spotifytools.spotify.track import Track
 
 class Album(spotify.Resource, spotify.Collection):
     child_type = Track
+    complete_detail = 'label'
 
     def __init__(self, sp, raw_data, artists, children=None, children_loaded=False):
         spotify.Resource.__init__(self, sp, raw_data)
@@ -4,6 +4,7 @@ from spotifytools.spotify.album import Album
 
 class Artist(spotify.Resource, spotify.Collection):
     child_type = Album
+    complete_detail = 'followers'
 
     def __init__(self, sp, raw_data, children=None):
         spotify.Resource.__init__(self, sp, raw_data)
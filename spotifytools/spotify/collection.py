@@ -18,6 +18,8 @@ class Collection(spotify.Object):
         self.features = {}  # Average values of child details.
 
     def __iter__(self):
+        # Lets loads of single children requested in a loop over the collection be batched with their siblings.
+        self.sp.aggregator.add_parent(self)
         return iter(self.children)
 
     def get_name(self):
@@ -27,8 +29,21 @@ class Collection(spotify.Object):
         """Loads, caches and returns all available children."""
         if not self.children_loaded:
             self.sp.load_children(self)
+        self.sp.aggregator.add_parent(self)
         return self.children
 
+    def iter_children(self, keep=True):
+        """
+        Yield all available children, downloading them page by page if they're not loaded yet.
+
+        Downloaded children are added to the collection unless keep is False.
+        """
+        return self.sp.iter_children(self, keep)
+
+    def iter_tracks(self, keep=True):
+        """Yield unique tracks in this collection and all subcollections as they're downloaded."""
+        return self.sp.iter_tracks(self, keep)
+
     def get_tracks(self):
         """Recursively return all tracks in this collection and all subcollections."""
         # TODO: Different people may have different preferences on which version to keep (f.e. older vs newer release).
@@ -37,10 +52,21 @@ class Collection(spotify.Object):
         for sub in self.get_children():
             if isinstance(sub, Collection):
                 tracks.update(sub.get_tracks())
-            elif isinstance(sub, spotify.Track):
+            elif sub.resource_type is spotify.Track:
                 tracks.add(sub)
         return list(tracks)
 
+    def load(self, recursive=False):
+        """
+        Download all children of the collection with their details.
+
+        If recursive, loads all subcollections down to the tracks, including their details and features.
+        """
+        if recursive:
+            self.sp.load_recursive(self, details=True, features=True)
+        else:
+            self.sp.load(self.get_children(), details=True)
+
     def count_tracks(self):
         """Estimates the total number of tracks under this collection by summing up 'total_tracks' attribute."""
         if 'total_tracks' in self.details:
@@ -57,24 +83,13 @@ class Collection(spotify.Object):
         This will cause all subcollections to load.
         """
         # TODO: Reimplement following: 'release_year', 'artists_number'
-        # Details that can be summed up and averaged.
-        summable = ['popularity', 'energy', 'dance', 'valence', 'duration', 'explicit', 'tempo', 'live', 'speech', 'acoustic', 'instrumental', 'mode', 'signature', 'track_number']
-
         if not self.features:
             # TODO: Add options for loading new tracks and forcing a refresh on all tracks
             # TODO: There is a difference between artist's tracks' average features and albums' average features
             # Load complete tracks.
             tracks = self.get_tracks()
             self.sp.load(tracks, details=True, features=True)
-            # Initialize the dictionary to hold the sums of values and resources.
-            sums = {detail: {'sum': 0, 'count': 0} for detail in summable}
-            for child in tracks:
-                for detail in summable:
-                    if detail in child.details:
-                        sums[detail]['sum'] += child.details[detail]
-                        sums[detail]['count'] += 1
-            for detail in sums:
-                if sums[detail]['count']:
-                    self.features[detail] = sums[detail]['sum']/sums[detail]['count']
+            # Averages are computed over the rows of the tracks in the session's feature table.
+            ids = self.sp.feature_table.update(tracks)
+            self.features = self.sp.feature_table.mean(ids)
         return self.features
-
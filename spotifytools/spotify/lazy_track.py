@@ -0,0 +1,57 @@
+import spotifytools.spotify as spotify
+
+
+class LazyTrack(spotify.Object):
+    """
+    Stand-in for a track which keeps the raw data from a page until more than its URI and name is needed.
+
+    The track is created by the factory on first access to any other attribute, after which the stand-in passes all
+    attributes through to it. It stays the only instance of the track known to the factory, so it can be compared and
+    put in sets like any other resource. Its resource_type is Track, which is what code handling tracks checks.
+    """
+    __slots__ = ('uri', 'uri_id', 'raw_data', 'factory', 'resource', '__weakref__')
+
+    def __init__(self, factory, raw_data):
+        object.__setattr__(self, 'uri', raw_data['uri'])
+        object.__setattr__(self, 'uri_id', factory.interner.uri_id(raw_data['uri']))
+        object.__setattr__(self, 'raw_data', raw_data)
+        object.__setattr__(self, 'factory', factory)
+        object.__setattr__(self, 'resource', None)
+
+    @property
+    def resource_type(self):
+        return spotify.Track
+
+    @property
+    def materialized(self):
+        return self.resource is not None
+
+    @property
+    def name(self):
+        if self.resource is None and 'name' in self.raw_data:
+            return self.raw_data['name']
+        return self.materialize().name
+
+    def get_name(self):
+        return self.name
+
+    def load(self, recursive=False):
+        return self.materialize().load(recursive)
+
+    def materialize(self):
+        """Return the track, creating it from the raw data if it wasn't created yet."""
+        if self.resource is None:
+            self.factory.materialize(self)
+        return self.resource
+
+    def __getattr__(self, name):
+        return getattr(self.materialize(), name)
+
+    def __setattr__(self, name, value):
+        if name in LazyTrack.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.materialize(), name, value)
+
+    def __repr__(self):
+        return f"<LazyTrack {self.uri}{'' if self.resource is None else ' (materialized)'}>"
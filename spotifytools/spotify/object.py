@@ -1,5 +1,11 @@
 class Object:
     """Represents any Spotify resource or collection the program can operate on."""
+    __slots__ = ()
+
+    @property
+    def resource_type(self):
+        """Class of the object, which for stand-ins like LazyTrack is the class they stand in for."""
+        return type(self)
 
     def get_name(self):
         return None
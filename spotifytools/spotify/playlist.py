@@ -8,6 +8,7 @@ from spotifytools.helpers import sort_image_urls
 class Playlist(spotify.Resource, spotify.Collection):
 
     child_type = Track
+    complete_detail = 'followers'
 
     def __init__(self, sp, raw_data, owner, children=None, children_loaded=False):
         spotify.Resource.__init__(self, sp, raw_data)
@@ -4,8 +4,18 @@ from spotifytools.helpers import details_adapter
 
 class Resource(spotify.Object):
     """Represents any Spotify resource that has a uri and can be retrieved from Spotify API."""
+    # Detail which is only present in complete data about the resource, as opposed to its simplified version nested
+    # in other responses.
+    complete_detail = None
+    # Fixed fields are kept in slots. Details are added to __dict__, which compacted resources release.
+    __slots__ = ('compacted', 'sp', 'details', 'revision', 'uri_id', '__dict__', '__weakref__')
+
     def __init__(self, sp, raw_data=None):
+        self.compacted = False
+        self.sp = sp
         self.details = {}  # Static attributes reflecting an existing spotify resource, added to __dict__
+        self.revision = 0  # Incremented whenever details change, so copies of them can tell they're out of date.
+        self.uri_id = None  # Dense id of the URI, given by the factory creating the resource.
         self.uri: str
         self.name: str
         # TODO: Request complete details only if the required data is missing.
@@ -17,6 +27,17 @@ class Resource(spotify.Object):
     def get_name(self):
         return self.name
 
+    @property
+    def details_loaded(self):
+        """Check if the resource was parsed from its complete data."""
+        return self.complete_detail in self.details
+
+    def get_details(self):
+        """Download complete details about the resource, batched with details requested for other resources."""
+        if not self.details_loaded:
+            self.sp.request_details(self)
+        return self.details
+
     def parse_details(self, details):
         """
         Updates resource with details from a Spotify API response.
@@ -24,8 +45,49 @@ class Resource(spotify.Object):
         The track data in Spotify responses arbitrarily misses important values depending on the initial request.
         It must be assumed any value can be missing and will need to be updated later.
         """
-        self.details.update(details)
-        self.__dict__.update(details)
+        self.revision += 1
+        if self.compacted:
+            self.details.update(compact_details(details))
+        else:
+            self.details.update(details)
+            self.__dict__.update(details)
+
+    def compact(self):
+        """
+        Keep details only in the details dictionary and replace raw data of related resources with references.
+
+        Details remain available as attributes. Used by the compact mode of ResourceFactory to save memory.
+        """
+        for detail in self.details:
+            self.__dict__.pop(detail, None)
+        if not self.__dict__:
+            # Only details were there, so the emptied dictionary is released and fields are left in slots.
+            del self.__dict__
+        self.details = compact_details(self.details)
+        self.compacted = True
+
+    def __getattr__(self, name):
+        # Only called when regular lookup fails, which is the case for details of compacted resources.
+        if name != 'details':
+            try:
+                return self.details[name]
+            except KeyError:
+                pass
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+
+def compact_details(details):
+    """Return details with the raw data of related resources reduced to what's needed to recreate them."""
+    return {detail: reference(value) if detail.endswith('_data') else value for detail, value in details.items()}
+
+
+def reference(data):
+    """Reduce raw data of a resource, a list of resources or a page of resources to a reference."""
+    if isinstance(data, list):
+        return [reference(item) for item in data]
+    if isinstance(data, dict):
+        return {key: data[key] for key in ('uri', 'type', 'name', 'total', 'next') if key in data}
+    return data
 
 
 
@@ -6,6 +6,9 @@ from spotifytools.genius_session import GeniusSession
 
 # TODO: Add recommendation methods.
 class Track(spotify.Resource):
+    complete_detail = 'popularity'
+    __slots__ = ('artists', 'album', 'lyrics', 'confidence_scores', 'features')
+
     def __init__(self, sp, raw_data, artists, album):
         self.artists = artists
         self.album = album
@@ -27,9 +30,13 @@ class Track(spotify.Resource):
     # TODO: Add method for completing own details
 
     def get_features(self):
-        """Add audio features to track attributes."""
-        if not self.features:
-            self.sp.load_features(self)
+        """
+        Add audio features to track attributes.
+
+        The request is batched with features requested for other tracks around the same time.
+        """
+        if self.features is None:
+            self.sp.request_features(self)
         return self.features
 
     def get_lyrics(self):
@@ -73,6 +80,8 @@ class Track(spotify.Resource):
         """
         # TODO: Look into loading features through Resource parse_details route
         self.features = bool(features)
+        self.revision += 1
         if features:
             self.details.update(features)
-            self.__dict__.update(features)
+            if not self.compacted:
+                self.__dict__.update(features)
@@ -4,6 +4,7 @@ from spotifytools.spotify.playlist import Playlist
 
 class User(spotify.Resource, spotify.Collection):
     child_type = Playlist
+    complete_detail = 'followers'
 
     def __init__(self, sp, raw_data, children=None):
         spotify.Resource.__init__(self, sp, raw_data)
@@ -1,7 +1,9 @@
-import time
+import functools
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
-import requests.exceptions
 from spotipy import Spotify
 import os
 from spotipy.oauth2 import SpotifyOAuth, SpotifyClientCredentials
@@ -9,6 +11,14 @@ from spotipy.cache_handler import CacheFileHandler
 
 import spotifytools.spotify as spotify
 from spotifytools.resource_factory import ResourceFactory
+from spotifytools.rate_limiter import RateLimiter, shared_rate_limiter
+from spotifytools.response_cache import ResponseCache
+from spotifytools.transport import Transport
+from spotifytools.session_stats import SessionStats
+from spotifytools.request_aggregator import RequestAggregator
+from spotifytools.load_pipeline import LoadPipeline
+from spotifytools.feature_table import FeatureTable
+from spotifytools.snapshot import save_snapshot, load_snapshot
 from spotifytools.helpers import uri_to_url, filter_false_tracks, uri_list, remove_duplicates, features_adapter
 from spotifytools.exceptions import SpotifyToolsException, SpotifyToolsUnauthorizedException
 
@@ -24,25 +34,88 @@ What does the app do - provides graphical interface, ease of public access and a
 Local client - for downloading everything into dbs
 
 """
-TIMEOUT_SLEEP = 30
+# Maximum number of pages of a single paged response requested at the same time.
+PAGE_WORKERS = 8
+
+# Fields requested for pages of playlist items in each load profile. The lean profile only asks for the data used to
+# create tracks with their albums and artists, leaving out markets, external ids and the like. None requests everything.
+PLAYLIST_FIELDS = {
+    'full': None,
+    'lean': 'items(track(uri,id,type,name,is_local,duration_ms,explicit,popularity,track_number,disc_number,'
+            'preview_url,external_urls,artists(uri,id,type,name),album(uri,id,type,name,album_type,release_date,'
+            'release_date_precision,total_tracks,images,external_urls,artists(uri,id,type,name)))),'
+            'offset,limit,next,total',
+}
 
 # The authorization scope for Spotify API needed to run this app
 SCOPE = "user-top-read user-read-currently-playing user-modify-playback-state playlist-read-private playlist-read-collaborative playlist-modify-private playlist-modify-public"
 
 
 # TODO: Consider creating an auhorized session class as a child of the general session
-def timeout_wait(func):
-    """If the decorated function returns a timeout exception, wait and try again."""
-
-    def inner(*args, **kwargs):
-        while True:
-            try:
-                return func(*args, **kwargs)
-            # TODO: SpotifyException doesn't always mean timeout
-            except (requests.exceptions.ReadTimeout) as error:
-                # Take a break
-                print(f"GOT TIMEOUT, WAITING ({error})")
-                time.sleep(TIMEOUT_SLEEP)
+def rate_limited(func, write=False):
+    """
+    Makes the decorated request through the session's rate limiter, which waits for its turn and retries failures.
+
+    Requests changing state are writes, which aren't repeated after connection errors, see RateLimiter.call_write.
+    """
+
+    @functools.wraps(func)
+    def inner(self, *args, **kwargs):
+        endpoint = func.__name__.strip('_')
+        self.request_stats.count_request(endpoint)
+        call = self.rate_limiter.call_write if write else self.rate_limiter.call
+        return call(endpoint, self.request_stats.timed(endpoint, func), self, *args, **kwargs)
+
+    return inner
+
+
+def rate_limited_write(func):
+    """Makes the decorated request changing state through the session's rate limiter."""
+    return rate_limited(func, write=True)
+
+
+def cached_response(func):
+    """
+    Returns the response of the decorated request from the session's response cache if it's available.
+
+    With 'refresh' set, the request is made regardless and its response replaces the cached one.
+    """
+
+    @functools.wraps(func)
+    def inner(self, *args, refresh=False, **kwargs):
+        cache = self.response_cache
+        if cache is None or cache.bypass:
+            return func(self, *args, **kwargs)
+        endpoint = func.__name__.strip('_')
+        # Resources are identified by their URI, other arguments are used as they are.
+        key = ':'.join(str(getattr(arg, 'uri', arg)) for arg in args + tuple(kwargs.values()))
+        response = None if refresh else cache.get(endpoint, key)
+        if not refresh:
+            self.request_stats.record_cache(endpoint, hits=response is not None, misses=response is None)
+        if response is None:
+            response = func(self, *args, **kwargs)
+            cache.set(endpoint, key, response)
+        return response
+
+    return inner
+
+
+def cached_batch(func):
+    """Completes the decorated batch request from the session's response cache and only requests missing items."""
+
+    @functools.wraps(func)
+    def inner(self, items, *args, **kwargs):
+        cache = self.response_cache
+        if cache is None or cache.bypass:
+            return func(self, items, *args, **kwargs)
+        endpoint = func.__name__.strip('_')
+        responses = cache.get_many(endpoint, [item.uri for item in items])
+        self.request_stats.record_cache(endpoint, hits=len(responses), misses=len(items) - len(responses))
+        if missing := [item for item in items if item.uri not in responses]:
+            new_responses = dict(zip([item.uri for item in missing], func(self, missing, *args, **kwargs)))
+            cache.set_many(endpoint, new_responses)
+            responses.update(new_responses)
+        return [responses[item.uri] for item in items]
 
     return inner
 
@@ -60,26 +133,83 @@ def authorized(func):
 
 class SpotifySession:
     # TODO: Check if web app needs separate sp instances
-    def __init__(self, cache_path=None):
-        """ Initializes an unauthorized connection - only endpoints not accessing user info will work."""
+    def __init__(self, cache_path=None, rate_limiter: RateLimiter = None, response_cache: ResponseCache = None,
+                 shared_cache=None, load_profile='full', transport: Transport = None,
+                 stats: SessionStats = None, access_token=None, api_url=None, compact=False, max_resources=None,
+                 lazy=False):
+        """
+        Initializes an unauthorized connection - only endpoints not accessing user info will work.
+
+        The load profile selects the fields requested for playlist items, either 'full' or 'lean'.
+        Requests are sent through the transport, and responses are decoded with the fastest parser available.
+        Requests are recorded in stats, which can be shared by several sessions.
+        A static access token replaces the client credentials flow, e.g. when replaying responses from a cassette.
+        The API URL points the session at another server than Spotify, like a SyntheticServer. It can also be set
+        with the SPOTIFYTOOLS_API_URL environment variable.
+        Compact mode makes resources take less memory, see ResourceFactory.
+        The maximum number of resources caps the number of resources the factory keeps when they're not used elsewhere.
+        Lazy mode defers parsing tracks in pages of children until they're used, see ResourceFactory.
+        """
         self.authorized = False
         self.cache_handler = CacheFileHandler(cache_path=cache_path)
-        self.auth_manager = SpotifyOAuth(scope=SCOPE, cache_handler=self.cache_handler, show_dialog=True)
-        self.connection: Spotify = Spotify(auth_manager=SpotifyClientCredentials())
-        self.factory = ResourceFactory(self)  # TODO: Experiment with shared factories for sessions.
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.response_cache = response_cache  # Optional persistent cache of responses shared between sessions.
+        if load_profile not in PLAYLIST_FIELDS:
+            raise SpotifyToolsException(f"Unknown load profile: {load_profile}.")
+        self.load_profile = load_profile
+        self.transport = transport or Transport()
+        self.request_stats = stats or SessionStats()
+        if self.request_stats.record_response not in self.transport.hooks['response']:
+            self.transport.hooks['response'].append(self.request_stats.record_response)
+        self.access_token = access_token
+        # Sessions with a static token don't need credentials for the authorization flow.
+        self.auth_manager = None if access_token else SpotifyOAuth(scope=SCOPE, cache_handler=self.cache_handler,
+                                                                   show_dialog=True)
+        self.api_url = api_url or os.environ.get('SPOTIFYTOOLS_API_URL')
+        self.connection: Spotify = self._connect(None if access_token else SpotifyClientCredentials())
+        # TODO: Experiment with shared factories for sessions.
+        # Shared cache is optional, e.g. a RedisResourceCache.
+        self.factory = ResourceFactory(self, shared_cache, compact, max_resources, lazy)
+        self.aggregator = RequestAggregator(self)  # Batches loads of single items requested by resources.
+        # Numeric details and features of tracks for computing aggregates, keyed on the factory's URI ids.
+        self.feature_table = FeatureTable(interner=self.factory.interner)
         self.connected_user = None  # Cache for currently connected user's data.
-        self.resources = {}  # Master dictionary of all instantiated unique resources indexed by URI
+
+    def stats(self):
+        """Return the number of requests, retries, errors, latency, response sizes and cache hits by endpoint."""
+        return self.request_stats.snapshot()
+
+    def prometheus_stats(self):
+        """Return request and resource cache stats as text in the Prometheus exposition format."""
+        return self.request_stats.prometheus() + self.factory.cache.prometheus()
+
+    def save_snapshot(self, path):
+        """Save all resources of the session to a binary snapshot file, see snapshot.py."""
+        return save_snapshot(self.factory, path)
+
+    def load_snapshot(self, path):
+        """Restore resources saved in a snapshot file without making any requests."""
+        return load_snapshot(self.factory, path)
 
     def remove_cache(self):
         os.remove(self.cache_handler.cache_path)
 
     def authorize(self, code=None):
-        self.auth_manager.get_access_token(code)
-        self.connection = Spotify(auth_manager=self.auth_manager)
-        # TODO: Check if timeouts can be handled by spotipy
-        # self.connection.requests_timeout = 30
+        if self.auth_manager:
+            self.auth_manager.get_access_token(code)
+            self.connection = self._connect(self.auth_manager)
         self.authorized = True
 
+    def _connect(self, auth_manager):
+        """Create a spotipy client which sends requests through the transport and leaves rate limits to the limiter."""
+        if auth_manager is None:
+            connection = Spotify(auth=self.access_token, requests_session=self.transport)
+        else:
+            connection = Spotify(auth_manager=auth_manager, requests_session=self.transport)
+        if self.api_url:
+            connection.prefix = self.api_url
+        return connection
+
     # AUTHORIZED SCOPE
     @authorized
     def unique_playlist_name(self, name):
@@ -93,26 +223,33 @@ class SpotifySession:
         return name
 
     @authorized
-    @timeout_wait
     def create_playlist(self, name, tracks: List[spotify.Track] = None):
         # TODO: Longest playlist name is 100 chars, add exception handling
-        """Creates a playlist in the user's library and adds supplied tracks in batches of 100."""
+        """
+        Creates a playlist in the user's library and adds supplied tracks in batches of 100.
+
+        Each request is retried on its own, so a failure to add tracks never creates the playlist again.
+        """
         user_id = self.fetch_user().id
         name = self.unique_playlist_name(name)
-        raw_playlist = self.connection.user_playlist_create(user_id, name)
+        raw_playlist = self._create_playlist(user_id, name)
         new_playlist = self.factory.get_resource(raw_playlist)
         if tracks:
             for i in range(-(-len(tracks) // 100)):
                 self._add_to_playlist(new_playlist, tracks[i * 100: (i + 1) * 100])
         return new_playlist
 
+    @rate_limited_write
+    def _create_playlist(self, user_id, name):
+        return self.connection.user_playlist_create(user_id, name)
+
     @authorized
-    @timeout_wait
+    @rate_limited_write
     def _add_to_playlist(self, playlist: spotify.Playlist, tracks: List[spotify.Track]):
         """
         Adds up to a hundred tracks to a playlist.
 
-        This is a separate function because each state-modifying request needs a separate decorator to catch a timeout.
+        This is a separate function because each state-modifying request needs to be retried separately.
         """
         # TODO: Add handling for invalid playlist or track parameters
         if len(tracks) > 100:
@@ -120,41 +257,44 @@ class SpotifySession:
         self.connection.playlist_add_items(playlist.uri, [track.uri for track in tracks])
 
     @authorized
-    @timeout_wait
     def fetch_user_playlists(self, user: spotify.User):
         """Return all publicly visible playlists from the library of user with given id."""
         # TODO: Add handling for invalid user parameter
-        results = []
-        has_next = True
-        i = 0
-        while has_next:
-            response = self.connection.user_playlists(user.id, limit=50, offset=i * 50)
-            i += 1
-            has_next = bool(response['next'])
-            if "items" in response:
-                results.extend([self.factory.get_resource(item) for item in response["items"]])
-        return results
+        with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as executor:
+            pages = self._fetch_pages(user, self._user_playlists, 0, 50, executor)
+        return self.factory.get_resources([item for page in pages if 'items' in page for item in page['items']])
 
     @authorized
-    @timeout_wait
     def fetch_user(self, update=False):
         """Download, cache and return metadata about the currently logged in user."""
         # TODO: Check possible ways in which the user data might change mid-session
         if not self.connected_user or update:
-            user_data = self.connection.current_user()
-            self.connected_user = self.factory.get_resource(user_data)
+            user_data = self._current_user()
+            previous, self.connected_user = self.connected_user, self.factory.get_resource(user_data)
+            # The connected user is kept in the cache however many other resources are created.
+            if previous is not None and previous is not self.connected_user:
+                self.factory.cache.unpin(previous)
+            self.factory.cache.pin(self.connected_user)
         return self.connected_user
 
+    @rate_limited
+    def _current_user(self):
+        return self.connection.current_user()
+
     @authorized
-    @timeout_wait
     def queue(self, tracks):
         """Queue one or more tracks."""
         # TODO: Handling of invalid parameters on this and play
+        # Each track is queued by its own request, so a retry never queues tracks which were already queued again.
         for track in tracks:
-            self.connection.add_to_queue(track.uri)
+            self._add_to_queue(track)
+
+    @rate_limited_write
+    def _add_to_queue(self, track):
+        self.connection.add_to_queue(track.uri)
 
     @authorized
-    # Time sensitive functions don't get a timeout decorator
+    # Time sensitive functions aren't rate limited or retried
     def play(self, tracks):
         """Starts playback of one or more tracks."""
         self.connection.start_playback(uris=[track.uri for track in tracks])
@@ -171,7 +311,6 @@ class SpotifySession:
         return self.factory.get_resource(current_track)
 
     # GENERAL SCOPE
-    @timeout_wait
     def search(self, query, search_type='track,artist,playlist,album', limit=50):
         """
         Returns objects representing Spotify search results.
@@ -179,38 +318,122 @@ class SpotifySession:
         # TODO: Elaborate documentation
         # TODO: Consider using types instead of strings for indexing results
         """
+        response = self._search(query, search_type, limit)
+        return self._parse_search(response)
+
+    def _parse_search(self, response):
+        """Parse a search response into lists of resources indexed by their singular type name."""
         results = {}
-        response = self.connection.search(q=query, limit=limit, type=search_type)
         for resource in response:
-            results[resource[:-1]] = [self.factory.get_resource(data) for data in response[resource]['items']]
+            results[resource[:-1]] = self.factory.get_resources(response[resource]['items'])
         return results
 
-    @timeout_wait
     def fetch_item(self, uri, reload=False, raw=False):
         if uri not in self.factory.cache or reload or raw:
-            url = uri_to_url(uri)
-            response = self.connection._get(url)
-            return response if raw else self.factory.get_resource(response)
+            if not (reload or raw) and (shared := self.factory.from_shared_cache([uri])):
+                return shared[0]
+            response = self._item(uri, refresh=reload)
+            if raw:
+                return response
+            resource = self.factory.get_resource(response)
+            self.factory.share([resource])
+            return resource
         else:
             return self.factory.cache[uri]
 
-    @timeout_wait
+    @rate_limited
     def fetch_artist_top_tracks(self, artist, keep_duplicates=False):
         """
         Returns artist's 10 top tracks.
         """
         response = self.connection.artist_top_tracks(artist.uri)
-        tracks = [self.factory.get_resource(track) for track in response['tracks']]
+        tracks = self.factory.get_resources(response['tracks'])
         # TODO: This shouldn't be here
         if not keep_duplicates:
             # Remove duplicates (tracks are sorted by popularity by default)
             tracks = remove_duplicates(tracks)
         return tracks
 
-    @timeout_wait
+    @rate_limited
     def fetch_related_artists(self, artist):
         response = self.connection.artist_related_artists(artist.uri)
-        return [self.factory.get_resource(artist) for artist in response['artists']]
+        return self.factory.get_resources(response['artists'])
+
+    def request_features(self, track: spotify.Track):
+        """Load features of a single track as part of a batch shared with other tracks requested at the same time."""
+        return self.aggregator.load('features', track)
+
+    def request_details(self, resource: spotify.Resource):
+        """Load details of a single resource as part of a batch shared with other resources requested at the same time."""
+        return self.aggregator.load('details', resource)
+
+    def load_recursive(self, items, details=False, features=False):
+        """
+        Loads collections recursively down to their tracks, optionally including track details and features.
+
+        Loading is done by a staged pipeline, so requests for tracks found early on are made while other collections
+        are still loading. Returns a summary in the same format as load.
+        """
+        if not isinstance(items, list):
+            items = [items]
+        return LoadPipeline(self, details=details, features=features).run(items)
+
+    def iter_children(self, collection: spotify.Collection, keep=True):
+        """
+        Yield children of the collection as pages of them are downloaded.
+
+        Children are added to the collection as they're yielded, and it's marked as loaded once all were downloaded.
+        Without keeping them, downloaded pages are left out of the collection, so only the pages being requested ahead
+        are held in memory, along with whatever the factory's cache keeps (see max_resources).
+        """
+        known = list(collection.children)
+        yield from known
+        if collection.children_loaded or collection.resource_type not in (cases := self._load_cases()['children']):
+            return
+        request_method, parsing_method, limit = cases[collection.resource_type]
+        with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as executor:
+            for page in self._iter_pages(collection, request_method, len(known), limit, executor):
+                children = self._parse_resources(page.get('items', []), collection)
+                if keep:
+                    collection.children.extend(children)
+                yield from children
+        if keep:
+            collection.children_loaded = True
+
+    def iter_tracks(self, collection: spotify.Collection, keep=True):
+        """
+        Yield unique tracks in the collection and all its subcollections as they're downloaded.
+
+        Children are kept on the collections as in iter_children. Only URIs of the tracks already yielded are
+        remembered, to skip duplicates.
+        """
+        seen = set()
+        collections = [collection]
+        while collections:
+            for child in self.iter_children(collections.pop(0), keep):
+                if child.resource_type is spotify.Track:
+                    if child.uri not in seen:
+                        seen.add(child.uri)
+                        yield child
+                elif isinstance(child, spotify.Collection):
+                    collections.append(child)
+
+    def compare_load_profiles(self, playlist: spotify.Playlist, offset=0):
+        """
+        Download the same page of a playlist's items with each load profile and return the size of each in bytes.
+
+        Shows how much data the lean profile saves per page. Sizes are the decoded sizes of the response bodies, as
+        recorded by the session's stats for the response to each request, so compression doesn't affect them. Makes
+        one request per profile, bypassing the response cache, and the responses replace cached ones.
+        """
+        sizes = {}
+        for profile in PLAYLIST_FIELDS:
+            self.request_stats.local.response_bytes = None
+            self._playlist_items(playlist, offset, profile, refresh=True)
+            if self.request_stats.local.response_bytes is None:
+                raise SpotifyToolsException("No response was received by the session's transport.")
+            sizes[profile] = self.request_stats.local.response_bytes
+        return sizes
 
     # Shorthands
     def load_children(self, items):
@@ -229,131 +452,272 @@ class SpotifySession:
 
         The resources can be of mixed types, but at least one request to the API has to be made for each type of item.
         Features are only available for tracks.
-        There are cases where some tracks in a collection are missing their details, while others are missing features.
+        There are cases where some tracks in a collection are missing their details, while others are missing features,
+        so only the data actually missing from each resource is requested.
+
+        Returns a summary with the number of items requested and skipped and the number of requests made for each
+        kind of data.
         """
 
         # TODO: Make this more elegant
         if not isinstance(items, list):
             items = [items]
 
+        fetch_methods = {
+            'details': self._fetch_bulk_details,
+            'features': self._fetch_bulk_details,
+            'children': self._fetch_bulk_children,
+        }
+
+        plan, summary = self._plan_load(items, details, features, children)
+        plan = self._skip_shared(plan, summary)
+        # For each sorted list, download and parse details or features.
+        for c, batch, case in plan:
+            summary[c]['requested'] += len(batch)
+            summary[c]['requests'] += fetch_methods[c](batch, *case)
+        return summary
+
+    def _plan_load(self, items, details=False, features=False, children=False):
+        """
+        Sorts items by type and pairs each list with the methods needed to load the requested data.
+
+        Returns a list of tuples of the load case name, the items of one type which are missing the data and a tuple
+        of the request method, the parsing method and the request limit for that type, along with a summary of the
+        load with the number of items skipped because they already have the data.
+        """
+        requested = {'features': features, 'details': details, 'children': children}
+        cases = {c: case for c, case in self._load_cases().items() if requested[c]}
+
+        # Checks whether an item is missing the data loaded in each case.
+        missing = {
+            'features': lambda item: item.features is None,
+            'details': lambda item: not item.details_loaded,
+            'children': lambda item: not item.children_loaded,
+        }
+
+        # Separate the items into lists by type, which for stand-ins like LazyTrack is the type they stand in for.
+        sorted_items = {}
+        for item in items:
+            sorted_items.setdefault(item.resource_type, []).append(item)
+
+        plan = []
+        summary = {c: {'requested': 0, 'skipped': 0, 'requests': 0} for c in cases}
+        for c in cases:
+            case = cases[c]
+            for resource in case:
+                if resource in sorted_items:
+                    # Skip the items which already have the data.
+                    batch = [item for item in sorted_items[resource] if missing[c](item)]
+                    summary[c]['skipped'] += len(sorted_items[resource]) - len(batch)
+                    if batch:
+                        plan.append((c, batch, case[resource]))
+        return plan, summary
+
+    def _load_cases(self):
+        """
+        Return the request method, the parsing method and the request limit for each type of resource indexed by the
+        kind of data they load.
+        """
         # TODO: Add cases for all types
-        # TODO: Add logic for recursive loading (for example load playlist tracks and their features in one call)
-        # Define request limit, methods for requesting and parsing respectively for each requested resource.
-        cases = {
+        return {
             'features': {
                 spotify.Track: (self._track_features, self._match_features, 100),
-            } if features else None,
+            },
             'details': {
                 spotify.Track: (self._track_details, self._match_details, 50),
                 spotify.Album: (self._album_details, self._match_details, 20),
                 spotify.Artist: (self._artist_details, self._match_details, 50),
                 spotify.Playlist: (self._playlist_details, self._match_details, 1),
-            } if details else None,
+            },
             'children': {
                 spotify.Playlist: (self._playlist_tracks, self._parse_children, 100),
                 spotify.Album: (self._album_tracks, self._parse_children, 50),
                 spotify.Artist: (self._artist_albums, self._parse_children, 50),
-            } if children else None,
-        }
-
-        fetch_methods = {
-            'details': self._fetch_bulk_details,
-            'features': self._fetch_bulk_details,
-            'children': self._fetch_bulk_children,
+                spotify.User: (self._user_playlists, self._parse_children, 50),
+            },
         }
 
-        # Separate the items into lists by type.
-        sorted_items = {}
-        for item in items:
-            if type(item) not in sorted_items:
-                sorted_items[type(item)] = []
-            sorted_items[type(item)].append(item)
-
-        # TODO: Add logic that separates items into lists based on their missing features (f.e. only load children if children are missing) so other parts of the program don't have to do checks
-
-        # For each sorted list that is left, download and parse details or features.
-        for c in cases:
-            case = cases[c]
-            if not case:  # Only proceed if the corresponding parameter is true.
-                continue
-            for resource in case:
-                if resource in sorted_items:
-                    fetch_methods[c](sorted_items[resource], *case[resource])
-        # TODO: is this return value ever used?
-        return items
+    def _skip_shared(self, plan, summary):
+        """Load data available in the shared cache and return the plan with only the items which still need requests."""
+        if self.factory.shared_cache is None:
+            return plan
+        remaining = []
+        for c, batch, case in plan:
+            loaded, batch = batch, self._load_shared(c, batch)
+            summary[c]['skipped'] += len(loaded) - len(batch)
+            if batch:
+                remaining.append((c, batch, case))
+        return remaining
+
+    def _load_shared(self, case, items):
+        """Load details or features available in the shared cache and return the items which still need requests."""
+        shared_cache = self.factory.shared_cache
+        uris = [item.uri for item in items]
+        if case == 'details':
+            loaded = {resource.uri for resource in self.factory.from_shared_cache(uris)}
+        elif case == 'features':
+            features = shared_cache.get_many_features(uris)
+            for item in items:
+                if item.uri in features:
+                    item.parse_features(features[item.uri])
+            loaded = features.keys()
+        else:
+            return items
+        return [item for item in items if item.uri not in loaded]
 
     @staticmethod
     def _fetch_bulk_details(items, request_method, parsing_method, limit):
-        """Passes items to request_method in batches not exceeding the limit and passes the results to parsing_method."""
-        for i in range(-(-len(items) // limit)):
+        """
+        Passes items to request_method in batches not exceeding the limit and passes the results to parsing_method.
+
+        Returns the number of requests made.
+        """
+        requests = -(-len(items) // limit)
+        for i in range(requests):
             batch = items[(i * limit): (i * limit) + limit]
             response = request_method(batch)  # Get response for each batch.
             parsing_method(batch, response)
+        return requests
 
     @staticmethod
     def _fetch_bulk_children(items, request_method, parsing_method, limit):
-        """Calls request_method for each item until the results are complete and passes them to parsing_method."""
-        for item in items:
-            children = []
-            offset = len(item.children)  # Compensate for children already known.
-            has_next = True
-            while has_next:
-                response = request_method(item, offset=offset)
+        """
+        Calls request_method for each item until the results are complete and passes them to parsing_method.
+
+        Returns the number of requests made.
+        """
+        requests = 0
+        with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as executor:
+            for item in items:
+                offset = len(item.children)  # Compensate for children already known.
+                pages = SpotifySession._fetch_pages(item, request_method, offset, limit, executor)
+                requests += len(pages)
+                parsing_method(item, [child for page in pages for child in page['items']])
+        return requests
+
+    @staticmethod
+    def _fetch_pages(item, request_method, offset, limit, executor):
+        """
+        Return all pages of a paged response for an item in order.
+
+        The first page reports the total number of results, so the remaining pages are requested concurrently
+        on the executor and reassembled in order. If the total is missing, the pages are followed one by one.
+        """
+        return list(SpotifySession._iter_pages(item, request_method, offset, limit, executor))
+
+    @staticmethod
+    def _iter_pages(item, request_method, offset, limit, executor, window=PAGE_WORKERS):
+        """
+        Yield pages of a paged response for an item in order as they arrive.
+
+        Up to window pages following the one being consumed are requested ahead on the executor, so a slow consumer
+        doesn't cause all the remaining pages to be held in memory at once.
+        """
+        response = request_method(item, offset=offset)
+        yield response
+        if (offsets := SpotifySession._remaining_offsets(response, offset, limit)) is not None:
+            offsets = iter(offsets)
+            ahead = deque(executor.submit(request_method, item, offset=page_offset)
+                          for page_offset in itertools.islice(offsets, window))
+            while ahead:
+                response = ahead.popleft().result()
+                if (page_offset := next(offsets, None)) is not None:
+                    ahead.append(executor.submit(request_method, item, offset=page_offset))
+                yield response
+        else:
+            while response['next']:
                 offset += limit
-                children.extend(response['items'])
-                has_next = bool(response['next'])
-            parsing_method(item, children)
+                response = request_method(item, offset=offset)
+                yield response
+
+    @staticmethod
+    def _remaining_offsets(response, offset, limit):
+        """Return offsets of all pages following the first page of a response, if the response reports the total."""
+        if 'total' in response:
+            return range(offset + limit, response['total'], limit)
 
     def _parse_children(self, item, children):
         # TODO: removing duplicates should be implemented early on before any sort of recursion kicks in
-        children = [self.factory.get_resource(child) for child in children]
-        item.children.extend(children)
+        item.children.extend(self._parse_resources(children, item))
         item.children_loaded = True
 
-    @timeout_wait
+    def _parse_resources(self, raw_list, parent=None):
+        """Return resources for a batch of Spotify API data, such as a page of children of the parent."""
+        if isinstance(parent, spotify.Album):
+            # Tracks in album pages miss their 'album' key, so the reference has to be restored.
+            for raw_data in raw_list:
+                raw_data.setdefault('album', {'uri': parent.uri})
+        return self.factory.get_resources(raw_list)
+
+    @cached_response
+    @rate_limited
+    def _item(self, uri):
+        return self.connection._get(uri_to_url(uri))
+
+    @rate_limited
+    def _search(self, query, search_type, limit):
+        return self.connection.search(q=query, limit=limit, type=search_type)
+
+    @rate_limited
+    def _user_playlists(self, user, offset=0):
+        return self.connection.user_playlists(user.id, limit=50, offset=offset)
+
+    @cached_batch
+    @rate_limited
     def _track_features(self, tracks: List[spotify.Track]):
         return self.connection.audio_features([track.uri for track in tracks])
 
-    @timeout_wait
+    @cached_batch
+    @rate_limited
     def _artist_details(self, artists: List[spotify.Artist]):
         return self.connection.artists([artist.uri for artist in artists])['artists']
 
-    @timeout_wait
+    @cached_batch
+    @rate_limited
     def _track_details(self, tracks: List[spotify.Track]):
         return self.connection.tracks([track.uri for track in tracks])['tracks']
 
-    @timeout_wait
+    @rate_limited
     def _playlist_details(self, playlist: List[spotify.Playlist]):
         return [self.connection.playlist(playlist[0].uri)]
 
-    @timeout_wait
+    @cached_batch
+    @rate_limited
     def _album_details(self, albums: List[spotify.Album]):
         return self.connection.albums([album.uri for album in albums])['albums']
 
     def _match_details(self, items: List[spotify.Resource], details):
-        """"""
+        """Parse complete details of resources and share them with other sessions if there's a shared cache."""
         for i in range(len(items)):
-            if details[i]:
-                self.factory.get_resource(details[i])
-            else:
+            if not details[i]:
                 # TODO: Replace this with logging
                 # Another edge case that has never happened so far
                 raise SpotifyToolsException(f"Failed to fetch details for {items[i].uri}.")
+        self.factory.share(self.factory.get_resources(details))
 
-    @staticmethod
-    def _match_features(tracks: List[spotify.Track], features):
+    def _match_features(self, tracks: List[spotify.Track], features):
         """Adapt the features and pass them to each track for parsing."""
+        adapted_features = {}
         for i in range(len(tracks)):
-            tracks[i].parse_features(features_adapter(features[i]))
+            adapted_features[tracks[i].uri] = features_adapter(features[i])
+            tracks[i].parse_features(adapted_features[tracks[i].uri])
+        if self.factory.shared_cache is not None:
+            self.factory.shared_cache.set_many_features(adapted_features)
 
-    @timeout_wait
     def _playlist_tracks(self, playlist, offset):
-        """Download all tracks from spotify for a playlist URI."""
-        response = self.connection.playlist_items(playlist.uri, offset=offset, limit=100)
+        """Download a page of tracks of a playlist with the fields of the session's load profile."""
+        return self._playlist_items(playlist, offset, self.load_profile)
+
+    # The profile is passed as an argument so responses of different profiles are cached separately.
+    @cached_response
+    @rate_limited
+    def _playlist_items(self, playlist, offset, profile):
+        response = self.connection.playlist_items(playlist.uri, fields=PLAYLIST_FIELDS[profile], offset=offset, limit=100)
         response["items"] = filter_false_tracks(response["items"])  # Remove local tracks and podcasts from the result.
         return response
 
-    @timeout_wait
+    @cached_response
+    @rate_limited
     def _artist_albums(self, artist, offset=0):
         # TODO: For now only albums are considered to save time, make this configurable
         # TODO: In very rare cases (Ray Dalton) an artist will only have singles uploaded. Make it an option to load singles if there are no albums.
@@ -365,7 +729,8 @@ class SpotifySession:
         # TODO: album_type parameter in the request above appears to actually mean the album group - test this
         # For some reason, sometimes two albums exist which are exactly the same, except for their uri.
 
-    @timeout_wait
+    @cached_response
+    @rate_limited
     def _album_tracks(self, album, offset=0):
         response = self.connection.album_tracks(album.uri, offset=offset, limit=50)
         # Album data is missing from the tracks, the album's URI is appended to link the track back to the album.
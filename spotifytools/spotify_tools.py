@@ -1,3 +1,5 @@
+import atexit
+import os
 import helpers
 import webbrowser
 from dotenv import load_dotenv
@@ -6,14 +8,29 @@ from typing import Dict, List
 import spotifytools.spotify as spotify
 from spotifytools.spotify_session import SpotifySession
 from spotifytools.genius_session import GeniusSession
+from spotifytools.cassette import CassetteTransport
 
 # The authorization scope for Spotify API needed to run this app
 SCOPE = "user-top-read user-read-currently-playing user-modify-playback-state playlist-read-private playlist-read-collaborative playlist-modify-private"
 
 load_dotenv()
-sp = SpotifySession()
+# Responses can be recorded to or replayed from a cassette for offline profiling.
+cassette_path = os.environ.get('SPOTIFYTOOLS_CASSETTE')
+cassette_mode = os.environ.get('SPOTIFYTOOLS_CASSETTE_MODE', 'replay')
+transport = None
+if cassette_path:
+    transport = CassetteTransport(cassette_path, mode=cassette_mode,
+                                  latency=float(os.environ.get('SPOTIFYTOOLS_CASSETTE_LATENCY', 0)))
+    if cassette_mode == 'record':
+        atexit.register(transport.save)
+replaying = cassette_path and cassette_mode == 'replay'
+# Lists of tracks only show their names, so tracks are parsed once they're opened.
+sp = SpotifySession(transport=transport, access_token='replay' if replaying else None, lazy=True)
+if replaying:
+    sp.authorized = True  # Requests of the authorized user are replayed as well.
+else:
+    sp.authorize()
 genius_session = GeniusSession()
-sp.authorize()
 
 # TODO: Replace global variables with a navigation class
 navigation_stack = []
@@ -37,10 +54,10 @@ def update_navigation_stack(item):
             else:
                 arrow = True
             if isinstance(item, List):
-                print(f"{type(item[0]).__name__ + 's'}", end="")
+                print(f"{item[0].resource_type.__name__ + 's'}", end="")
             if isinstance(item, spotify.Object):
                 print(f"{item.name}", end="")
-            if isinstance(item, spotify.Track):
+            if isinstance(item, spotify.Object) and item.resource_type is spotify.Track:
                 print(f" ({[a.name for a in item.artists]})", end="")
         print()
 
@@ -139,14 +156,15 @@ def take_input(loaded_lists: Dict = None, unloaded_lists: Dict = None):
     actions = {}
 
     item = navigation_stack[-1] if navigation_stack else None
-    for item_type in TYPE_ACTIONS:
-        if isinstance(item, item_type):
-            actions.update(TYPE_ACTIONS[item_type])
+    current_type = item_type(item)
+    for actions_type in TYPE_ACTIONS:
+        if issubclass(current_type, actions_type):
+            actions.update(TYPE_ACTIONS[actions_type])
 
     # TODO: Actually check for authorization
-    for item_type in AUTHORIZED_ACTIONS:
-        if isinstance(item, item_type):
-            actions.update(AUTHORIZED_ACTIONS[item_type])
+    for actions_type in AUTHORIZED_ACTIONS:
+        if issubclass(current_type, actions_type):
+            actions.update(AUTHORIZED_ACTIONS[actions_type])
 
 
     # Display the available choices
@@ -190,6 +208,11 @@ def take_input(loaded_lists: Dict = None, unloaded_lists: Dict = None):
     print("Invalid input.")
 
 
+def item_type(item):
+    """Return the type deciding the actions and help of an item, which for a stand-in is the type of its resource."""
+    return item.resource_type if isinstance(item, spotify.Object) else type(item)
+
+
 def letterize_menu(*menus: Dict):
     options = set()
     for menu in menus:
@@ -251,11 +274,12 @@ def print_help():
     print(f"Spotify Tools Help:")
 
     # Check the exact type of the latest item and print the description
+    current_type = item_type(item)
     if item:
-        item_class_name = type(item).__name__
+        item_class_name = current_type.__name__
         print(f"{item_class_name} {'.' * (25 - len(item_class_name))} ", end="")
     for help_type in HELP_TEXT:
-        if type(item) == help_type:
+        if current_type == help_type:
             help_text = HELP_TEXT[help_type]
             break
 
@@ -271,11 +295,11 @@ def print_help():
     # TODO: Actually check for authorization
     available_actions = []
     for actions_type in TYPE_ACTIONS:
-        if isinstance(item, actions_type):
+        if issubclass(current_type, actions_type):
             available_actions.extend(TYPE_ACTIONS[actions_type])
 
     for actions_type in AUTHORIZED_ACTIONS:
-        if isinstance(item, actions_type):
+        if issubclass(current_type, actions_type):
             available_actions.extend(AUTHORIZED_ACTIONS[actions_type])
 
     print("Available commands:")
@@ -324,8 +348,12 @@ def print_list_choices(loaded: Dict, unloaded: Dict):
 def load_object():
     """Force the object to download all available data about itself and its children."""
     item: spotify.Object = navigation_stack[-1]
-    item.load()
+    # Take the options following the command.
+    options = []
+    while command_queue and command_queue[0].startswith('-'):
+        options.append(command_queue.pop(0))
     print("Loading object data...")
+    item.load(recursive='-tracks' in options)
     navigate(navigation_stack.pop(), silent=True)
 
 
@@ -532,7 +560,16 @@ HELP_TEXT = {
     "tracks": [
         "Display the final list of all tracks within a collection after gathering them from collection resources and "
     ],
+    "artist": ["Navigate to the first artist of the track."],
+    "xalbum": ["Navigate to the album of the track."],
+    "filter": ["Not implemented yet."],
+    "save": ["Not implemented yet."],
+    "follow": ["Not implemented yet. Requires an authorized user."],
+    "play": ["Not implemented yet. Requires an authorized user."],
+    "queue": ["Not implemented yet. Requires an authorized user."],
 }
+# Commands are matched by their first letter, so some are prefixed to stay unique.
+HELP_TEXT["zlyrics"] = HELP_TEXT["lyrics"]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,289 @@
+import random
+
+"""
+Seeded generator of synthetic Spotify API payloads.
+
+Produces tracks, albums, artists, playlists, users and audio features shaped like the responses of Spotify API,
+including the data which spotifytools discards, so parsing and loading can be measured on realistic payloads of any
+size without a network connection or a Spotify account. The same seed always produces the same library.
+
+Every object is derived from its number alone: tracks are grouped into albums, albums into artists, and playlists
+pick tracks from the whole catalog.
+"""
+
+# Market codes included in 'available_markets' lists, which make up a large part of real responses.
+MARKETS = ['AD', 'AE', 'AG', 'AL', 'AM', 'AO', 'AR', 'AT', 'AU', 'AZ', 'BA', 'BB', 'BD', 'BE', 'BF', 'BG', 'BH', 'BI',
+           'BJ', 'BN', 'BO', 'BR', 'BS', 'BT', 'BW', 'BY', 'BZ', 'CA', 'CD', 'CG', 'CH', 'CI', 'CL', 'CM', 'CO', 'CR',
+           'CV', 'CW', 'CY', 'CZ', 'DE', 'DJ', 'DK', 'DM', 'DO', 'DZ', 'EC', 'EE', 'EG', 'ES', 'ET', 'FI', 'FJ', 'FM',
+           'FR', 'GA', 'GB', 'GD', 'GE', 'GH', 'GM', 'GN', 'GQ', 'GR', 'GT', 'GW', 'GY', 'HK', 'HN', 'HR', 'HT', 'HU',
+           'ID', 'IE', 'IL', 'IN', 'IQ', 'IS', 'IT', 'JM', 'JO', 'JP', 'KE', 'KG', 'KH', 'KI', 'KM', 'KN', 'KR', 'KW']
+
+# Suffixes added to some track names, the way Spotify marks remasters, live versions and features.
+TITLE_SUFFIXES = [' - Remastered 2011', ' - Live', ' (feat. Lamo Ri)', ' - Radio Edit', ' [Demo Version]', ' (Remix)']
+
+SYLLABLES = ['la', 'mo', 'ri', 'ka', 'ze', 'no', 'ta', 'vi', 'so', 'pe', 'lu', 'da', 'xo', 'fe', 'gi', 'ba']
+
+BASE62 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+API_URL = 'https://api.spotify.com/v1'
+
+
+class SyntheticLibrary:
+
+    def __init__(self, seed=0, tracks=1000000, tracks_per_album=12, albums_per_artist=6, users=100,
+                 playlists_per_user=20, playlist_tracks=(20, 200)):
+        """
+        Playlists per user and tracks per playlist are either a fixed number or a range of numbers to choose from.
+        """
+        self.seed = seed
+        self.tracks = tracks
+        self.tracks_per_album = tracks_per_album
+        self.albums_per_artist = albums_per_artist
+        self.albums = -(-tracks // tracks_per_album)
+        self.artists = -(-self.albums // albums_per_artist)
+        self.users = users
+        self.playlists_per_user = playlists_per_user
+        self.playlist_tracks = playlist_tracks
+
+    # Identifiers
+    @staticmethod
+    def id(n):
+        """Return a 22 character base62 id for a number, like the ones used by Spotify."""
+        digits = []
+        while n:
+            n, digit = divmod(n, 62)
+            digits.append(BASE62[digit])
+        return ''.join(reversed(digits)).rjust(22, '0')
+
+    @staticmethod
+    def number(spotify_id):
+        """Return the number from which an id was generated."""
+        n = 0
+        for char in spotify_id.lstrip('0'):
+            n = n * 62 + BASE62.index(char)
+        return n
+
+    def uri(self, kind, n):
+        return f"spotify:{kind}:{self.id(n)}"
+
+    def _random(self, kind, n):
+        # Seeding with a string is deterministic between processes, unlike hashing.
+        return random.Random(f"{self.seed}:{kind}:{n}")
+
+    @staticmethod
+    def _name(rng, words):
+        return ' '.join(''.join(rng.choice(SYLLABLES) for i in range(rng.randint(2, 4))).capitalize()
+                        for i in range(words))
+
+    def _urls(self, kind, n):
+        return {'external_urls': {'spotify': f"https://open.spotify.com/{kind}/{self.id(n)}"},
+                'href': f"{API_URL}/{kind}s/{self.id(n)}", 'id': self.id(n), 'type': kind, 'uri': self.uri(kind, n)}
+
+    def _images(self, n):
+        return [{'height': size, 'width': size, 'url': f"https://i.scdn.co/image/{size}{self.id(n)}"}
+                for size in (640, 300, 64)]
+
+    @staticmethod
+    def page(items, href, total, offset, limit):
+        """Wrap items in a paging object."""
+        following = offset + limit < total
+        return {
+            'href': f"{href}?offset={offset}&limit={limit}",
+            'items': items,
+            'limit': limit,
+            'next': f"{href}?offset={offset + limit}&limit={limit}" if following else None,
+            'offset': offset,
+            'previous': f"{href}?offset={max(offset - limit, 0)}&limit={limit}" if offset else None,
+            'total': total,
+        }
+
+    # Artists
+    def artist(self, n, simplified=False):
+        rng = self._random('artist', n)
+        data = {'name': self._name(rng, rng.randint(1, 2)), **self._urls('artist', n)}
+        if not simplified:
+            data.update({
+                'followers': {'href': None, 'total': rng.randint(0, 10000000)},
+                'genres': [self._name(rng, 1).lower() for i in range(rng.randint(0, 3))],
+                'images': self._images(n),
+                'popularity': rng.randint(0, 100),
+            })
+        return data
+
+    def artist_albums(self, n, offset=0, limit=20):
+        first = n * self.albums_per_artist
+        albums = range(first, min(first + self.albums_per_artist, self.albums))
+        items = [self.album(album, simplified=True) for album in albums[offset:offset + limit]]
+        return self.page(items, f"{API_URL}/artists/{self.id(n)}/albums", len(albums), offset, limit)
+
+    # Albums
+    def album_artists(self, n):
+        return [n // self.albums_per_artist]
+
+    def album_size(self, n):
+        return min(self.tracks_per_album, self.tracks - n * self.tracks_per_album)
+
+    def album(self, n, simplified=False):
+        rng = self._random('album', n)
+        year = rng.randint(1960, 2023)
+        data = {
+            'album_type': rng.choice(['album', 'album', 'single', 'compilation']),
+            'artists': [self.artist(artist, simplified=True) for artist in self.album_artists(n)],
+            'available_markets': MARKETS,
+            'images': self._images(n),
+            'name': self._name(rng, rng.randint(1, 4)),
+            'release_date': f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'release_date_precision': 'day',
+            'total_tracks': self.album_size(n),
+            **self._urls('album', n),
+        }
+        if not simplified:
+            data.update({
+                'copyrights': [{'text': f"(C) {year} {data['artists'][0]['name']}", 'type': 'C'}],
+                'external_ids': {'upc': f"{n:012d}"},
+                'genres': [],
+                'label': self._name(rng, 2) + ' Records',
+                'popularity': rng.randint(0, 100),
+                'tracks': self.album_tracks(n, 0, 50),
+            })
+        return data
+
+    def album_tracks(self, n, offset=0, limit=20):
+        first = n * self.tracks_per_album
+        tracks = range(first, first + self.album_size(n))
+        items = [self.track(track, simplified=True) for track in tracks[offset:offset + limit]]
+        return self.page(items, f"{API_URL}/albums/{self.id(n)}/tracks", len(tracks), offset, limit)
+
+    # Tracks
+    def track_album(self, n):
+        return n // self.tracks_per_album
+
+    def track_artists(self, n):
+        artists = self.album_artists(self.track_album(n))
+        rng = self._random('track', n)
+        if rng.random() < 0.2:
+            artists = artists + [rng.randrange(self.artists)]  # Featured artist.
+        return artists
+
+    def track(self, n, simplified=False):
+        """Return a track, without its album and popularity if simplified, as in album tracks."""
+        rng = self._random('track', n)
+        data = {
+            'artists': [self.artist(artist, simplified=True) for artist in self.track_artists(n)],
+            'available_markets': MARKETS,
+            'disc_number': 1,
+            'duration_ms': rng.randint(90000, 420000),
+            'explicit': rng.random() < 0.1,
+            'is_local': False,
+            'name': self._name(rng, rng.randint(1, 5)) + (rng.choice(TITLE_SUFFIXES) if rng.random() < 0.15 else ''),
+            'preview_url': f"https://p.scdn.co/mp3-preview/{self.id(n)}",
+            'track_number': n % self.tracks_per_album + 1,
+            **self._urls('track', n),
+        }
+        if not simplified:
+            data.update({
+                'album': self.album(self.track_album(n), simplified=True),
+                'external_ids': {'isrc': f"XX{n:010d}"},
+                'popularity': rng.randint(0, 100),
+            })
+        return data
+
+    def features(self, n):
+        rng = self._random('features', n)
+        return {
+            'acousticness': rng.random(),
+            'analysis_url': f"{API_URL}/audio-analysis/{self.id(n)}",
+            'danceability': rng.random(),
+            'duration_ms': rng.randint(90000, 420000),
+            'energy': rng.random(),
+            'id': self.id(n),
+            'instrumentalness': rng.random(),
+            'key': rng.randint(0, 11),
+            'liveness': rng.random(),
+            'loudness': rng.uniform(-30, 0),
+            'mode': rng.randint(0, 1),
+            'speechiness': rng.random(),
+            'tempo': rng.uniform(60, 200),
+            'time_signature': rng.choice([3, 4, 4, 4, 5]),
+            'track_href': f"{API_URL}/tracks/{self.id(n)}",
+            'type': 'audio_features',
+            'uri': self.uri('track', n),
+            'valence': rng.random(),
+        }
+
+    # Users and playlists
+    def user(self, n):
+        rng = self._random('user', n)
+        return {
+            'display_name': self._name(rng, 2),
+            'external_urls': {'spotify': f"https://open.spotify.com/user/{self.id(n)}"},
+            'followers': {'href': None, 'total': rng.randint(0, 1000)},
+            'href': f"{API_URL}/users/{self.id(n)}",
+            'id': self.id(n),
+            'images': [],
+            'type': 'user',
+            'uri': self.uri('user', n),
+        }
+
+    @staticmethod
+    def _count(setting, rng):
+        return rng.randint(*setting) if isinstance(setting, tuple) else setting
+
+    @property
+    def max_playlists(self):
+        # Playlists are numbered consecutively, leaving room for the largest possible number of playlists per user.
+        return self.playlists_per_user[1] if isinstance(self.playlists_per_user, tuple) else self.playlists_per_user
+
+    def user_size(self, n):
+        return self._count(self.playlists_per_user, self._random('user', n))
+
+    def user_playlists(self, n, offset=0, limit=20):
+        first = n * self.max_playlists
+        playlists = range(first, first + self.user_size(n))
+        items = [self.playlist(playlist, simplified=True) for playlist in playlists[offset:offset + limit]]
+        return self.page(items, f"{API_URL}/users/{self.id(n)}/playlists", len(playlists), offset, limit)
+
+    def playlist_owner(self, n):
+        return n // self.max_playlists
+
+    def playlist_size(self, n):
+        return self._count(self.playlist_tracks, self._random('playlist', n))
+
+    def playlist_track(self, n, position):
+        """Return the number of the track at a position in a playlist."""
+        rng = self._random('playlist', n)
+        step, start = rng.randrange(1, self.tracks), rng.randrange(self.tracks)
+        return (start + position * step) % self.tracks
+
+    def playlist(self, n, simplified=False):
+        rng = self._random('playlist', n)
+        owner = self.user(self.playlist_owner(n))
+        size = self.playlist_size(n)
+        data = {
+            'collaborative': False,
+            'description': self._name(rng, rng.randint(0, 8)),
+            'images': self._images(n),
+            'name': self._name(rng, rng.randint(1, 3)),
+            'owner': {key: owner[key] for key in ['display_name', 'external_urls', 'href', 'id', 'type', 'uri']},
+            'public': True,
+            'snapshot_id': self.id(rng.getrandbits(64)),
+            **self._urls('playlist', n),
+        }
+        if simplified:
+            data['tracks'] = {'href': f"{API_URL}/playlists/{self.id(n)}/tracks", 'total': size}
+        else:
+            data['followers'] = {'href': None, 'total': rng.randint(0, 100000)}
+            data['tracks'] = self.playlist_items(n, 0, 100)
+        return data
+
+    def playlist_items(self, n, offset=0, limit=100):
+        size = self.playlist_size(n)
+        items = [{
+            'added_at': '2023-01-01T00:00:00Z',
+            'added_by': {'id': self.id(self.playlist_owner(n)), 'type': 'user'},
+            'is_local': False,
+            'primary_color': None,
+            'track': self.track(self.playlist_track(n, position)),
+            'video_thumbnail': {'url': None},
+        } for position in range(offset, min(offset + limit, size))]
+        return self.page(items, f"{API_URL}/playlists/{self.id(n)}/tracks", size, offset, limit)
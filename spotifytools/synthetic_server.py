@@ -0,0 +1,267 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from spotifytools.synthetic import SyntheticLibrary
+
+"""
+Local stand-in for Spotify API serving a synthetic library.
+
+Implements the endpoints used by SpotifySession with data generated by SyntheticLibrary, with pagination, limits on
+batch sizes, 'fields' filters, artificial latency and 429 responses when requests come in faster than the configured
+rate. Libraries of any size can be loaded this way, e.g. users with hundreds of playlists of thousands of tracks.
+
+A session is pointed at the server with its API URL and given a static token, since the server doesn't check it:
+
+    with SyntheticServer(SyntheticLibrary(playlists_per_user=500, playlist_tracks=10000)) as server:
+        sp = SpotifySession(api_url=server.url, access_token='synthetic')
+
+The server can also be started on its own with `python -m spotifytools.synthetic_server`.
+"""
+
+# Maximum number of ids accepted by batch endpoints.
+BATCH_LIMITS = {'tracks': 50, 'albums': 20, 'artists': 50, 'audio-features': 100}
+
+
+def parse_fields(fields):
+    """Parse a 'fields' filter, like 'items(track(name,uri)),total', into a tree of dictionaries."""
+    tree, stack, name = {}, [], ''
+    for char in fields + ',':
+        if char in ',()':
+            if name:
+                tree[name.strip()] = None
+            if char == '(':
+                stack.append(tree)
+                tree[name.strip()] = tree = {}
+            elif char == ')':
+                tree = stack.pop()
+            name = ''
+        else:
+            name += char
+    return tree
+
+
+def apply_fields(data, tree):
+    """Return data limited to the fields in the tree. Fields of lists apply to each item."""
+    if tree is None:
+        return data
+    if isinstance(data, list):
+        return [apply_fields(item, tree) for item in data]
+    if isinstance(data, dict):
+        return {key: apply_fields(data[key], tree[key]) for key in tree if key in data}
+    return data
+
+
+class SyntheticAPIError(Exception):
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class SyntheticServer:
+
+    def __init__(self, library: SyntheticLibrary = None, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                 rate_limit=None, retry_after=1, seed=0):
+        """
+        Latency in seconds is added to every response, plus a random jitter of up to the given number of seconds.
+        Requests over the rate limit in requests per second are answered with 429 and a 'Retry-After' header.
+        """
+        self.library = library or SyntheticLibrary()
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.throttled = 0
+        self.window = (0, 0)  # Second of the current rate limit window and the number of requests made in it.
+        self.lock = threading.Lock()
+        self.routes = [
+            (r'playlists/(\w+)/tracks', lambda n, q: self.library.playlist_items(n, *self._page(q, 100))),
+            (r'playlists/(\w+)', lambda n, q: self.library.playlist(n)),
+            (r'albums/(\w+)/tracks', lambda n, q: self.library.album_tracks(n, *self._page(q, 20))),
+            (r'albums/(\w+)', lambda n, q: self.library.album(n)),
+            (r'artists/(\w+)/albums', lambda n, q: self.library.artist_albums(n, *self._page(q, 20))),
+            (r'artists/(\w+)', lambda n, q: self.library.artist(n)),
+            (r'tracks/(\w+)', lambda n, q: self.library.track(n)),
+            (r'users/(\w+)/playlists', lambda n, q: self.library.user_playlists(n, *self._page(q, 20))),
+            (r'users/(\w+)', lambda n, q: self.library.user(n)),
+            (r'me', lambda q: self.library.user(0)),
+            (r'search', self._search),
+            (r'(tracks|albums|artists|audio-features)', self._batch),
+        ]
+        self.http = ThreadingHTTPServer((host, port), self._handler())
+        self.http.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        """API URL to use as the prefix of a spotipy client."""
+        host, port = self.http.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.http.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.http.shutdown()
+        self.http.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def respond(self, path, query):
+        """Return the response to a request as a dictionary, or raise SyntheticAPIError."""
+        with self.lock:
+            self.requests += 1
+            self._throttle()
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        path = path.strip('/')
+        if not path.startswith('v1/'):
+            raise SyntheticAPIError(404, "Service not found")
+        path = path[3:]
+        for pattern, handler in self.routes:
+            if match := re.fullmatch(pattern, path):
+                args = match.groups()
+                if args and pattern[0] != '(':
+                    # Routes with an id get the number of the object.
+                    args = (self._number(args[0], path),)
+                response = handler(*args, query)
+                if 'fields' in query:
+                    response = apply_fields(response, parse_fields(query['fields'][0]))
+                return response
+        raise SyntheticAPIError(404, "Service not found")
+
+    def _throttle(self):
+        # Must be called with the lock held.
+        if self.rate_limit is None:
+            return
+        second = int(time.monotonic())
+        start, count = self.window
+        count = count + 1 if start == second else 1
+        self.window = (second, count)
+        if count > self.rate_limit:
+            self.throttled += 1
+            raise SyntheticAPIError(429, "API rate limit exceeded", {'Retry-After': str(self.retry_after)})
+
+    def _number(self, spotify_id, path):
+        """Return the number of the object with the id, checking that it exists in the library."""
+        try:
+            n = self.library.number(spotify_id)
+        except ValueError:
+            raise SyntheticAPIError(400, "Invalid base62 id")
+        kind = path.split('/')[0]
+        limits = {
+            'tracks': self.library.tracks,
+            'albums': self.library.albums,
+            'artists': self.library.artists,
+            'users': self.library.users,
+            'playlists': self.library.users * self.library.max_playlists,
+        }
+        if n >= limits[kind] or (kind == 'playlists' and n % self.library.max_playlists >=
+                                 self.library.user_size(self.library.playlist_owner(n))):
+            raise SyntheticAPIError(404, "Non existing id")
+        return n
+
+    @staticmethod
+    def _page(query, default_limit):
+        return int(query.get('offset', [0])[0]), int(query.get('limit', [default_limit])[0])
+
+    def _batch(self, kind, query):
+        ids = query['ids'][0].split(',') if 'ids' in query else []
+        if len(ids) > BATCH_LIMITS[kind]:
+            raise SyntheticAPIError(400, "Too many ids requested")
+        objects = []
+        for spotify_id in ids:
+            try:
+                n = self._number(spotify_id, 'tracks' if kind == 'audio-features' else kind)
+            except SyntheticAPIError:
+                objects.append(None)  # Spotify returns null for ids which don't exist.
+                continue
+            generate = {'tracks': self.library.track, 'albums': self.library.album, 'artists': self.library.artist,
+                        'audio-features': self.library.features}[kind]
+            objects.append(generate(n))
+        return {kind.replace('-', '_'): objects}
+
+    def _search(self, query):
+        """Return results picked from the library by the query, the same for the same query."""
+        q = query.get('q', [''])[0]
+        offset, limit = self._page(query, 10)
+        rng = random.Random(f"{self.library.seed}:search:{q}")
+        results = {}
+        for kind in query.get('type', ['track'])[0].split(','):
+            total, generate = {
+                'track': (self.library.tracks, lambda n: self.library.track(n)),
+                'album': (self.library.albums, lambda n: self.library.album(n, simplified=True)),
+                'artist': (self.library.artists, lambda n: self.library.artist(n)),
+                'playlist': (self.library.users, lambda n: self.library.playlist(n * self.library.max_playlists,
+                                                                                 simplified=True)),
+            }[kind]
+            numbers = [rng.randrange(total) for i in range(min(offset + limit, 1000))][offset:]
+            results[kind + 's'] = self.library.page([generate(n) for n in numbers],
+                                                    f"{self.url}search", 1000, offset, limit)
+        return results
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                try:
+                    status, headers, body = 200, {}, server.respond(parts.path, parse_qs(parts.query))
+                except SyntheticAPIError as error:
+                    status, headers = error.status, error.headers
+                    body = {'error': {'status': error.status, 'message': error.message}}
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(content)))
+                for header, value in headers.items():
+                    self.send_header(header, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic library through a local stand-in for Spotify API.")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tracks', type=int, default=1000000, help="Number of tracks in the catalog.")
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--playlists', type=int, default=20, help="Number of playlists of each user.")
+    parser.add_argument('--playlist-tracks', type=int, default=100, help="Number of tracks in each playlist.")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument('--rate-limit', type=int, default=None, help="Requests per second before 429 responses.")
+    args = parser.parse_args()
+    library = SyntheticLibrary(seed=args.seed, tracks=args.tracks, users=args.users,
+                               playlists_per_user=args.playlists, playlist_tracks=args.playlist_tracks)
+    server = SyntheticServer(library, port=args.port, latency=args.latency, rate_limit=args.rate_limit,
+                             seed=args.seed)
+    print(f"Serving synthetic Spotify API at {server.url}")
+    server.http.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import json
+
+import requests
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+"""
+HTTP transport used to send requests to Spotify.
+
+Spotify responses are decoded with orjson when it's installed, which is several times faster than the standard library
+on large pages like playlist items and album batches. The transport only replaces how spotipy's client decodes
+responses, everything else about requests and errors stays spotipy's own.
+
+The transport doesn't retry anything itself. Connection errors, server errors and 429 responses are all retried by the
+session's rate limiter, so each failed request is retried by exactly one layer and errors keep their real status.
+"""
+
+
+def loads(content):
+    """Decode JSON with the fastest parser available."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def decode_json(response, *args, **kwargs):
+    """Make response.json decode the body with the fastest parser available. Works as a requests response hook."""
+    # Both parsers raise a ValueError on invalid content, which spotipy turns into an empty result like for requests.
+    response.json = lambda **json_kwargs: loads(response.content)
+    return response
+
+
+class Transport(requests.Session):
+    """Session passed to spotipy's client as its requests_session."""
+
+    def __init__(self):
+        super().__init__()
+        self.hooks['response'].append(decode_json)
@@ -0,0 +1,121 @@
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+from unittest.mock import Mock
+from dotenv import load_dotenv
+
+from spotifytools import spotify
+from spotifytools.arrow_export import export_collection, read_export
+from spotifytools.exceptions import SpotifyToolsException
+from spotifytools.helpers import features_adapter
+from spotifytools.spotify_session import SpotifySession
+from spotifytools.synthetic import SyntheticLibrary
+
+
+class TestArrowExport:
+
+    @pytest.fixture
+    def library(self):
+        yield SyntheticLibrary(seed=1, tracks=50)
+
+    @pytest.fixture
+    def user(self, library):
+        load_dotenv()
+        sp = SpotifySession()
+        sp.connection = Mock()
+        tracks = sp.factory.get_resources([library.track(n) for n in range(50)])
+        for n, track in enumerate(tracks[:40]):
+            track.parse_features(features_adapter(library.features(n)))
+        # Spotify has no features for the other tracks.
+        sp.connection.audio_features = Mock(side_effect=lambda uris: [None] * len(uris))
+        playlists = sp.factory.get_resources([library.playlist(n, simplified=True) for n in range(2)])
+        # The playlists share ten tracks.
+        for playlist, (start, end) in zip(playlists, [(0, 30), (20, 50)]):
+            playlist.children = tracks[start:end]
+            playlist.children_loaded = True
+        user = spotify.User(sp, {'uri': 'spotify:user:library', 'name': 'Library', 'type': 'user'},
+                            children=playlists)
+        user.children_loaded = True
+        yield user
+
+    @pytest.mark.parametrize('file_name', ['tracks.parquet', 'tracks.arrow'])
+    def test_round_trip(self, user, tmp_path, file_name):
+        """Assert each track is written once for each playlist it's in, with its keys, details and features."""
+        # Setup
+        path = tmp_path / file_name
+        playlist = user.children[1]
+        track = playlist.children[0]
+        # Call
+        rows = export_collection(user, path, row_group_size=16)
+        table = read_export(path)
+        # Assertions
+        assert rows == table.num_rows == 60
+        row = table.filter(pc.field('playlist') == playlist.uri).to_pylist()[0]
+        assert row['uri'] == track.uri and row['position'] == 0
+        assert row['album'] == track.album.uri and row['artists'] == [artist.uri for artist in track.artists]
+        assert row['duration'] == track.duration and row['popularity'] == track.popularity
+        assert row['energy'] == pytest.approx(track.energy) and row['key'] == track.key
+        assert table.filter(pc.field('uri') == track.uri).num_rows == 2
+        assert table.filter(pc.field('energy').is_null()).num_rows == 10
+        assert all(track.features is False for track in user.children[1].children[20:])
+
+    def test_read_filtered(self, user, tmp_path):
+        # Setup
+        path = tmp_path / 'tracks.parquet'
+        export_collection(user.children[0], path)
+        # Call
+        table = read_export(path, columns=['uri', 'energy'], filters=pc.field('energy') > 0.5)
+        # Assertions
+        assert table.column_names == ['uri', 'energy']
+        assert table.num_rows == len([track for track in user.children[0] if track.features and track.energy > 0.5])
+
+    def test_album(self, user, tmp_path):
+        # Setup
+        path = tmp_path / 'album.arrow'
+        album = user.children[0].children[0].album
+        album.children = [track for track in user.children[0] if track.album is album]
+        album.children_loaded = True
+        # Call
+        rows = export_collection(album, path)
+        # Assertions
+        table = read_export(path)
+        assert rows == len(album.children) and table.column('playlist').null_count == rows
+
+    def test_invalid(self, user, tmp_path):
+        # Setup
+        path = tmp_path / 'tracks.csv'
+        path.write_text('uri\n')
+        # Call / Assertions
+        with pytest.raises(SpotifyToolsException):
+            export_collection(user, path, file_format='csv')
+        with pytest.raises(SpotifyToolsException):
+            read_export(path)
+
+    def test_stream(self, tmp_path):
+        """Assert tracks of a playlist which isn't loaded are written as its pages arrive, without keeping them."""
+        # Setup
+        load_dotenv()
+        sp = SpotifySession()
+        sp.connection = Mock()
+        library = SyntheticLibrary(seed=1, tracks=300, playlist_tracks=250)
+        playlist = sp.factory.get_resource(library.playlist(0, simplified=True))
+        sp.connection.playlist_items = Mock(side_effect=lambda uri, fields, offset, limit:
+                                            library.playlist_items(0, offset, limit))
+        sp.connection.audio_features = Mock(side_effect=lambda uris: [
+            library.features(library.number(uri.split(':')[-1])) for uri in uris])
+        path = tmp_path / 'playlist.parquet'
+        # Call
+        rows = export_collection(playlist, path, row_group_size=100)
+        # Assertions
+        assert rows == library.playlist_size(0) and sp.connection.playlist_items.call_count == -(-rows // 100)
+        assert not playlist.children and not playlist.children_loaded
+        assert pq.ParquetFile(path).num_row_groups == -(-rows // 100)
+        table = read_export(path)
+        assert table.column('position').to_pylist() == list(range(rows))
+        assert table.column('uri').to_pylist() == [item['track']['uri'] for item in
+                                                   library.playlist_items(0, 0, rows)['items']]
+        # Features are loaded for each row group before it's written.
+        assert sp.connection.audio_features.call_count == -(-rows // 100)
+        first = library.features(library.number(table.column('uri')[0].as_py().split(':')[-1]))
+        assert table.column('energy').null_count == 0 and table.column('key').null_count == 0
+        assert table.column('energy')[0].as_py() == pytest.approx(first['energy'])
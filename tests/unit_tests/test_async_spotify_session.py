@@ -0,0 +1,118 @@
+import asyncio
+import pytest
+from unittest.mock import Mock, call
+from dotenv import load_dotenv
+
+from spotifytools import spotify
+from spotifytools.response_cache import ResponseCache
+from spotifytools.spotify_session import SpotifySession
+from spotifytools.async_spotify_session import AsyncSpotifySession
+
+
+class TestAsyncSpotifySession:
+    """Tests the AsyncSpotifySession class offline, with the connection of the wrapped session mocked."""
+
+    @pytest.fixture
+    def asp(self):
+        load_dotenv()
+        sp = SpotifySession()
+        sp.connection = Mock()
+        sp.authorized = True
+        yield AsyncSpotifySession(sp, concurrency=2)
+
+    def test_shared_factory(self, asp):
+        """Assert the async session creates resources through the factory of the wrapped session."""
+        assert asp.factory is asp.session.factory
+
+    def test_fetch_item(self, asp):
+        # Setup
+        raw_item = Mock()
+        parsed_item = Mock()
+        asp.session.connection._get = Mock(return_value=raw_item)
+        asp.factory.get_resource = Mock(return_value=parsed_item)
+        # Call and Assertions
+        assert asyncio.run(asp.fetch_item('spotify:track:1')) == parsed_item
+        asp.session.connection._get.assert_called_once_with('tracks/1')
+        asp.factory.get_resource.assert_called_once_with(raw_item)
+
+    def test_fetch_item_cached(self, asp):
+        mock_resource = Mock()
+        asp.factory.cache = {'spotify:track:1': mock_resource}
+        assert asyncio.run(asp.fetch_item('spotify:track:1')) == mock_resource
+        assert not asp.session.connection._get.mock_calls
+
+    def test_fetch_item_reload(self, asp, tmp_path):
+        """Assert reloading an item bypasses the response cache like the synchronous session."""
+        # Setup
+        asp.session.response_cache = ResponseCache(tmp_path / 'cache.sqlite')
+        asp.session.connection._get = Mock(return_value={'uri': 'spotify:artist:1', 'type': 'artist', 'name': 'A'})
+        asyncio.run(asp.fetch_item('spotify:artist:1', raw=True))
+        # Call
+        asyncio.run(asp.fetch_item('spotify:artist:1', raw=True))
+        asyncio.run(asp.fetch_item('spotify:artist:1', reload=True))
+        # Assertions
+        assert asp.session.connection._get.call_count == 2
+
+    def test_search(self, asp):
+        parsed_resource = Mock()
+        asp.session.connection.search = Mock(return_value={'tracks': {'items': [Mock()]}})
+        asp.factory.get_resource = Mock(return_value=parsed_resource)
+        result = asyncio.run(asp.search(query='test', search_type='track', limit=10))
+        assert call(q='test', limit=10, type='track') in asp.session.connection.search.mock_calls
+        assert result == {'track': [parsed_resource]}
+
+    def test_fetch_user_playlists(self, asp):
+        """Assert the remaining pages are requested by offset once the first page reports the total."""
+        # Setup
+        responses = {offset: {'total': 120, 'next': offset < 100, 'items': [offset]} for offset in [0, 50, 100]}
+        asp.session.connection.user_playlists = Mock(side_effect=lambda user_id, limit, offset: responses[offset])
+        asp.factory.get_resource = Mock(side_effect=lambda item: f"Playlist {item}")
+        # Call
+        result = asyncio.run(asp.fetch_user_playlists(Mock(id='1')))
+        # Assertions
+        assert result == ['Playlist 0', 'Playlist 50', 'Playlist 100']
+        assert asp.session.connection.user_playlists.call_count == 3
+
+    def test_load(self, asp):
+        """Assert each batch is requested and parsed once, with the same limits as the synchronous session."""
+        # Setup
+        sp = asp.session
+        mock_tracks = [spotify.Track(sp, {'uri': f'Mock Track {i}'}, None, None) for i in range(120)]
+        mock_album = spotify.Album(sp, {'uri': "Mock Album", 'name': "Mock Album"}, None)
+        sp._track_features = Mock(return_value=[])
+        sp._track_details = Mock(return_value=[])
+        sp._album_details = Mock(return_value=[])
+        sp._match_features = Mock()
+        sp._match_details = Mock()
+        # Call
+        asyncio.run(asp.load(mock_tracks + [mock_album], details=True, features=True))
+        # Assertions
+        assert sp._track_features.call_count == 2  # 120 tracks in batches of 100.
+        assert sp._track_details.call_count == 3  # 120 tracks in batches of 50.
+        assert sp._album_details.call_count == 1
+        assert sp._match_features.call_count == 2
+        assert sp._match_details.call_count == 4
+
+    def test__fetch_bulk_children(self, asp):
+        """Assert pages are requested from the known offset and passed to the parsing method in order."""
+        # Setup
+        mock_item = Mock()
+        mock_item.children = [Mock() for i in range(3)]
+        responses = {3: {'total': 13, 'next': True, 'items': ['a']},
+                     8: {'total': 13, 'next': False, 'items': ['b']}}
+        request_method = Mock(side_effect=lambda item, offset: responses[offset])
+        parsing_method = Mock()
+        # Call
+        asyncio.run(asp._fetch_bulk_children([mock_item], request_method, parsing_method, 5))
+        # Assertions
+        assert request_method.mock_calls == [call(mock_item, offset=3), call(mock_item, offset=8)]
+        parsing_method.assert_called_once_with(mock_item, ['a', 'b'])
+
+    def test__fetch_bulk_children_without_total(self, asp):
+        """Assert pages are followed one by one if the response doesn't report the total."""
+        mock_item = Mock(children=[])
+        request_method = Mock(side_effect=[{'next': True, 'items': ['a']}, {'next': False, 'items': ['b']}])
+        parsing_method = Mock()
+        asyncio.run(asp._fetch_bulk_children([mock_item], request_method, parsing_method, 5))
+        assert request_method.mock_calls == [call(mock_item, offset=0), call(mock_item, offset=5)]
+        parsing_method.assert_called_once_with(mock_item, ['a', 'b'])
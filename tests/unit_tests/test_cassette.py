@@ -0,0 +1,73 @@
+import json
+import pytest
+import requests
+from unittest.mock import Mock, patch
+from dotenv import load_dotenv
+
+from spotifytools import spotify
+from spotifytools.cassette import CassetteTransport, CassetteMissException, request_key
+from spotifytools.spotify_session import SpotifySession
+
+
+class TestCassetteTransport:
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        path = tmp_path / 'cassette.json'
+        interactions = [
+            {'request': request_key('GET', 'https://api.spotify.com/v1/artists/1'),
+             'response': {'status': 200, 'headers': {'Content-Type': 'application/json'},
+                          'body': json.dumps({'uri': 'spotify:artist:1', 'type': 'artist', 'name': 'Artist'})}},
+            {'request': request_key('GET', 'https://api.spotify.com/v1/tracks/1'),
+             'response': {'status': 503, 'headers': {}, 'body': ''}},
+            {'request': request_key('GET', 'https://api.spotify.com/v1/tracks/1'),
+             'response': {'status': 200, 'headers': {}, 'body': json.dumps({'uri': 'spotify:track:1'})}},
+        ]
+        path.write_text(json.dumps({'version': 1, 'interactions': interactions}))
+        yield path
+
+    @pytest.fixture
+    def sp(self, path):
+        load_dotenv()
+        yield SpotifySession(transport=CassetteTransport(path), access_token='replay')
+
+    def test_request_key(self):
+        assert request_key('GET', 'https://a.b/c?y=2&x=1') == request_key('GET', 'https://a.b/c?x=1&y=2')
+
+    def test_replay(self, sp):
+        """Assert a session loads resources from recorded responses without network access."""
+        with patch('requests.adapters.HTTPAdapter.send') as network:
+            artist = sp.fetch_item('spotify:artist:1')
+        assert isinstance(artist, spotify.Artist) and artist.name == 'Artist'
+        assert not network.mock_calls
+
+    def test_replay_order(self, sp):
+        """Assert repeated requests get the responses in the order they were recorded, including errors."""
+        with patch('spotifytools.rate_limiter.time.sleep'):
+            assert sp.fetch_item('spotify:track:1', raw=True) == {'uri': 'spotify:track:1'}
+        assert sp.stats()['item']['retries'] == 1
+
+    def test_replay_miss(self, sp):
+        with pytest.raises(CassetteMissException):
+            sp.fetch_item('spotify:album:1', raw=True)
+
+    def test_latency(self, path):
+        with patch('spotifytools.cassette.time.sleep') as sleep:
+            CassetteTransport(path, latency=0.2).get('https://api.spotify.com/v1/artists/1')
+        sleep.assert_called_once_with(0.2)
+
+    def test_record(self, path, tmp_path):
+        """Assert responses received in record mode are saved and can be replayed."""
+        # Setup
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"uri": "spotify:artist:2"}'
+        response.headers['Content-Type'] = 'application/json'
+        # Call
+        with patch('requests.adapters.HTTPAdapter.send', return_value=response):
+            with CassetteTransport(tmp_path / 'new.json', mode='record') as transport:
+                transport.get('https://api.spotify.com/v1/artists/2?market=PL')
+        # Assertions
+        replayed = CassetteTransport(tmp_path / 'new.json').get('https://api.spotify.com/v1/artists/2?market=PL')
+        assert replayed.json() == {'uri': 'spotify:artist:2'}
+        assert replayed.headers['Content-Type'] == 'application/json'
@@ -0,0 +1,103 @@
+import gc
+import math
+
+import pytest
+from unittest.mock import Mock
+from dotenv import load_dotenv
+
+from spotifytools import spotify
+from spotifytools.feature_table import FeatureTable
+from spotifytools.helpers import features_adapter
+from spotifytools.spotify_session import SpotifySession
+from spotifytools.synthetic import SyntheticLibrary
+
+
+class TestFeatureTable:
+
+    @pytest.fixture
+    def sp(self):
+        load_dotenv()
+        sp = SpotifySession()
+        sp.connection = Mock()
+        yield sp
+
+    @pytest.fixture
+    def tracks(self, sp):
+        library = SyntheticLibrary(seed=1, tracks=10)
+        tracks = [sp.factory.get_resource(library.track(n)) for n in range(10)]
+        for n, track in enumerate(tracks):
+            # The last track has no features available.
+            track.parse_features(features_adapter(library.features(n)) if n < 9 else False)
+        yield tracks
+
+    def test_update(self, tracks):
+        # Setup
+        table = FeatureTable(capacity=4)
+        # Call
+        ids = table.update(tracks)
+        again = table.update(tracks[::-1])
+        # Assertions
+        assert list(ids) == list(range(10))
+        assert list(again) == list(range(10))[::-1]
+        assert len(table) == 10 and tracks[3].uri in table
+        assert table.column('popularity', ids)[2] == tracks[2].popularity
+        assert math.isnan(table.column('energy', ids)[9])
+
+    def test_changed_details(self, tracks):
+        """Assert rows are rewritten when details of their tracks change and not otherwise."""
+        # Setup
+        table = FeatureTable()
+        ids = table.update(tracks)
+        table.values[ids[1], table.columns.index('popularity')] = -1
+        # Call
+        tracks[0].parse_details({'popularity': 99})
+        tracks[9].parse_features(None)
+        table.update(tracks)
+        # Assertions
+        assert table.column('popularity', ids)[0] == 99
+        assert table.column('popularity', ids)[1] == -1
+        assert table.column('popularity', ids)[9] == tracks[9].popularity
+
+    def test_release(self):
+        """Assert rows of tracks released by a bounded cache are dropped and reused."""
+        # Setup
+        load_dotenv()
+        sp = SpotifySession(max_resources=2)
+        sp.connection = Mock()
+        library = SyntheticLibrary(seed=1, tracks=10)
+        table = FeatureTable()
+        table.update([sp.factory.get_resource(library.track(n)) for n in range(10)])
+        # Call
+        gc.collect()
+        track = sp.factory.get_resource(library.track(0))
+        ids = table.update([track])
+        # Assertions
+        assert len(table) == 1 and library.track(1)['uri'] not in table
+        assert ids[0] < 10 and len(table.uri_ids) == 10
+        assert table.mean() == table.mean(ids)
+
+    def test_mean(self, tracks):
+        """Assert averages match the ones computed over track details, skipping tracks without features."""
+        # Setup
+        table = FeatureTable()
+        ids = table.update(tracks)
+        # Call
+        means = table.mean(ids[:5])
+        # Assertions
+        assert means['popularity'] == pytest.approx(sum(track.popularity for track in tracks[:5]) / 5)
+        assert table.mean(ids)['energy'] == pytest.approx(sum(track.energy for track in tracks[:9]) / 9)
+        assert 'energy' not in table.mean(ids[9:])
+
+    def test_get_features(self, sp, tracks):
+        # Setup
+        playlist = spotify.Playlist(sp, {'uri': 'spotify:playlist:test', 'name': "Test"}, Mock())
+        playlist.children = tracks
+        playlist.children_loaded = True
+        sp.load = Mock()
+        # Call
+        features = playlist.get_features()
+        # Assertions
+        assert features['valence'] == pytest.approx(sum(track.valence for track in tracks[:9]) / 9)
+        assert all(sp.feature_table.rows[track.uri_id] is not None for track in tracks)
+        assert features['explicit'] == pytest.approx(sum(track.explicit for track in tracks) / 10)
+        assert len(sp.feature_table) == 10
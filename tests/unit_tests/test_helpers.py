@@ -0,0 +1,32 @@
+import pytest
+
+from spotifytools.helpers import adapt_details, details_adapter
+from spotifytools.synthetic import SyntheticLibrary
+
+
+class TestAdaptDetails:
+
+    @pytest.fixture
+    def library(self):
+        yield SyntheticLibrary(seed=1, tracks=1000)
+
+    def test_adapt_details(self, library):
+        """Assert type adapters give the same results as the generic adapter."""
+        # Setup
+        payloads = [library.track(1), library.album(2), library.album(3, simplified=True), library.artist(4),
+                    library.playlist(0), library.playlist(1, simplified=True), library.user(5)]
+        # Call
+        adapted = [adapt_details(payload) for payload in payloads]
+        # Assertions
+        assert adapted == [details_adapter(payload) for payload in payloads]
+        assert 'album' not in adapted[0] and adapted[0]['album_data'] == payloads[0]['album']
+        assert adapted[0]['duration'] == payloads[0]['duration_ms']
+
+    def test_adapt_details_unknown_type(self):
+        # Setup
+        data = {'uri': 'spotify:show:a', 'type': 'show', 'images': [], 'owner': {'uri': 'spotify:user:b'}}
+        # Call
+        adapted = adapt_details(data)
+        # Assertions
+        assert adapted == {'uri': 'spotify:show:a', 'type': 'show', 'images': [],
+                           'owner_data': {'uri': 'spotify:user:b'}}
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+from unittest.mock import Mock
+from dotenv import load_dotenv
+
+from spotifytools.interner import Interner
+from spotifytools.spotify_session import SpotifySession
+from spotifytools.synthetic import SyntheticLibrary
+from spotifytools.transport import loads
+
+
+class TestInterner:
+
+    @pytest.fixture
+    def interner(self):
+        yield Interner()
+
+    def test_intern(self, interner):
+        """Assert equal strings and lists of strings in separately decoded data end up shared."""
+        # Setup
+        first = loads('{"name": "Artist", "markets": ["PL", "SE"], "images": [{"url": "x"}]}')
+        second = loads('{"name": "Artist", "markets": ["PL", "SE"], "images": [{"url": "x"}]}')
+        # Call
+        first, second = interner.intern(first), interner.intern(second)
+        # Assertions
+        assert first == second
+        assert first['name'] is second['name']
+        assert first['markets'] is second['markets']
+        assert first['images'][0]['url'] is second['images'][0]['url']
+        assert interner.intern([1, 'a']) == [1, 'a']
+
+    def test_max_size(self):
+        """Assert the interner starts over when it holds more strings than its maximum size."""
+        # Setup
+        interner = Interner(max_size=2)
+        kept = interner.intern(loads('"Artist A"'))
+        interner.intern(['Artist B', 'Artist C'])
+        # Call
+        interner.intern(loads('"Artist D"'))
+        # Assertions
+        assert len(interner) == 1 and interner.stats() == {'uris': 0, 'strings': 1, 'lists': 0}
+        assert interner.intern(loads('"Artist A"')) is not kept
+
+    def test_uri_id(self):
+        """Assert URIs get dense ids in the order they're seen, which stay when the tables are cleared."""
+        # Setup
+        interner = Interner(max_size=1)
+        # Call
+        ids = [interner.uri_id(uri) for uri in ['spotify:track:a', 'spotify:track:b', 'spotify:track:a']]
+        interner.intern(['x', 'y'])
+        interner.intern('z')
+        # Assertions
+        assert ids == [0, 1, 0] and interner.uri_id('spotify:track:b') == 1 and interner.uri(1) == 'spotify:track:b'
+
+    def test_shared_lists_immutable(self, interner):
+        """Assert shared lists of strings can't be changed through one of the resources holding them."""
+        first = interner.intern({'markets': ['PL', 'SE']})
+        second = interner.intern({'markets': ['PL', 'SE']})
+        assert first['markets'] == ('PL', 'SE') and first['markets'] is second['markets']
+        with pytest.raises(AttributeError):
+            first['markets'].append('US')
+
+    def test_factory(self):
+        # Setup
+        load_dotenv()
+        sp = SpotifySession(compact=True)
+        sp.connection = Mock()
+        library = SyntheticLibrary(seed=1, tracks=100)
+        # Call
+        tracks = sp.factory.get_resources([loads(json.dumps(library.track(n))) for n in range(24)])
+        # Assertions
+        assert tracks[0].available_markets is tracks[1].available_markets
+        assert [track.uri_id for track in tracks] == [sp.factory.interner.ids[track.uri] for track in tracks]
+        assert len({track.uri_id for track in tracks}) == 24
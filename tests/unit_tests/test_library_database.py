@@ -0,0 +1,139 @@
+import pytest
+from unittest.mock import Mock
+from dotenv import load_dotenv
+
+from spotifytools import spotify
+from spotifytools.helpers import features_adapter
+from spotifytools.library_database import LibraryDatabase
+from spotifytools.spotify_session import SpotifySession
+from spotifytools.synthetic import SyntheticLibrary
+
+
+class TestLibraryDatabase:
+
+    @pytest.fixture
+    def library(self):
+        yield SyntheticLibrary(seed=1, tracks=50)
+
+    @pytest.fixture
+    def database(self, tmp_path):
+        database = LibraryDatabase(tmp_path / 'library.sqlite')
+        yield database
+        database.close()
+
+    def new_session(self):
+        load_dotenv()
+        sp = SpotifySession()
+        sp.connection = Mock()
+        return sp
+
+    @pytest.fixture
+    def user(self, library):
+        sp = self.new_session()
+        tracks = sp.factory.get_resources([library.track(n) for n in range(50)])
+        for n, track in enumerate(tracks[:40]):
+            track.parse_features(features_adapter(library.features(n)))
+        tracks[45].parse_features(None)
+        playlists = sp.factory.get_resources([library.playlist(n, simplified=True) for n in range(2)])
+        for n, playlist in enumerate(playlists):
+            playlist.children = tracks[n * 25:(n + 1) * 25]
+            playlist.children_loaded = True
+        user = spotify.User(sp, {'uri': 'spotify:user:library', 'name': 'Library', 'type': 'user'},
+                            children=playlists)
+        user.children_loaded = True
+        yield user
+
+    def test_round_trip(self, database, user, library):
+        """Assert a user is restored with its playlists, their tracks, features and links between them."""
+        # Setup
+        sp = self.new_session()
+        original = user.children[0].children[0]
+        # Call
+        counts = database.save(user)
+        restored, = database.load(sp, [user.uri], children=True)
+        # Assertions
+        assert counts['tracks'] == 50 and counts['playlists'] == 2 and database.counts() == counts
+        assert restored.children_loaded and [playlist.uri for playlist in restored.children] == \
+            [playlist.uri for playlist in user.children]
+        playlist = restored.children[0]
+        assert playlist.children_loaded and [track.uri for track in playlist] == \
+            [track.uri for track in user.children[0]]
+        assert playlist.owner is sp.factory.cache[user.children[0].owner.uri]
+        track = playlist.children[0]
+        assert track.name == original.name and track.popularity == original.popularity
+        assert track.features is True and track.energy == original.energy
+        assert track.album is sp.factory.cache[original.album.uri] and track.album.artists
+        assert [artist.uri for artist in track.artists] == [artist.uri for artist in original.artists]
+        assert sp.factory.cache[library.track(45)['uri']].features is False
+        assert sp.factory.cache[library.track(46)['uri']].features is None
+
+    def test_load_without_children(self, database, user):
+        # Setup
+        sp = self.new_session()
+        database.save(user)
+        # Call
+        playlist, = database.load(sp, [user.children[1].uri])
+        # Assertions
+        assert not playlist.children_loaded and not playlist.children
+        assert playlist.owner.uri == user.children[1].owner.uri
+
+    def test_incremental_save(self, database, user, library):
+        """Assert saving partial data keeps stored details and saving children again replaces them."""
+        # Setup
+        database.save(user)
+        sp = self.new_session()
+        # A track without popularity and features, like one parsed from a page of album tracks.
+        data = {key: value for key, value in library.track(0).items() if key != 'popularity'}
+        partial = sp.factory.get_resource(data)
+        playlist = user.children[0]
+        playlist.children = playlist.children[:5]
+        # Call
+        database.save([partial, playlist])
+        # Assertions
+        track, = database.load(self.new_session(), [partial.uri])
+        assert track.features is True and track.popularity == playlist.children[0].popularity
+        restored, = database.load(self.new_session(), [playlist.uri], children=True)
+        assert len(restored.children) == 5
+
+    def test_null_details(self, database, library):
+        """Assert details whose value is null are kept when a stored resource is saved again."""
+        # Setup
+        sp = self.new_session()
+        stored = sp.factory.get_resource({**library.track(0), 'preview_url': 'https://example.com'})
+        database.save(stored)
+        track = self.new_session().factory.get_resource({**library.track(0), 'preview_url': None})
+        new = self.new_session().factory.get_resource({**library.track(1), 'preview_url': None})
+        # Call
+        database.save([track, new])
+        # Assertions
+        restored, added = database.load(self.new_session(), [track.uri, new.uri])
+        assert restored.details['preview_url'] == 'https://example.com'
+        assert 'preview_url' in added.details and added.preview_url is None
+        database.save(new)
+        assert 'preview_url' in database.load(self.new_session(), [new.uri])[0].details
+
+    def test_generic_collection(self, database, user):
+        """Assert tracks of a collection which isn't stored itself are saved with their albums and artists."""
+        # Setup
+        tracks = user.children[0].children[:3]
+        collection = spotify.Collection(user.sp, tracks, True, 'Search results')
+        # Call
+        counts = database.save(collection)
+        # Assertions
+        assert counts['tracks'] == 3 and counts['albums'] and counts['artists'] and not counts['playlists']
+        restored = database.load(self.new_session(), [track.uri for track in tracks])
+        assert [track.uri for track in restored] == [track.uri for track in tracks]
+        assert restored[0].album.uri == tracks[0].album.uri
+
+    def test_query(self, database, user):
+        # Setup
+        database.save(user)
+        sp = self.new_session()
+        artist = user.children[0].children[0].artists[0]
+        # Call
+        collection = database.query(sp, "SELECT uri FROM tracks JOIN track_artists ON track = uri WHERE artist = ? "
+                                        "ORDER BY name", [artist.uri])
+        # Assertions
+        assert collection.children_loaded and collection.children
+        assert all(artist.uri in [track_artist.uri for track_artist in track.artists] for track in collection)
+        assert [track.name for track in collection] == sorted(track.name for track in collection)
@@ -0,0 +1,88 @@
+import threading
+import pytest
+from unittest.mock import Mock
+from dotenv import load_dotenv
+
+from spotifytools import spotify
+from spotifytools.spotify_session import SpotifySession
+
+
+def mock_track(i):
+    return {'track': {'uri': f'spotify:track:{i}', 'type': 'track', 'name': f'Track {i}', 'is_local': False,
+                      'artists': [], 'album': {'uri': 'spotify:album:1', 'type': 'album', 'name': 'Album', 'artists': []}}}
+
+
+def mock_features(uris):
+    return [{feature: 1 for feature in ['valence', 'energy', 'danceability', 'speechiness', 'acousticness',
+                                        'instrumentalness', 'liveness', 'tempo', 'key', 'mode', 'time_signature']}
+            for uri in uris]
+
+
+class TestLoadPipeline:
+
+    @pytest.fixture
+    def sp(self):
+        load_dotenv()
+        sp = SpotifySession()
+        sp.connection = Mock()
+        sp.connection.audio_features = Mock(side_effect=mock_features)
+        yield sp
+
+    @pytest.fixture
+    def user(self, sp):
+        user = spotify.User(sp, {'uri': 'spotify:user:1', 'id': '1', 'name': 'User'})
+        playlists = [{'uri': f'spotify:playlist:{i}', 'type': 'playlist', 'name': f'Playlist {i}',
+                      'owner': {'uri': 'spotify:user:1', 'type': 'user', 'display_name': 'User'}, 'tracks': {'total': 150}} for i in range(2)]
+        sp.connection.user_playlists = Mock(return_value={'items': playlists, 'total': 2})
+        yield user
+
+    def test_load_recursive(self, sp, user):
+        """Assert children are loaded in order at every level and tracks are batched across playlists."""
+        # Setup
+        sp.connection.playlist_items = Mock(side_effect=lambda uri, limit, offset, fields: {
+            'items': [mock_track(f'{uri[-1]}-{i}') for i in range(offset, min(offset + limit, 150))], 'total': 150})
+        # Call
+        summary = sp.load_recursive(user, features=True)
+        # Assertions
+        assert [playlist.uri for playlist in user.children] == ['spotify:playlist:0', 'spotify:playlist:1']
+        tracks = user.children[1].children
+        assert [track.uri for track in tracks] == [f'spotify:track:1-{i}' for i in range(150)]
+        assert all(track.energy == 1 for playlist in user.children for track in playlist.children)
+        assert summary['children'] == {'requested': 3, 'skipped': 0, 'requests': 5}
+        assert summary['features'] == {'requested': 300, 'skipped': 0, 'requests': 3}
+
+    def test_pipelined(self, sp, user):
+        """Assert features of the first playlist are requested while the second playlist is still paging."""
+        # Setup
+        features_requested = threading.Event()
+
+        def playlist_items(uri, limit, offset, fields):
+            if uri.endswith('1'):
+                # Hold the second playlist until a feature batch is requested.
+                assert features_requested.wait(timeout=5)
+            return {'items': [mock_track(f'{uri[-1]}-{i}') for i in range(offset, min(offset + limit, 150))],
+                    'total': 150}
+
+        def audio_features(uris):
+            features_requested.set()
+            return mock_features(uris)
+        sp.connection.playlist_items = Mock(side_effect=playlist_items)
+        sp.connection.audio_features = Mock(side_effect=audio_features)
+        # Call
+        sp.load_recursive(user, features=True)
+        # Assertions
+        assert all(playlist.children_loaded for playlist in user.children)
+
+    def test_loaded_children(self, sp):
+        """Assert collections with children already loaded aren't requested again."""
+        # Setup
+        album = spotify.Album(sp, {'uri': 'spotify:album:1', 'name': 'Album'}, [], children_loaded=True)
+        album.children = [spotify.Track(sp, {'uri': f'spotify:track:{i}'}, [], album) for i in range(2)]
+        album.children[1].features = False
+        # Call
+        summary = sp.load_recursive(album, features=True)
+        # Assertions
+        assert not sp.connection.album_tracks.mock_calls
+        sp.connection.audio_features.assert_called_once_with(['spotify:track:0'])
+        assert summary['children'] == {'requested': 0, 'skipped': 1, 'requests': 0}
+        assert summary['features'] == {'requested': 1, 'skipped': 1, 'requests': 1}
@@ -0,0 +1,95 @@
+import pytest
+import requests.exceptions
+from unittest.mock import Mock, patch
+from spotipy import SpotifyException
+
+from spotifytools.rate_limiter import RateLimiter, TokenBucket
+
+
+class TestRateLimiter:
+
+    @pytest.fixture
+    def limiter(self):
+        yield RateLimiter(rate=1000, burst=1000, max_retries=3)
+
+    @pytest.fixture
+    def sleep(self):
+        with patch('spotifytools.rate_limiter.time.sleep') as mock_sleep:
+            yield mock_sleep
+
+    def test_call(self, limiter):
+        func = Mock(return_value='result')
+        assert limiter.call('endpoint', func, 1, key=2) == 'result'
+        func.assert_called_once_with(1, key=2)
+
+    def test_call_retry_after(self, limiter, sleep):
+        """Assert the wait requested by a 429 response is respected and blocks the limiter."""
+        # Setup
+        error = SpotifyException(429, -1, 'Too many requests', headers={'Retry-After': '7'})
+        func = Mock(side_effect=[error, 'result'])
+        # Call and Assertions
+        assert limiter.call('endpoint', func) == 'result'
+        assert func.call_count == 2
+        assert sleep.call_count == 1 and sleep.call_args.args[0] == pytest.approx(7, abs=0.5)
+        assert limiter.blocked_until > 0
+
+    def test_call_backoff(self, limiter, sleep):
+        """Assert timeouts are retried with exponentially growing delays."""
+        # Setup
+        func = Mock(side_effect=[requests.exceptions.ReadTimeout()] * 3 + ['result'])
+        # Call
+        assert limiter.call('endpoint', func) == 'result'
+        # Assertions
+        delays = [c.args[0] for c in sleep.mock_calls]
+        assert len(delays) == 3
+        for attempt, delay in enumerate(delays, start=1):
+            assert 2 ** (attempt - 2) <= delay <= 2 ** (attempt - 1)
+
+    def test_call_backoff_cap(self, sleep):
+        limiter = RateLimiter(max_retries=10, backoff_cap=4)
+        assert all(limiter.backoff(attempt) <= 4 for attempt in range(1, 11))
+
+    def test_call_max_retries(self, limiter, sleep):
+        """Assert the last error is raised once the limiter runs out of retries."""
+        error = SpotifyException(503, -1, 'Service unavailable')
+        func = Mock(side_effect=error)
+        with pytest.raises(SpotifyException):
+            limiter.call('endpoint', func)
+        assert func.call_count == 4
+
+    def test_call_not_retried(self, limiter, sleep):
+        """Assert errors which won't go away by repeating the request are raised immediately."""
+        func = Mock(side_effect=SpotifyException(404, -1, 'Not found'))
+        with pytest.raises(SpotifyException):
+            limiter.call('endpoint', func)
+        assert func.call_count == 1
+        assert not sleep.mock_calls
+
+    def test_call_write(self, limiter, sleep):
+        """Assert writes are only repeated after errors which mean the request never reached the API."""
+        # Setup
+        func = Mock(side_effect=[requests.exceptions.ConnectTimeout(), 'result'])
+        failing = Mock(side_effect=requests.exceptions.ConnectionError())
+        # Call and Assertions
+        assert limiter.call_write('endpoint', func) == 'result' and func.call_count == 2
+        with pytest.raises(requests.exceptions.ConnectionError):
+            limiter.call_write('endpoint', failing)
+        assert failing.call_count == 1
+
+    def test_endpoint_budget(self):
+        """Assert endpoints with their own budget take tokens from their own bucket as well as the global one."""
+        limiter = RateLimiter(rate=1000, burst=1000, endpoint_rates={'limited': (1000, 5)})
+        limiter.call('limited', Mock())
+        limiter.call('other', Mock())
+        assert limiter.endpoints['limited'].tokens == pytest.approx(4, abs=0.5)
+        assert 'other' not in limiter.endpoints
+
+    def test_token_bucket(self):
+        """Assert the bucket waits for tokens to refill once the burst is used up."""
+        bucket = TokenBucket(rate=1, capacity=2)
+        with patch('spotifytools.rate_limiter.time.sleep', side_effect=lambda s: setattr(bucket, 'tokens', 1)) as sleep:
+            bucket.acquire()
+            bucket.acquire()
+            assert not sleep.mock_calls
+            bucket.acquire()
+            assert sleep.call_count == 1
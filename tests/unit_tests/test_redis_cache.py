@@ -0,0 +1,128 @@
+import asyncio
+import pytest
+from unittest.mock import Mock, patch
+from dotenv import load_dotenv
+
+from spotifytools import spotify
+from spotifytools.async_spotify_session import AsyncSpotifySession
+from spotifytools.redis_cache import RedisResourceCache, LocalRedis
+from spotifytools.spotify_session import SpotifySession
+
+
+class TestRedisResourceCache:
+    """Tests the shared resource cache on the local Redis stand-in."""
+
+    @pytest.fixture
+    def cache(self):
+        yield RedisResourceCache(LocalRedis())
+
+    @pytest.fixture
+    def sp(self, cache):
+        load_dotenv()
+        sp = SpotifySession(shared_cache=cache)
+        sp.connection = Mock()
+        yield sp
+
+    def test_details(self, cache):
+        cache.set_many_details({'a': {'uri': 'a', 'name': 'A'}})
+        assert cache.get_details('a') == {'uri': 'a', 'name': 'A'}
+        assert cache.get_many_details(['a', 'b']) == {'a': {'uri': 'a', 'name': 'A'}}
+
+    def test_features_unavailable(self, cache):
+        """Assert tracks without features are cached as False rather than missing."""
+        cache.set_many_features({'a': None, 'b': {'energy': 1}})
+        assert cache.get_many_features(['a', 'b', 'c']) == {'a': False, 'b': {'energy': 1}}
+
+    def test_ttl(self):
+        cache = RedisResourceCache(LocalRedis(), details_ttl=10)
+        cache.set_many_details({'a': {'uri': 'a'}})
+        with patch('spotifytools.redis_cache.time.monotonic', return_value=1e12):
+            assert cache.get_details('a') is None
+
+    def test_pipelined(self, cache):
+        """Assert batches are read and written with a single round trip."""
+        cache.client = Mock(wraps=cache.client)
+        cache.set_many_details({str(i): {'uri': str(i)} for i in range(10)})
+        cache.get_many_details([str(i) for i in range(10)])
+        assert cache.client.pipeline.call_count == 1
+        assert cache.client.mget.call_count == 1
+        assert not cache.client.set.mock_calls
+
+    def test_fetch_item_shared(self, sp, cache):
+        """Assert an item downloaded by another session is created without a request."""
+        cache.set_many_details({'spotify:artist:1': {'uri': 'spotify:artist:1', 'type': 'artist', 'name': 'Artist'}})
+        artist = sp.fetch_item('spotify:artist:1')
+        assert isinstance(artist, spotify.Artist) and artist.name == 'Artist'
+        assert not sp.connection._get.mock_calls
+
+    def test_fetch_item_shares(self, sp, cache):
+        """Assert downloaded items are stored in the shared cache."""
+        sp.connection._get = Mock(return_value={'uri': 'spotify:artist:1', 'type': 'artist', 'name': 'Artist'})
+        sp.fetch_item('spotify:artist:1')
+        assert cache.get_details('spotify:artist:1')['name'] == 'Artist'
+
+    def test_load_shared(self, sp, cache):
+        """Assert load only requests features and details missing from the shared cache."""
+        # Setup
+        tracks = [spotify.Track(sp, {'uri': f'Mock Track {i}'}, None, None) for i in range(3)]
+        sp.factory.cache = {track.uri: track for track in tracks}
+        cache.set_many_features({'Mock Track 0': {'energy': 0.5}, 'Mock Track 1': None})
+        cache.set_many_details({'Mock Track 0': {'uri': 'Mock Track 0', 'popularity': 10}})
+        sp.connection.audio_features = Mock(return_value=[{}])
+        sp.connection.tracks = Mock(return_value={'tracks': [{}, {}]})
+        sp._match_details = Mock()
+        # Call
+        sp.load(tracks, details=True, features=True)
+        # Assertions
+        sp.connection.audio_features.assert_called_once_with(['Mock Track 2'])
+        sp.connection.tracks.assert_called_once_with(['Mock Track 1', 'Mock Track 2'])
+        assert tracks[0].energy == 0.5 and tracks[0].popularity == 10
+        assert tracks[1].features is False
+
+    def test_async_load_shared(self, sp, cache):
+        """Assert the async session also only requests data missing from the shared cache."""
+        # Setup
+        tracks = [spotify.Track(sp, {'uri': f'Mock Track {i}'}, None, None) for i in range(2)]
+        cache.set_many_features({'Mock Track 0': {'energy': 0.5}})
+        sp.connection.audio_features = Mock(return_value=[{}])
+        # Call
+        summary = asyncio.run(AsyncSpotifySession(sp).load(tracks, features=True))
+        # Assertions
+        sp.connection.audio_features.assert_called_once_with(['Mock Track 1'])
+        assert tracks[0].energy == 0.5
+        assert summary['features']['skipped'] == 1 and summary['features']['requested'] == 1
+
+    def test_async_fetch_item_shared(self, sp, cache):
+        """Assert the async session creates items from and stores them in the shared cache."""
+        # Setup
+        asp = AsyncSpotifySession(sp)
+        cache.set_many_details({'spotify:artist:1': {'uri': 'spotify:artist:1', 'type': 'artist', 'name': 'Artist'}})
+        sp.connection._get = Mock(return_value={'uri': 'spotify:artist:2', 'type': 'artist', 'name': 'Other'})
+        # Call
+        artist = asyncio.run(asp.fetch_item('spotify:artist:1'))
+        asyncio.run(asp.fetch_item('spotify:artist:2'))
+        # Assertions
+        assert artist.name == 'Artist'
+        sp.connection._get.assert_called_once_with('artists/2')
+        assert cache.get_details('spotify:artist:2')['name'] == 'Other'
+
+    def test_get_resource_shared(self, sp, cache):
+        """Assert new resources are completed with data from the shared cache, with new data taking priority."""
+        cache.set_many_details({'spotify:artist:1': {'uri': 'spotify:artist:1', 'type': 'artist', 'name': 'Old',
+                                                     'followers': 5}})
+        artist = sp.factory.get_resource({'uri': 'spotify:artist:1', 'type': 'artist', 'name': 'New'})
+        assert artist.name == 'New' and artist.followers == 5
+
+    def test_prefetch(self, sp, cache):
+        """Assert parsing a page of children looks up the children and their related resources in one round trip."""
+        # Setup
+        cache.client = Mock(wraps=cache.client)
+        playlist = spotify.Playlist(sp, {'uri': 'Mock Playlist', 'name': 'Mock Playlist'}, None)
+        children = [{'uri': f'spotify:track:{i}', 'type': 'track', 'name': f'Track {i}',
+                     'album': {'uri': 'spotify:album:1', 'type': 'album', 'name': 'Album', 'artists': []},
+                     'artists': [{'uri': 'spotify:artist:1', 'type': 'artist', 'name': 'Artist'}]} for i in range(5)]
+        # Call
+        sp._parse_children(playlist, children)
+        # Assertions
+        assert cache.client.mget.call_count == 1
+        assert len(playlist.children) == 5
@@ -0,0 +1,111 @@
+import threading
+import pytest
+from unittest.mock import Mock
+from dotenv import load_dotenv
+
+from spotifytools import spotify
+from spotifytools.spotify_session import SpotifySession
+from spotifytools.request_aggregator import RequestAggregator
+from spotifytools.synthetic import SyntheticLibrary
+
+
+class TestRequestAggregator:
+
+    @pytest.fixture
+    def sp(self):
+        load_dotenv()
+        sp = SpotifySession()
+        sp.connection = Mock()
+        sp.load = Mock()
+        sp.aggregator = RequestAggregator(sp, window=0.05, limits={'features': 10})
+        yield sp
+
+    @pytest.fixture
+    def tracks(self, sp):
+        tracks = [spotify.Track(sp, {'uri': f'Mock Track {i}'}, None, None) for i in range(10)]
+        sp.factory.cache = {track.uri: track for track in tracks}
+        yield tracks
+
+    def test_concurrent_requests(self, sp, tracks):
+        """Assert items requested by many threads within the window are loaded with one request."""
+        # Call
+        threads = [threading.Thread(target=sp.request_features, args=[track]) for track in tracks[:5]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Assertions
+        assert sp.load.call_count == 1
+        loaded = sp.load.call_args.args[0]
+        assert set(tracks[:5]) <= set(loaded)
+        assert sp.load.call_args.kwargs == {'features': True}
+
+    def test_full_batch(self, sp, tracks):
+        """Assert a full batch is sent without waiting for the window to close."""
+        sp.aggregator.window = 60
+        futures = [sp.aggregator.submit('features', track) for track in tracks]
+        assert all(future.done() for future in futures)
+        assert sp.load.call_count == 1
+
+    def test_no_fill(self, sp, tracks):
+        """Assert only the requested items are loaded, not other tracks missing features."""
+        # Call
+        sp.request_features(tracks[0])
+        # Assertions
+        assert sp.load.call_args.args[0] == [tracks[0]]
+
+    def test_sequential_loop(self):
+        """Assert a loop getting features of one track after another in a playlist makes a single request."""
+        # Setup
+        sp = SpotifySession()
+        sp.connection = Mock()
+        library = SyntheticLibrary(seed=1, tracks=100)
+        sp.connection.audio_features = Mock(side_effect=lambda uris: [library.features(0) for uri in uris])
+        tracks = [spotify.Track(sp, {'uri': f'Mock Track {i}'}, None, None) for i in range(100)]
+        other = spotify.Track(sp, {'uri': 'Mock Track 100'}, None, None)
+        playlist = spotify.Collection(sp, tracks, True, 'Playlist')
+        # Call
+        features = [track.get_features() for track in playlist]
+        # Assertions
+        assert sp.connection.audio_features.call_count == 1
+        assert all(features) and other.features is None
+
+    def test_siblings(self, sp, tracks):
+        """Assert batches are filled with following siblings first and only with those missing the data."""
+        # Setup
+        tracks[3].features = False
+        playlist = spotify.Collection(sp, tracks, True, 'Playlist')
+        sp.aggregator.limits['features'] = 4
+        # Call
+        iter(playlist)
+        sp.request_features(tracks[2])
+        # Assertions
+        assert sp.load.call_args.args[0] == [tracks[2], tracks[4], tracks[5], tracks[6]]
+
+    def test_no_window(self, sp, tracks):
+        """Assert a single call is sent right away and calls made while it loads are sent as the next batch."""
+        # Setup
+        sp.aggregator.window = 0
+        started, release = threading.Event(), threading.Event()
+
+        def load(items, features):
+            started.set()
+            release.wait(1)
+        sp.load.side_effect = load
+        # Call
+        first = threading.Thread(target=sp.request_features, args=[tracks[0]])
+        first.start()
+        started.wait(1)
+        futures = [sp.aggregator.submit('features', track) for track in tracks[1:5]]
+        release.set()
+        first.join(1)
+        for future in futures:
+            future.result(1)
+        # Assertions
+        assert [call.args[0] for call in sp.load.call_args_list] == [tracks[:1], tracks[1:5]]
+
+    def test_exception(self, sp, tracks):
+        """Assert errors of the batch request are raised to each caller."""
+        sp.load.side_effect = RuntimeError()
+        with pytest.raises(RuntimeError):
+            sp.request_features(tracks[0])
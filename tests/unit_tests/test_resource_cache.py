@@ -0,0 +1,80 @@
+import gc
+
+import pytest
+from unittest.mock import Mock
+from dotenv import load_dotenv
+
+from spotifytools.resource_cache import ResourceCache
+from spotifytools.spotify_session import SpotifySession
+from spotifytools.synthetic import SyntheticLibrary
+
+
+class MockResource:
+
+    def __init__(self, uri):
+        self.uri = uri
+
+
+class TestResourceCache:
+
+    @pytest.fixture
+    def cache(self):
+        yield ResourceCache(max_size=2)
+
+    def test_eviction(self, cache):
+        """Assert the least recently used resources are released unless they're referenced elsewhere."""
+        # Setup
+        kept = MockResource('a')
+        cache['a'] = kept
+        cache['b'] = MockResource('b')
+        cache.get('a')  # Makes 'b' the least recently used one.
+        # Call
+        cache['c'] = MockResource('c')
+        cache['d'] = MockResource('d')
+        gc.collect()
+        # Assertions
+        assert 'b' not in cache
+        assert cache.stats()['evictions'] == 2
+        assert cache.get('a') is kept
+        assert cache.stats()['weak_hits'] == 1
+        assert cache.get('b') is None and cache.stats()['misses'] == 1
+
+    def test_pin(self, cache):
+        # Setup
+        pinned = MockResource('a')
+        cache['a'] = pinned
+        cache.pin(pinned)
+        # Call
+        for uri in 'bcde':
+            cache[uri] = MockResource(uri)
+        gc.collect()
+        # Assertions
+        assert cache.get('a') is pinned
+        assert cache.stats()['pinned'] == 1 and cache.stats()['recent'] == 2
+        cache.unpin(pinned)
+        assert cache.stats()['pinned'] == 0 and 'a' in cache.recent
+
+    def test_unbounded(self):
+        # Setup
+        cache = ResourceCache()
+        # Call
+        for uri in range(100):
+            cache[uri] = MockResource(uri)
+        # Assertions
+        assert len(cache) == 100 and not cache.stats()['evictions']
+
+    def test_factory(self):
+        """Assert resources referenced by other resources stay unique after they're evicted."""
+        # Setup
+        load_dotenv()
+        sp = SpotifySession(max_resources=10)
+        sp.connection = Mock()
+        library = SyntheticLibrary(seed=1, tracks=100)
+        # Call
+        tracks = sp.factory.get_resources([library.track(n) for n in range(100)])
+        gc.collect()
+        # Assertions
+        assert len(sp.factory.cache.recent) == 10
+        assert sp.factory.get_resource(library.track(0)) is tracks[0]
+        assert sp.factory.get_resource(library.album(0)) is tracks[0].album
+        assert 'resource_cache_evictions_total' in sp.prometheus_stats()
@@ -1,3 +1,4 @@
+import gc
 import pytest
 from unittest.mock import Mock
 from unittest.mock import call
@@ -8,6 +9,7 @@ from spotifytools import spotify
 from spotifytools.exceptions import SpotifyToolsException, SpotifyToolsUnauthorizedException
 from spotifytools.resource_factory import ResourceFactory
 from spotifytools.spotify_session import SpotifySession
+from spotifytools.synthetic import SyntheticLibrary
 
 
 class TestResourceFactory:
@@ -63,7 +65,34 @@ class TestResourceFactory:
         # Call and Exception
         with pytest.raises(SpotifyToolsException):
             factory.get_resource(mock_data)
+        assert factory.cache.stats()['misses'] == 0
 
+    def test_get_resource_cache_stats(self, factory):
+        """Assert every resource of the data is looked up in the cache once."""
+        # Setup
+        data = SyntheticLibrary(seed=1, tracks=1).track(0)
+        # Call
+        factory.get_resource(data)
+        factory.get_resource(data)
+        # Assertions
+        # The track, its album and its artist are new, the album's artist is the track's artist found again.
+        stats = factory.cache.stats()
+        assert stats['misses'] == 3 and stats['hits'] == 2
+
+    def test_get_resources(self, factory):
+        """Assert resources are returned in order and albums nested in the batch are resolved once."""
+        # Setup
+        library = SyntheticLibrary(seed=1, tracks=100)
+        raw_list = [library.track(n) for n in range(24)]  # Two albums of 12 tracks each.
+        factory.get_resource = Mock(wraps=factory.get_resource)
+        # Call
+        tracks = factory.get_resources(raw_list + raw_list[:2])
+        # Assertions
+        assert [track.uri for track in tracks] == [raw_data['uri'] for raw_data in raw_list + raw_list[:2]]
+        assert tracks[0].album is tracks[11].album and tracks[0].album is not tracks[12].album
+        album_calls = [c for c in factory.get_resource.mock_calls if c.args[0].get('type') == 'album']
+        assert len(album_calls) == 2
+        assert factory._resolved is None
 
     @patch('spotifytools.resource_factory.filter_false_tracks')
     @patch('spotifytools.resource_factory.spotify.Playlist')
@@ -136,4 +165,72 @@ class TestResourceFactory:
         # Assertions
         assert call(mock_artist_data) in factory.get_resource.mock_calls
         assert call(mock_album_data) in factory.get_resource.mock_calls
-        assert mock_track.mock_calls[0] == call(factory.sp, raw_data=mock_data, artists=[mock_resource], album=mock_resource)
\ No newline at end of file
+        assert mock_track.mock_calls[0] == call(factory.sp, raw_data=mock_data, artists=[mock_resource], album=mock_resource)
+
+    def test_get_resource_compact(self, factory):
+        """Assert details of compacted resources stay available and related raw data is reduced to references."""
+        # Setup
+        factory.compact = True
+        album = {'uri': 'spotify:album:a', 'type': 'album', 'name': "Album", 'artists': [],
+                 'images': [{'url': 'x', 'width': 1, 'height': 1}]}
+        artist = {'uri': 'spotify:artist:b', 'type': 'artist', 'name': "Artist", 'href': 'https://example.com'}
+        data = {'uri': 'spotify:track:c', 'type': 'track', 'name': "Track", 'is_local': False, 'album': album,
+                'artists': [artist], 'duration_ms': 1000}
+        # Call
+        track = factory.get_resource(data)
+        track.parse_details({'popularity': 50})
+        # Assertions
+        assert track.compacted
+        assert track.name == "Track"
+        assert track.duration == 1000
+        assert track.popularity == 50
+        assert track.album.name == "Album"
+        assert track.album_data == {'uri': 'spotify:album:a', 'type': 'album', 'name': "Album"}
+        assert track.artists_data == [{'uri': 'spotify:artist:b', 'type': 'artist', 'name': "Artist"}]
+        assert 'name' not in track.__dict__
+        with pytest.raises(AttributeError):
+            track.missing
+
+    def test_compact_slots(self, factory):
+        """Assert compacted tracks keep their fields in slots without a dictionary, and others in their dictionary."""
+        # Setup
+        library = SyntheticLibrary(seed=1, tracks=2)
+        track = factory.get_resource(library.track(0))
+        factory.compact = True
+        # Call
+        compacted = factory.get_resource(library.track(1))
+        # Assertions
+        assert [value for value in gc.get_referents(compacted) if type(value) is dict] == [compacted.details]
+        assert compacted.features is None and compacted.name == library.track(1)['name']
+        assert track.__dict__['name'] == library.track(0)['name'] and 'features' not in track.__dict__
+
+    def test_get_resources_lazy(self, factory):
+        """Assert tracks are only parsed when more than their URI and name is needed and stay unique."""
+        # Setup
+        factory.lazy = True
+        library = SyntheticLibrary(seed=1, tracks=100)
+        raw_list = [library.track(n) for n in range(3)]
+        # Call
+        tracks = factory.get_resources(raw_list)
+        # Assertions
+        assert all(isinstance(track, spotify.LazyTrack) and track.resource_type is spotify.Track for track in tracks)
+        assert [track.name for track in tracks] == [raw_data['name'] for raw_data in raw_list]
+        assert not any(track.materialized for track in tracks)
+        assert tracks[0].album.name == raw_list[0]['album']['name']
+        assert tracks[0].materialized and not tracks[1].materialized
+        assert factory.get_resource(raw_list[0]) is tracks[0]
+        assert factory.get_resources(raw_list[:2]) == tracks[:2]
+        assert factory.sp._plan_load(tracks, details=True)[1]['details']['skipped'] == 3
+
+    def test_get_resources_lazy_merge(self, factory):
+        """Assert data missing from a stand-in which isn't parsed yet is added to it."""
+        # Setup
+        factory.lazy = True
+        raw_data = SyntheticLibrary(seed=1, tracks=10).track(0)
+        partial = {key: value for key, value in raw_data.items() if key != 'popularity'}
+        track, = factory.get_resources([partial])
+        # Call
+        again, = factory.get_resources([raw_data])
+        # Assertions
+        assert again is track and not track.materialized
+        assert track.details_loaded and track.popularity == raw_data['popularity']
@@ -0,0 +1,104 @@
+import time
+import pytest
+from unittest.mock import Mock, patch
+from dotenv import load_dotenv
+
+from spotifytools import spotify
+from spotifytools.response_cache import ResponseCache
+from spotifytools.spotify_session import SpotifySession
+
+
+class TestResponseCache:
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        cache = ResponseCache(tmp_path / 'cache.sqlite', ttls={'short': 10}, max_entries=5)
+        yield cache
+        cache.close()
+
+    @pytest.fixture
+    def sp(self, cache):
+        load_dotenv()
+        sp = SpotifySession(response_cache=cache)
+        sp.connection = Mock()
+        yield sp
+
+    def test_get_many(self, cache):
+        cache.set_many('endpoint', {'a': {'uri': 'a'}, 'b': None})
+        assert cache.get_many('endpoint', ['a', 'b', 'c']) == {'a': {'uri': 'a'}, 'b': None}
+        assert cache.get_many('other endpoint', ['a']) == {}
+
+    def test_persistence(self, cache):
+        """Assert responses are available to a new cache opened on the same database."""
+        cache.set('endpoint', 'a', [1, 2])
+        assert ResponseCache(cache.path).get('endpoint', 'a') == [1, 2]
+
+    def test_ttl(self, cache):
+        """Assert responses older than the TTL of their endpoint are ignored."""
+        cache.set('short', 'a', 1)
+        cache.set('endpoint', 'a', 1)
+        later = time.time() + 100
+        with patch('spotifytools.response_cache.time.time', return_value=later):
+            assert cache.get('short', 'a') is None
+            assert cache.get('endpoint', 'a') == 1
+
+    def test_eviction(self, cache):
+        """Assert the least recently used responses are evicted once the cache is full."""
+        for i in range(5):
+            cache.set('endpoint', str(i), i)
+        cache.get('endpoint', '0')  # Use the oldest entry so it's not evicted.
+        cache.set('endpoint', '5', 5)
+        assert len(cache) == 5
+        assert set(cache.get_many('endpoint', [str(i) for i in range(6)])) == {'0', '2', '3', '4', '5'}
+
+    def test_cached_batch(self, sp):
+        """Assert only the items missing from the cache are requested and the order of the batch is kept."""
+        # Setup
+        tracks = [spotify.Track(sp, {'uri': f'Mock Track {i}'}, None, None) for i in range(3)]
+        sp.response_cache.set('track_features', 'Mock Track 1', {'energy': 1})
+        sp.connection.audio_features = Mock(return_value=[{'energy': 0}, {'energy': 2}])
+        # Call and Assertions
+        assert sp._track_features(tracks) == [{'energy': 0}, {'energy': 1}, {'energy': 2}]
+        sp.connection.audio_features.assert_called_once_with(['Mock Track 0', 'Mock Track 2'])
+        assert sp._track_features(tracks) == [{'energy': 0}, {'energy': 1}, {'energy': 2}]
+        assert sp.connection.audio_features.call_count == 1
+
+    def test_cached_response(self, sp):
+        """Assert pages of children are cached by the collection's URI and offset."""
+        # Setup
+        album = spotify.Album(sp, {'uri': 'Mock Album', 'name': 'Mock Album'}, None)
+        sp.connection.album_tracks = Mock(side_effect=lambda uri, offset, limit: {'items': [], 'offset': offset})
+        # Calls
+        sp._album_tracks(album, offset=0)
+        sp._album_tracks(album, offset=50)
+        # Assertions
+        assert sp._album_tracks(album, offset=50) == {'items': [], 'offset': 50}
+        assert sp.connection.album_tracks.call_count == 2
+
+    def test_bypass(self, sp):
+        sp.response_cache.bypass = True
+        sp.connection._get = Mock(return_value={'uri': 'spotify:track:1'})
+        sp.fetch_item('spotify:track:1', raw=True)
+        sp.fetch_item('spotify:track:1', raw=True)
+        assert sp.connection._get.call_count == 2
+        assert len(sp.response_cache) == 0
+
+    def test_reload(self, sp):
+        """Assert reloading an item requests it again and replaces the cached response."""
+        # Setup
+        sp.connection._get = Mock(side_effect=[{'uri': 'spotify:track:1', 'name': 'Old'},
+                                               {'uri': 'spotify:track:1', 'name': 'New'}])
+        sp.fetch_item('spotify:track:1', raw=True)
+        # Call and Assertions
+        assert sp.fetch_item('spotify:track:1', reload=True, raw=True)['name'] == 'New'
+        assert sp.fetch_item('spotify:track:1', raw=True)['name'] == 'New'
+        assert sp.connection._get.call_count == 2
+
+    def test_count(self, cache):
+        """Assert the running count of responses only grows with new keys."""
+        cache.set_many('endpoint', {'a': 1, 'b': 2})
+        cache.set_many('endpoint', {'b': 3, 'c': 4})
+        cache.set('other endpoint', 'a', 5)
+        assert len(cache) == 4 == len(ResponseCache(cache.path))
+        cache.clear()
+        assert len(cache) == 0
@@ -0,0 +1,91 @@
+import pytest
+import requests.exceptions
+from unittest.mock import Mock, patch
+from dotenv import load_dotenv
+
+from spotifytools import spotify
+from spotifytools.rate_limiter import RateLimiter
+from spotifytools.response_cache import ResponseCache
+from spotifytools.session_stats import SessionStats
+from spotifytools.spotify_session import SpotifySession
+
+
+class TestSessionStats:
+
+    @pytest.fixture
+    def stats(self):
+        yield SessionStats()
+
+    @pytest.fixture
+    def sp(self, stats):
+        load_dotenv()
+        sp = SpotifySession(rate_limiter=RateLimiter(rate=1000, burst=1000), stats=stats)
+        sp.connection = Mock()
+        yield sp
+
+    def test_timed(self, stats):
+        """Assert every attempt is timed and failed attempts are counted as errors."""
+        func = Mock(side_effect=[RuntimeError(), 'result'])
+        timed = stats.timed('endpoint', func)
+        with pytest.raises(RuntimeError):
+            timed()
+        assert timed() == 'result'
+        endpoint = stats.snapshot()['endpoint']
+        assert endpoint['attempts'] == 2 and endpoint['errors'] == 1
+        assert endpoint['latency']['buckets'][0.05] == 2
+
+    def test_record_response(self, stats):
+        """Assert response sizes are counted under the endpoint being requested by the thread."""
+        response = Mock(content=b'12345', headers={})
+        stats.timed('endpoint', stats.record_response)(response)
+        stats.record_response(Mock(content=b'12345', headers={'Content-Length': '3'}))
+        assert stats.snapshot()['endpoint']['bytes'] == 5 and stats.snapshot()['endpoint']['wire_bytes'] == 5
+        assert stats.snapshot()['other']['bytes'] == 5 and stats.snapshot()['other']['wire_bytes'] == 3
+        assert stats.local.response_bytes == 5
+
+    def test_nested_timed(self, stats):
+        """Assert a response received after a nested call is still counted under the outer endpoint."""
+        # Setup
+        response = Mock(content=b'12345', headers={})
+
+        def outer():
+            stats.timed('inner', stats.record_response)(response)
+            stats.record_response(response)
+
+        # Call
+        stats.timed('outer', outer)()
+        # Assertions
+        assert stats.snapshot()['inner']['bytes'] == 5 and stats.snapshot()['outer']['bytes'] == 5
+        assert 'other' not in stats.snapshot() and stats.local.endpoint is None
+
+    def test_retries(self, sp):
+        """Assert retries made by the rate limiter are counted for the request."""
+        # Setup
+        sp.connection.artists = Mock(side_effect=[requests.exceptions.ReadTimeout(), {'artists': [{}]}])
+        # Call
+        with patch('spotifytools.rate_limiter.time.sleep'):
+            sp._artist_details([Mock()])
+        # Assertions
+        stats = sp.stats()['artist_details']
+        assert stats['requests'] == 1 and stats['attempts'] == 2 and stats['retries'] == 1 and stats['errors'] == 1
+
+    def test_cache_hits(self, sp, tmp_path):
+        # Setup
+        sp.response_cache = ResponseCache(tmp_path / 'cache.sqlite')
+        sp.response_cache.set('track_features', 'Mock Track 0', {})
+        tracks = [spotify.Track(sp, {'uri': f'Mock Track {i}'}, None, None) for i in range(3)]
+        sp.connection.audio_features = Mock(return_value=[{}, {}])
+        # Call
+        sp._track_features(tracks)
+        # Assertions
+        stats = sp.stats()['track_features']
+        assert stats['cache_hits'] == 1 and stats['cache_misses'] == 2 and stats['requests'] == 1
+
+    def test_prometheus(self, stats):
+        stats.count_request('track_features')
+        stats.record_attempt('track_features', 0.2)
+        text = stats.prometheus()
+        assert 'spotifytools_requests_total{endpoint="track_features"} 1' in text
+        assert 'spotifytools_request_duration_seconds_bucket{endpoint="track_features",le="0.1"} 0' in text
+        assert 'spotifytools_request_duration_seconds_bucket{endpoint="track_features",le="+Inf"} 1' in text
+        assert '# TYPE spotifytools_request_duration_seconds histogram' in text
@@ -0,0 +1,137 @@
+import pytest
+from unittest.mock import Mock
+from dotenv import load_dotenv
+
+from spotifytools.exceptions import SpotifyToolsException
+from spotifytools.helpers import features_adapter
+from spotifytools.snapshot import save_snapshot, load_snapshot
+from spotifytools.spotify_session import SpotifySession
+from spotifytools.synthetic import SyntheticLibrary
+
+
+class TestSnapshot:
+
+    @pytest.fixture
+    def library(self):
+        yield SyntheticLibrary(seed=1, tracks=50)
+
+    @pytest.fixture
+    def sp(self, library):
+        load_dotenv()
+        sp = SpotifySession()
+        sp.connection = Mock()
+        tracks = sp.factory.get_resources([library.track(n) for n in range(50)])
+        for n, track in enumerate(tracks[:40]):
+            track.parse_features(features_adapter(library.features(n)))
+        playlist = sp.factory.get_resource(library.playlist(0, simplified=True))
+        playlist.children = tracks[:20]
+        playlist.children_loaded = True
+        yield sp
+
+    def new_session(self):
+        sp = SpotifySession()
+        sp.connection = Mock()
+        return sp
+
+    def test_round_trip(self, sp, library, tmp_path):
+        """Assert resources are restored with their details, features and links to the same instances."""
+        # Setup
+        path = tmp_path / 'library.snap'
+        restored = self.new_session()
+        # Call
+        count = sp.save_snapshot(path)
+        # Assertions
+        assert restored.load_snapshot(path) == count == len(sp.factory.cache)
+        track, original = restored.factory.cache[library.track(0)['uri']], sp.factory.cache[library.track(0)['uri']]
+        assert track.name == original.name and track.energy == original.energy and track.features is True
+        assert track.album is restored.factory.cache[original.album.uri]
+        assert [artist.uri for artist in track.artists] == [artist.uri for artist in original.artists]
+        assert track.artists[0] is restored.factory.cache[original.artists[0].uri]
+        assert restored.factory.cache[library.track(45)['uri']].features is None
+        playlist = restored.factory.cache[library.playlist(0, simplified=True)['uri']]
+        assert playlist.children_loaded and len(playlist.children) == 20 and playlist.children[0] is track
+        assert playlist.owner.uri == sp.factory.cache[playlist.uri].owner.uri
+        assert restored.factory.get_resource(library.track(0)) is track
+
+    def test_merge(self, sp, library, tmp_path):
+        """Assert resources already in the cache are kept and completed with saved details."""
+        # Setup
+        path = tmp_path / 'library.snap'
+        save_snapshot(sp.factory, path)
+        restored = self.new_session()
+        existing = restored.factory.get_resource(library.track(0))
+        # Call
+        load_snapshot(restored.factory, path)
+        # Assertions
+        assert restored.factory.cache[existing.uri] is existing
+        assert existing.features is True and existing.energy == sp.factory.cache[existing.uri].energy
+        assert existing.album is restored.factory.cache[existing.album.uri]
+
+    def test_lazy(self, library, tmp_path):
+        """Assert tracks which aren't parsed yet are saved along with the albums and artists only their data has."""
+        # Setup
+        path = tmp_path / 'library.snap'
+        sp = SpotifySession(lazy=True)
+        sp.connection = Mock()
+        tracks = sp.factory.get_resources([library.track(n) for n in range(10)])
+        restored = self.new_session()
+        # Call
+        sp.save_snapshot(path)
+        restored.load_snapshot(path)
+        # Assertions
+        track = restored.factory.cache[tracks[0].uri]
+        assert track.name == tracks[0].name and track.popularity == tracks[0].popularity
+        assert track.album is restored.factory.cache[tracks[0].album.uri]
+        assert [artist.uri for artist in track.artists] == [artist.uri for artist in tracks[0].artists]
+        assert len(restored.factory.cache) == len(sp.factory.cache)
+
+    def test_on_demand(self, sp, library, tmp_path):
+        """Assert resources are only created when they're looked up, and listing the cache creates the rest."""
+        # Setup
+        path = tmp_path / 'library.snap'
+        count = sp.save_snapshot(path)
+        restored = self.new_session()
+        cache = restored.factory.cache
+        restored.load_snapshot(path)
+        # Call
+        track = cache[library.track(0)['uri']]
+        # Assertions
+        assert track.album is cache.recent[track.album.uri] and track.artists[0] is cache.recent[track.artists[0].uri]
+        assert 0 < len(cache.recent) < count and cache.stats()['pending'] == count - len(cache.recent)
+        assert len(cache) == count and library.track(1)['uri'] in cache
+        assert len(cache.values()) == count and cache.stats()['pending'] == 0 and not cache.sources
+        assert cache[library.track(0)['uri']] is track
+
+    def test_bounded_cache(self, sp, library, tmp_path):
+        """Assert resources released by a bounded cache are created again when something links to them."""
+        # Setup
+        path = tmp_path / 'library.snap'
+        sp.save_snapshot(path)
+        restored = SpotifySession(max_resources=2)
+        restored.connection = Mock()
+        restored.load_snapshot(path)
+        # Call
+        playlist = restored.factory.cache[library.playlist(0, simplified=True)['uri']]
+        # Assertions
+        assert [track.uri for track in playlist] == [track.uri for track in sp.factory.cache[playlist.uri]]
+        assert all(track.album.uri == sp.factory.cache[track.uri].album.uri for track in playlist)
+
+    def test_compact(self, sp, library, tmp_path):
+        # Setup
+        path = tmp_path / 'library.snap'
+        sp.save_snapshot(path)
+        restored = SpotifySession(compact=True)
+        restored.connection = Mock()
+        # Call
+        restored.load_snapshot(path)
+        # Assertions
+        track = restored.factory.cache[library.track(1)['uri']]
+        assert track.compacted and track.name == sp.factory.cache[track.uri].name
+
+    def test_invalid_file(self, sp, tmp_path):
+        # Setup
+        path = tmp_path / 'library.snap'
+        path.write_bytes(b'\x00' * 64)
+        # Call / Assertions
+        with pytest.raises(SpotifyToolsException):
+            sp.load_snapshot(path)
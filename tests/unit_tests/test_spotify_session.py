@@ -4,9 +4,11 @@ import pytest
 import unittest.mock
 from unittest.mock import Mock, MagicMock, call
 from dotenv import load_dotenv
+from spotipy import SpotifyException
 
 from spotifytools import spotify
-from spotifytools.spotify_session import SpotifySession
+from spotifytools.rate_limiter import RateLimiter
+from spotifytools.spotify_session import SpotifySession, PLAYLIST_FIELDS
 from spotifytools.exceptions import SpotifyToolsException, SpotifyToolsUnauthorizedException
 
 
@@ -55,6 +57,34 @@ class TestSpotifySession:
         assert sp.connection.method_calls == [call.user_playlist_create(mock_user.id, "Mock Playlist (2)")]
         assert sp._add_to_playlist.call_count == 3  # 3 requests limited to 100 for a list of 201 tracks.
 
+    def test_create_playlist_retry(self, sp):
+        """Assert a failure to add tracks is retried without creating the playlist again."""
+        # Setup
+        sp.fetch_user = Mock(return_value=Mock(id="Mock User"))
+        sp.unique_playlist_name = Mock(return_value="Mock Playlist")
+        sp.factory.get_resource = Mock()
+        sp.rate_limiter = RateLimiter(rate=1000, burst=1000, max_retries=1, backoff_base=0)
+        sp.connection.playlist_add_items = Mock(side_effect=SpotifyException(503, -1, 'Service unavailable'))
+        # Call
+        with pytest.raises(SpotifyException):
+            sp.create_playlist("Mock Playlist", [Mock()])
+        # Assertions
+        assert sp.connection.user_playlist_create.call_count == 1
+        assert sp.connection.playlist_add_items.call_count == 2
+
+    def test_queue_retry(self, sp):
+        """Assert a rate limited track is queued again without queueing the tracks before it again."""
+        # Setup
+        tracks = [Mock(uri=f'Mock Track {i}') for i in range(3)]
+        sp.rate_limiter = RateLimiter(rate=1000, burst=1000, backoff_base=0)
+        error = SpotifyException(429, -1, 'Too many requests', headers={'Retry-After': '0'})
+        sp.connection.add_to_queue = Mock(side_effect=[None, error, None, None])
+        # Call
+        sp.queue(tracks)
+        # Assertions
+        assert [c.args[0] for c in sp.connection.add_to_queue.mock_calls] == \
+            ['Mock Track 0', 'Mock Track 1', 'Mock Track 1', 'Mock Track 2']
+
     def test__add_to_playlist(self, sp):
         """Assert passing up to 100 tracks calls the correct method."""
         # Setup
@@ -97,9 +127,13 @@ class TestSpotifySession:
         assert sp.connected_user == parsed_user
         assert len(sp.connection.current_user.mock_calls) == 1
 
+        assert sp.stats()['current_user']['requests'] == 1  # The cached user takes no request.
+
         assert sp.fetch_user(update=True) == parsed_updated_user
         assert sp.connected_user == parsed_updated_user
         assert len(sp.connection.current_user.mock_calls) == 2
+        # The connected user stays in the cache.
+        assert sp.factory.cache.pinned == {parsed_updated_user.uri: parsed_updated_user}
 
     def test_fetch_user_unauthorized(self):
         """Test the @authorized decorator by attempting to get the user of an unauthorized session."""
@@ -124,8 +158,8 @@ class TestSpotifySession:
         mock_artist = spotify.Artist(sp, {'uri': "Mock Artist", 'name': "Mock Artist"})
         mock_playlist = spotify.Playlist(sp, {'uri': f"Mock Playlist", 'name': f"Mock Playlist"}, None)
         mock_items = mock_tracks + [mock_playlist, mock_artist] + mock_albums
-        sp._fetch_bulk_details = Mock()
-        sp._fetch_bulk_children = Mock()
+        sp._fetch_bulk_details = Mock(return_value=1)
+        sp._fetch_bulk_children = Mock(return_value=1)
         yield sp, mock_items
 
     def test_load_bulk(self, load_bulk_setup):
@@ -151,13 +185,46 @@ class TestSpotifySession:
         assert sp._fetch_bulk_details.call_count == 0
         assert sp._fetch_bulk_children.call_count == 0
 
+    def test_load_missing(self, sp):
+        """Assert only the data missing from each item is requested and the load is summarized."""
+        # Setup
+        loaded_track = spotify.Track(sp, {'uri': 'Loaded Track', 'popularity': 1}, None, None)
+        loaded_track.features = {}
+        unavailable_track = spotify.Track(sp, {'uri': 'Unavailable Track', 'popularity': 1}, None, None)
+        unavailable_track.features = False
+        new_tracks = [spotify.Track(sp, {'uri': f'Mock Track {i}'}, None, None) for i in range(3)]
+        loaded_album = spotify.Album(sp, {'uri': "Mock Album", 'name': "Mock Album", 'label': 'Label'}, None,
+                                     children_loaded=True)
+        sp._fetch_bulk_details = Mock(return_value=1)
+        sp._fetch_bulk_children = Mock(return_value=1)
+        # Call
+        summary = sp.load([loaded_track, unavailable_track, loaded_album] + new_tracks, details=True, features=True,
+                          children=True)
+        # Assertions
+        assert call(new_tracks, sp._track_features, sp._match_features, 100) in sp._fetch_bulk_details.mock_calls
+        assert call(new_tracks, sp._track_details, sp._match_details, 50) in sp._fetch_bulk_details.mock_calls
+        assert sp._fetch_bulk_details.call_count == 2
+        assert not sp._fetch_bulk_children.mock_calls
+        assert summary == {
+            'features': {'requested': 3, 'skipped': 2, 'requests': 1},
+            'details': {'requested': 3, 'skipped': 3, 'requests': 1},
+            'children': {'requested': 0, 'skipped': 1, 'requests': 0},
+        }
+
+    def test_load_loaded(self, sp):
+        """Assert loading a fully loaded item makes no requests."""
+        track = spotify.Track(sp, {'uri': 'Loaded Track', 'popularity': 1}, None, None)
+        track.features = {}
+        sp.load(track, details=True, features=True)
+        assert not sp.connection.method_calls
+
     def test_load_children(self, sp):
         # Setup
         mock_user = spotify.User(sp, {'uri': "Mock User", 'name': "Mock User"})
         mock_artist = spotify.Artist(sp, {'uri': "Mock Artist", 'name': "Mock Artist"})
         mock_album = spotify.Album(sp, {'uri': "Mock Artist", 'name': "Mock Artist"}, artists=[mock_artist])
         mock_playlist = spotify.Playlist(sp, {'uri': "Mock Playlist", 'name': "Mock Playlist"}, owner=mock_user)
-        sp._fetch_bulk_children = Mock()
+        sp._fetch_bulk_children = Mock(return_value=1)
         # Call
         sp.load_children([mock_album, mock_artist, mock_playlist])
         # Assertions
@@ -168,7 +235,7 @@ class TestSpotifySession:
     def test_load_features(self, sp):
         # Setup
         mock_track = spotify.Track(sp, {'uri': "Mock Track"}, artists=Mock(), album=Mock())
-        sp._fetch_bulk_details = Mock()
+        sp._fetch_bulk_details = Mock(return_value=1)
         # Call
         sp.load_features(mock_track)
         # Assertion
@@ -178,7 +245,7 @@ class TestSpotifySession:
         # Setup
         mock_album = spotify.Album(sp, {'uri': "Mock Artist", 'name': "Mock Artist"}, artists=Mock())
         mock_track = spotify.Track(sp, {'uri': "Mock Track"}, artists=Mock(), album=Mock())
-        sp._fetch_bulk_details = Mock()
+        sp._fetch_bulk_details = Mock(return_value=1)
         # Call
         sp.load_details([mock_album, mock_track])
         # Assertions
@@ -212,8 +279,108 @@ class TestSpotifySession:
         assert request_method.mock_calls == [call(mock_item, offset=3), call(mock_item, offset=8)]
         parsing_method.assert_called_once_with(mock_item, [mock_children, ] * 2)
 
+    def test_rate_limited(self, sp):
+        """Assert decorated requests are made through the session's rate limiter under the name of the request."""
+        # Setup
+        sp.rate_limiter = Mock()
+        mock_artists = [Mock()]
+        # Call
+        sp._artist_details(mock_artists)
+        # Assertions
+        assert sp.rate_limiter.call.call_count == 1
+        endpoint, func, *args = sp.rate_limiter.call.call_args.args
+        assert endpoint == 'artist_details'
+        assert args == [sp, mock_artists]
+
+    def test__fetch_bulk_children_total(self, sp):
+        """Assert the remaining pages are requested by offset when the first page reports the total and kept in order."""
+        # Setup
+        responses = {offset: {'total': 23, 'next': offset < 20, 'items': [offset]} for offset in [3, 8, 13, 18]}
+        request_method = Mock(side_effect=lambda item, offset: responses[offset])
+        parsing_method = Mock()
+        mock_item = Mock()
+        mock_item.children = [Mock() for i in range(3)]
+        # Call
+        sp._fetch_bulk_children([mock_item], request_method, parsing_method, 5)
+        # Assertions
+        assert sorted(c.kwargs['offset'] for c in request_method.mock_calls) == [3, 8, 13, 18]
+        parsing_method.assert_called_once_with(mock_item, [3, 8, 13, 18])
+
 
+    def test_iter_children(self, sp):
+        """Assert children are yielded in order while only a window of pages is requested ahead."""
+        # Setup
+        album = spotify.Album(sp, {'uri': 'Mock Album', 'name': 'Mock Album'}, artists=[])
+        sp.factory.cache[album.uri] = album
+        pages = {offset: {'total': 500, 'items': [{'uri': f'Mock Track {offset}', 'type': 'track', 'artists': []}]}
+                 for offset in range(0, 500, 50)}
+        sp._album_tracks = Mock(side_effect=lambda item, offset: pages[offset])
+        # Call
+        children = sp.iter_children(album)
+        first = next(children)
+        # Assertions
+        assert first.uri == 'Mock Track 0' and first.album is album
+        assert sp._album_tracks.call_count < len(pages)
+        assert not album.children_loaded
+        assert [child.uri for child in children] == [f'Mock Track {offset}' for offset in range(50, 500, 50)]
+        assert album.children_loaded and len(album.children) == 10
 
+    def test_iter_children_not_kept(self, sp):
+        """Assert children streamed without keeping them aren't added to the collection."""
+        # Setup
+        album = spotify.Album(sp, {'uri': 'Mock Album', 'name': 'Mock Album'}, artists=[])
+        sp.factory.cache[album.uri] = album
+        pages = {offset: {'total': 100, 'items': [{'uri': f'Mock Track {offset}', 'type': 'track', 'artists': []}]}
+                 for offset in range(0, 100, 50)}
+        sp._album_tracks = Mock(side_effect=lambda item, offset: pages[offset])
+        # Call
+        children = list(album.iter_children(keep=False))
+        # Assertions
+        assert [child.uri for child in children] == ['Mock Track 0', 'Mock Track 50']
+        assert not album.children and not album.children_loaded
 
-def test_timeout_wait(self, sp):
-    assert False
+    def test_iter_tracks(self, sp):
+        """Assert tracks of all subcollections are yielded once."""
+        # Setup
+        track = spotify.Track(sp, {'uri': 'Mock Track'}, artists=[], album=Mock())
+        playlists = [spotify.Playlist(sp, {'uri': f'Mock Playlist {i}', 'name': 'Mock Playlist'}, owner=Mock(),
+                                      children=[track], children_loaded=True) for i in range(2)]
+        user = spotify.User(sp, {'uri': 'Mock User', 'name': 'Mock User'}, children=playlists)
+        user.children_loaded = True
+        # Call and Assertions
+        assert list(user.iter_tracks()) == [track]
+
+    def test_load_profile(self, sp):
+        """Assert pages of playlist items are requested with the fields of the session's load profile."""
+        # Setup
+        playlist = spotify.Playlist(sp, {'uri': 'Mock Playlist', 'name': 'Mock Playlist'}, owner=Mock())
+        sp.connection.playlist_items = Mock(return_value={'items': []})
+        sp.load_profile = 'lean'
+        # Call
+        sp._playlist_tracks(playlist, offset=0)
+        # Assertions
+        sp.connection.playlist_items.assert_called_once_with('Mock Playlist', fields=PLAYLIST_FIELDS['lean'], offset=0,
+                                                             limit=100)
+
+    def test_compare_load_profiles(self, sp):
+        # Setup
+        playlist = spotify.Playlist(sp, {'uri': 'Mock Playlist', 'name': 'Mock Playlist'}, owner=Mock())
+        # The transport calls the response hook with each page, compressed to a different size.
+        sp.connection.playlist_items = Mock(side_effect=lambda uri, fields, offset, limit: (
+            sp.request_stats.record_response(Mock(content=b'x' * (12 if fields else 31),
+                                                  headers={'Content-Length': '5'} if fields else {})),
+            {'items': []})[1])
+        # Call and Assertions
+        assert sp.compare_load_profiles(playlist) == {'full': 31, 'lean': 12}
+        assert sp.connection.playlist_items.call_count == 2
+        assert sp.stats()['playlist_items']['wire_bytes'] == 36
+
+    def test_compare_load_profiles_without_response(self, sp):
+        """Assert the size of an earlier response isn't reported when a request doesn't receive one."""
+        # Setup
+        playlist = spotify.Playlist(sp, {'uri': 'Mock Playlist', 'name': 'Mock Playlist'}, owner=Mock())
+        sp.request_stats.record_response(Mock(content=b'x' * 10, headers={}))
+        sp.connection.playlist_items = Mock(return_value={'items': []})
+        # Call and Assertions
+        with pytest.raises(SpotifyToolsException):
+            sp.compare_load_profiles(playlist)
@@ -0,0 +1,56 @@
+import importlib
+import os
+import sys
+
+import pytest
+from unittest.mock import Mock, call
+
+import spotifytools
+from spotifytools import spotify
+from spotifytools.synthetic import SyntheticLibrary
+
+
+class TestSpotifyTools:
+    """Tests the command line interface offline, replaying an empty cassette instead of authorizing."""
+
+    @pytest.fixture
+    def cli(self, tmp_path, monkeypatch):
+        cassette = tmp_path / 'cassette.json'
+        cassette.write_text('{"interactions": []}')
+        monkeypatch.setenv('SPOTIFYTOOLS_CASSETTE', str(cassette))
+        monkeypatch.setenv('SPOTIFYTOOLS_CASSETTE_MODE', 'replay')
+        monkeypatch.setenv('GENIUS_SECRET', os.environ.get('GENIUS_SECRET', 'secret'))
+        # The interface imports helpers like a script run from the package directory.
+        monkeypatch.syspath_prepend(os.path.dirname(spotifytools.__file__))
+        sys.modules.pop('spotifytools.spotify_tools', None)
+        cli = importlib.import_module('spotifytools.spotify_tools')
+        cli.navigate = Mock()
+        yield cli
+        sys.modules.pop('spotifytools.spotify_tools', None)
+
+    @pytest.fixture
+    def lazy_track(self, cli):
+        track, = cli.sp.factory.get_resources([SyntheticLibrary(seed=1, tracks=1).track(0)])
+        assert isinstance(track, spotify.LazyTrack)
+        yield track
+
+    def test_lazy_track_actions(self, cli, lazy_track):
+        """Assert commands of tracks are available for a track which isn't parsed yet."""
+        # Setup
+        cli.navigation_stack.append(lazy_track)
+        cli.command_queue.append('artist')
+        # Call
+        cli.take_input()
+        # Assertions
+        assert cli.navigate.mock_calls == [call(lazy_track.artists[0])]
+
+    def test_lazy_track_help(self, cli, lazy_track, monkeypatch, capsys):
+        # Setup
+        cli.navigation_stack.append(lazy_track)
+        monkeypatch.setattr('builtins.input', Mock(return_value=''))
+        # Call
+        cli.print_help()
+        # Assertions
+        output = capsys.readouterr().out
+        assert 'Track ....' in output and 'LazyTrack' not in output
+        assert 'artist' in output and 'details' in output
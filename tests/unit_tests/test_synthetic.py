@@ -0,0 +1,42 @@
+import pytest
+from unittest.mock import Mock
+from dotenv import load_dotenv
+
+from spotifytools import spotify
+from spotifytools.synthetic import SyntheticLibrary
+from spotifytools.spotify_session import SpotifySession
+
+
+class TestSyntheticLibrary:
+
+    @pytest.fixture
+    def library(self):
+        yield SyntheticLibrary(seed=1, tracks=1000, playlists_per_user=(1, 5), playlist_tracks=250)
+
+    def test_deterministic(self, library):
+        assert SyntheticLibrary(seed=1).track(5) == SyntheticLibrary(seed=1).track(5)
+        assert SyntheticLibrary(seed=1).track(5)['name'] != SyntheticLibrary(seed=2).track(5)['name']
+
+    def test_id(self, library):
+        assert len(library.id(123456)) == 22
+        assert library.number(library.id(123456)) == 123456
+
+    def test_pagination(self, library):
+        pages = [library.playlist_items(0, offset, 100) for offset in range(0, 250, 100)]
+        assert [len(page['items']) for page in pages] == [100, 100, 50]
+        assert all(page['total'] == 250 for page in pages)
+        assert pages[1]['next'] and not pages[2]['next']
+
+    def test_parse(self, library):
+        """Assert generated payloads can be parsed into resources."""
+        # Setup
+        load_dotenv()
+        sp = SpotifySession()
+        sp.connection = Mock()
+        # Call
+        album = sp.factory.get_resource(library.album(3))
+        playlist = sp.factory.get_resource(library.playlist(0))
+        # Assertions
+        assert isinstance(album, spotify.Album) and len(album.children) == 12 and album.details_loaded
+        assert isinstance(playlist, spotify.Playlist) and len(playlist.children) == 100
+        assert all(isinstance(track, spotify.Track) and track.details_loaded for track in playlist.children)
@@ -0,0 +1,74 @@
+import pytest
+import requests
+from dotenv import load_dotenv
+
+from spotifytools import spotify
+from spotifytools.rate_limiter import RateLimiter
+from spotifytools.synthetic import SyntheticLibrary
+from spotifytools.synthetic_server import SyntheticServer, parse_fields, apply_fields
+from spotifytools.spotify_session import SpotifySession, PLAYLIST_FIELDS
+
+
+class TestSyntheticServer:
+
+    @pytest.fixture
+    def library(self):
+        yield SyntheticLibrary(seed=1, tracks=10000, users=3, playlists_per_user=3, playlist_tracks=230)
+
+    @pytest.fixture
+    def server(self, library):
+        with SyntheticServer(library) as server:
+            yield server
+
+    @pytest.fixture
+    def sp(self, server):
+        load_dotenv()
+        yield SpotifySession(api_url=server.url, access_token='synthetic',
+                             rate_limiter=RateLimiter(rate=1000, burst=1000))
+
+    def test_parse_fields(self):
+        tree = parse_fields('items(track(name,album(uri))),total')
+        assert tree == {'items': {'track': {'name': None, 'album': {'uri': None}}}, 'total': None}
+        data = {'items': [{'track': {'name': 'a', 'id': 1, 'album': {'uri': 'b', 'name': 'c'}}}], 'total': 1, 'x': 0}
+        assert apply_fields(data, tree) == {'items': [{'track': {'name': 'a', 'album': {'uri': 'b'}}}], 'total': 1}
+
+    def test_load_recursive(self, sp, library):
+        """Assert a whole user library is loaded from the server down to track features."""
+        # Setup
+        user = sp.factory.get_resource(library.user(1))
+        # Call
+        sp.load_recursive(user, features=True)
+        # Assertions
+        assert len(user.children) == 3
+        assert all(len(playlist.children) == 230 for playlist in user.children)
+        assert all(track.features for playlist in user.children for track in playlist.children)
+
+    def test_lean_profile(self, sp, library):
+        """Assert lean pages are smaller, but still parse into complete tracks."""
+        # Setup
+        sp.load_profile = 'lean'
+        playlist = sp.factory.get_resource(library.playlist(0, simplified=True))
+        # Call
+        sizes = sp.compare_load_profiles(playlist)
+        tracks = list(sp.iter_children(playlist))
+        # Assertions
+        assert sizes['lean'] * 2 < sizes['full']
+        assert len(tracks) == 230 and all(track.details_loaded for track in tracks)
+
+    def test_not_found(self, server):
+        response = requests.get(server.url + 'tracks/' + 'z' * 22)
+        assert response.status_code == 404
+
+    def test_batch_limit(self, server, library):
+        response = requests.get(server.url + 'albums', params={'ids': ','.join(library.id(n) for n in range(21))})
+        assert response.status_code == 400
+
+    def test_rate_limit(self, server, sp):
+        """Assert requests over the rate limit get 429 responses, which the session waits out and retries."""
+        # Setup
+        server.rate_limit = 3
+        # Call
+        results = [sp.fetch_item(f'spotify:track:{SyntheticLibrary.id(n)}', raw=True) for n in range(5)]
+        # Assertions
+        assert [result['uri'] for result in results] == [f'spotify:track:{SyntheticLibrary.id(n)}' for n in range(5)]
+        assert server.throttled and sp.stats()['item']['retries'] == server.throttled
@@ -0,0 +1,92 @@
+import pytest
+import requests
+from unittest.mock import Mock, patch
+from spotipy import Spotify, SpotifyException
+from dotenv import load_dotenv
+
+from spotifytools.transport import Transport
+from spotifytools.spotify_session import SpotifySession
+
+
+class MockAdapter(requests.adapters.BaseAdapter):
+    """Adapter answering every request with the same content."""
+
+    def __init__(self, content, status=200):
+        super().__init__()
+        self.content = content
+        self.status = status
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = self.content
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+class TestTransport:
+
+    @pytest.fixture
+    def transport(self):
+        transport = Transport()
+        transport.mount('https://', MockAdapter(b'{"items": [1, 2]}'))
+        yield transport
+
+    @pytest.fixture
+    def client(self, transport):
+        client = Spotify(auth='token', requests_session=transport)
+        yield client
+
+    def test_json(self, client):
+        assert client._get('me') == {'items': [1, 2]}
+
+    def test_json_fallback(self, client):
+        """Assert responses are decoded with the standard library if orjson isn't installed."""
+        with patch('spotifytools.transport.orjson', None):
+            assert client._get('me') == {'items': [1, 2]}
+
+    def test_invalid_json(self, client, transport):
+        """Assert empty and invalid responses give None, like in spotipy."""
+        transport.mount('https://', MockAdapter(b'<html>'))
+        assert client._get('me') is None
+        transport.mount('https://', MockAdapter(b''))
+        assert client._get('me') is None
+
+    def test_request(self, client, transport):
+        """Assert requests are built like spotipy builds them."""
+        client._post('playlists/id/tracks', payload={'uris': ['uri']}, position=1)
+        request = transport.adapters['https://'].requests[0]
+        assert request.method == 'POST' and request.url.endswith('/v1/playlists/id/tracks?position=1')
+        assert request.headers['Authorization'] == 'Bearer token' and request.body == '{"uris": ["uri"]}'
+
+    def test_error(self, client, transport):
+        transport.mount('https://', MockAdapter(b'{"error": {"status": 404, "message": "Not found."}}', status=404))
+        with pytest.raises(SpotifyException) as error:
+            client._get('me')
+        assert error.value.http_status == 404 and 'Not found.' in error.value.msg
+
+    def test_server_error(self, client, transport):
+        """Assert server errors are raised with their status after a single request, to be retried by the limiter."""
+        transport.mount('https://', MockAdapter(b'{"error": {"status": 503, "message": "Unavailable."}}', status=503))
+        with pytest.raises(SpotifyException) as error:
+            client._get('me')
+        assert error.value.http_status == 503 and len(transport.adapters['https://'].requests) == 1
+
+    def test_no_retries(self):
+        """Assert the transport doesn't retry anything itself, retries are left to the rate limiter."""
+        retry = Transport().adapters['https://'].max_retries
+        assert retry.total == 0 and not retry.status_forcelist
+
+    def test_session(self, transport):
+        """Assert the session's client sends requests through the transport."""
+        load_dotenv()
+        sp = SpotifySession(transport=transport)
+        sp.connection._auth_headers = Mock(return_value={})
+        assert sp.connection._session is transport
+        assert sp.connection._get('me') == {'items': [1, 2]}